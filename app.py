@@ -1,21 +1,42 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
+import bisect
+import gzip
+import hashlib
 import json
-import math
+import re
 import sqlite3
+import zlib
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
 import requests
-from flask import Flask, request, render_template_string, session, url_for, redirect
+from flask import (
+    Flask,
+    Response,
+    g,
+    jsonify,
+    request,
+    render_template,
+    stream_template,
+    session,
+    url_for,
+    redirect,
+)
 
+from jinja2 import ChoiceLoader, DictLoader, FileSystemBytecodeCache, Template
+from markupsafe import Markup, escape
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from craftworld_api import (
     fetch_craftworld,
     fetch_masterpieces,
     fetch_masterpiece_details,
+    fetch_masterpiece_details_many,
     predict_reward,
     get_jwt,
-    fetch_proficiencies,
-    fetch_workshop_levels,
+    fetch_account_bundle,
     fetch_profile_by_uid,
     fetch_available_avatars,
 )
@@ -112,6 +133,20 @@ def init_db() -> None:
         '''
     )
 
+    # Per-unit predictReward results (fixed per masterpiece + token)
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS mp_unit_rewards (
+            masterpiece_id INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            points REAL NOT NULL,
+            xp REAL NOT NULL,
+            power REAL NOT NULL,
+            PRIMARY KEY (masterpiece_id, symbol)
+        )
+        '''
+    )
+
     conn.commit()
 
     conn.close()
@@ -156,6 +191,51 @@ def cache_masterpiece_metadata(mp: Dict[str, Any]) -> None:
         conn.close()
 
 
+def cache_masterpieces_metadata(mps: List[Dict[str, Any]]) -> None:
+    """
+    Batch version of cache_masterpiece_metadata(): one connection and one
+    commit for a whole masterpiece list.
+    """
+    params = []
+    for mp in mps:
+        try:
+            mid = int(mp.get("id") or 0)
+        except (TypeError, ValueError):
+            continue
+        if mid <= 0:
+            continue
+        params.append(
+            (
+                mid,
+                mp.get("name") or None,
+                mp.get("addressableLabel") or mp.get("addressable_label") or None,
+                mp.get("type") or None,
+                1 if mp.get("eventId") else 0,
+            )
+        )
+    if not params:
+        return
+
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            '''
+            INSERT INTO mp_metadata (id, name, addressable_label, type, is_event)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = COALESCE(excluded.name, mp_metadata.name),
+                addressable_label = COALESCE(excluded.addressable_label, mp_metadata.addressable_label),
+                type = COALESCE(excluded.type, mp_metadata.type),
+                is_event = excluded.is_event
+            ''',
+            params,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def load_masterpiece_metadata_cache() -> Dict[int, Dict[str, Any]]:
     """
     Load all cached MP metadata from the DB as a dict keyed by integer ID.
@@ -188,12 +268,117 @@ def load_masterpiece_metadata_cache() -> Dict[int, Dict[str, Any]]:
     return cache
 
 
+def build_mp_index(
+    masterpieces_data: List[Dict[str, Any]],
+) -> Tuple[Dict[int, Dict[str, Any]], int]:
+    """
+    Index a fetched masterpiece list by integer ID, store its metadata, and
+    overlay the cached metadata (names / labels for MPs the API no longer
+    lists). Returns (mp_by_id, max_mp_id).
+    """
+    mp_by_id: Dict[int, Dict[str, Any]] = {}
+    max_mp_id = 0
+    for mp in masterpieces_data:
+        try:
+            mid = int(mp.get("id") or 0)
+        except (TypeError, ValueError):
+            continue
+        if mid > 0:
+            mp_by_id[mid] = mp
+            if mid > max_mp_id:
+                max_mp_id = mid
+
+    # Seed the metadata cache with the list we just fetched.
+    try:
+        cache_masterpieces_metadata(masterpieces_data)
+    except Exception:
+        pass
+
+    # Merge cached metadata back into mp_by_id and extend max_mp_id if needed.
+    try:
+        mp_cache = load_masterpiece_metadata_cache()
+    except Exception:
+        mp_cache = {}
+
+    for mid, meta in mp_cache.items():
+        if mid in mp_by_id:
+            # Overlay stored fields (on a copy) without blowing away other keys.
+            # The cache was just seeded from this list, so usually nothing
+            # differs and the listed dict is kept as-is.
+            base = mp_by_id[mid]
+            overlay = {
+                key: val
+                for key, val in meta.items()
+                if val not in (None, "") and base.get(key) != val
+            }
+            if overlay:
+                mp_by_id[mid] = {**base, **overlay}
+        else:
+            mp_by_id[mid] = dict(meta)
+        if mid > max_mp_id:
+            max_mp_id = mid
+
+    return mp_by_id, max_mp_id
+
+
+def load_mp_unit_rewards(mid: int) -> Dict[str, Dict[str, float]]:
+    """
+    Stored per-unit rewards for one masterpiece: {SYMBOL: {points, xp, power}}.
+    """
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            'SELECT symbol, points, xp, power FROM mp_unit_rewards WHERE masterpiece_id = ?',
+            (mid,),
+        )
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    return {
+        row["symbol"]: {
+            "points": float(row["points"]),
+            "xp": float(row["xp"]),
+            "power": float(row["power"]),
+        }
+        for row in rows
+    }
+
+
+def save_mp_unit_rewards(mid: int, units: Dict[str, Dict[str, float]]) -> None:
+    """
+    Persist per-unit rewards for one masterpiece so a restarted worker
+    doesn't have to ask predictReward again.
+    """
+    if not units:
+        return
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            '''
+            INSERT OR REPLACE INTO mp_unit_rewards (masterpiece_id, symbol, points, xp, power)
+            VALUES (?, ?, ?, ?, ?)
+            ''',
+            [
+                (mid, sym, u["points"], u["xp"], u["power"])
+                for sym, u in units.items()
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
 
 from pricing import (
     fetch_live_prices_in_coin,
     fetch_buy_sell_for_profitability,
+    prices_snapshot_id,
     TOKEN_ADDRESSES,
 )
+from ttl_cache import TTLCache
 
 # Fixed display order for token charts dropdown
 TOKENS_CHART_ORDER = [
@@ -233,6 +418,8 @@ TOKENS_CHART_ORDER = [
 ]
 
 
+from snipe_core import combo_cost_rows, greedy_mix_plan, snipe_option_rows
+
 from factories import (
     my_factories,
     profit_per_hour,
@@ -241,6 +428,7 @@ from factories import (
     compute_best_setups_csv,
     FACTORY_DISPLAY_ORDER,
     FACTORY_DISPLAY_INDEX,
+    FACTORY_LEVELS_SORTED,
     MASTERY_BONUSES,
     WORKSHOP_MODIFIERS,
 )
@@ -315,13 +503,54 @@ MP_TIER_THRESHOLDS = [
     100_000_000,   # Tier 9
     200_000_000,   # Tier 10
 ]
+
+# How many leaderboard entries can be shown (Top 10 / 25 / 50 / 100)
+TOP_N_OPTIONS = [10, 25, 50, 100]
+DEFAULT_TOP_N = 50
+
+# Per-unit predictReward results are fixed per (masterpiece, token), so
+# keep every successful lookup for the life of the process, backed by the
+# mp_unit_rewards table (read once per masterpiece per process).
+_UNIT_REWARD_CACHE: Dict[tuple, Dict[str, float]] = {}
+_UNIT_REWARD_DB_LOADED: set = set()
+PREDICT_MAX_WORKERS = 8
+# Shared by every request's per-token predictReward fan-out (its own pool,
+# so it can't starve behind or deadlock with _FETCH_POOL tasks).
+_PREDICT_POOL = ThreadPoolExecutor(max_workers=PREDICT_MAX_WORKERS, thread_name_prefix="predict")
+
+
+# Views that need several independent network reads (live prices, the
+# account snapshot, a profile) start them on this shared pool up front,
+# so their latencies overlap instead of adding up.
+_FETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fetch")
+
+
+def prefetch(fn: Any, *args: Any) -> Future:
+    """Start fn(*args) on the fetch pool; .result() returns it or re-raises."""
+    return _FETCH_POOL.submit(fn, *args)
+
+
+def _predict_unit_reward(mp_id: str, sym: str) -> Optional[Dict[str, float]]:
+    """Per-unit rewards for one token, or None if predictReward came back empty."""
+    pr = predict_reward(mp_id, [{"symbol": sym, "amount": 1.0}])
+    if not pr:
+        return None
+    return {
+        "points": float(pr.get("masterpiecePoints") or 0.0),
+        "xp": float(pr.get("experiencePoints") or 0.0),
+        "power": float(pr.get("requiredPower") or 0.0),
+    }
+
+
 def get_mp_per_unit_rewards(mp_id: str, symbols: List[str]) -> Dict[str, Dict[str, float]]:
     """
     Pre-compute masterpiece points, XP, and battery (required power) per 1 unit
     for each symbol in `symbols`.
 
-    This is a thin wrapper around predict_reward(...) that calls it once per
-    unique token with amount = 1.0.
+    predictReward only returns totals for the whole list, so this asks once
+    per unique token with amount = 1.0. Known tokens come from
+    _UNIT_REWARD_CACHE / the mp_unit_rewards table; the rest are requested
+    in parallel and then stored.
 
     Returns a dict:
       {
@@ -338,23 +567,163 @@ def get_mp_per_unit_rewards(mp_id: str, symbols: List[str]) -> Dict[str, Dict[st
     if not mp_id or not unique_syms:
         return {"points": points, "xp": xp, "power": power}
 
-    for sym in unique_syms:
+    mp_key = str(mp_id)
+    try:
+        mid: Optional[int] = int(mp_key)
+    except ValueError:
+        mid = None
+
+    if mid is not None and mid not in _UNIT_REWARD_DB_LOADED:
+        _UNIT_REWARD_DB_LOADED.add(mid)
         try:
-            pr = predict_reward(mp_id, [{"symbol": sym, "amount": 1.0}]) or {}
-            points[sym] = float(pr.get("masterpiecePoints") or 0.0)
-            xp[sym] = float(pr.get("experiencePoints") or 0.0)
-            power[sym] = float(pr.get("requiredPower") or 0.0)
-        except Exception:
-            # If anything fails, just treat this token as 0 points / 0 XP / 0 power per unit
-            points[sym] = 0.0
-            xp[sym] = 0.0
-            power[sym] = 0.0
+            for sym, unit in load_mp_unit_rewards(mid).items():
+                _UNIT_REWARD_CACHE.setdefault((mp_key, sym), unit)
+        except Exception as e:
+            print(f"[predict] failed to load stored unit rewards for {mid}: {e}")
+
+    missing = [sym for sym in unique_syms if (mp_key, sym) not in _UNIT_REWARD_CACHE]
+    if missing:
+        fetched: Dict[str, Dict[str, float]] = {}
+        futures = {sym: _PREDICT_POOL.submit(_predict_unit_reward, mp_key, sym) for sym in missing}
+        for sym, fut in futures.items():
+            # Failed or empty answers are neither cached nor stored, so the
+            # next request retries this token.
+            try:
+                unit = fut.result()
+            except Exception as e:
+                print(f"[predict] {mp_key}/{sym} failed: {e}")
+                continue
+            if unit is None:
+                print(f"[predict] {mp_key}/{sym}: empty predictReward result")
+                continue
+            fetched[sym] = unit
+        for sym, unit in fetched.items():
+            _UNIT_REWARD_CACHE[(mp_key, sym)] = unit
+        if mid is not None and fetched:
+            try:
+                save_mp_unit_rewards(mid, fetched)
+            except Exception as e:
+                print(f"[predict] failed to store unit rewards for {mid}: {e}")
+
+    for sym in unique_syms:
+        # If anything failed, just treat this token as 0 points / 0 XP / 0 power per unit
+        unit = _UNIT_REWARD_CACHE.get((mp_key, sym)) or {}
+        points[sym] = unit.get("points", 0.0)
+        xp[sym] = unit.get("xp", 0.0)
+        power[sym] = unit.get("power", 0.0)
 
     return {"points": points, "xp": xp, "power": power}
 
 
 
 
+# Craft World account IDs look like "GfUeRBCZv8OwuUKq7Tu9JVpA70l1".
+_UID_RE = re.compile(r"[A-Za-z0-9]{28}")
+
+
+def _find_highlight_index(
+    rows: List[Dict[str, Any]],
+    highlight_query: str,
+) -> Optional[int]:
+    """
+    Index of the first leaderboard row matching highlight_query, or None.
+
+    A query shaped like an account ID is matched exactly against the
+    row UIDs first; anything else (or an ID with no exact hit) falls back
+    to a case-insensitive substring match on displayName / UID.
+    """
+    raw = (highlight_query or "").strip()
+    if not raw:
+        return None
+
+    if _UID_RE.fullmatch(raw):
+        for i, row in enumerate(rows):
+            if (row.get("profile") or {}).get("uid") == raw:
+                return i
+
+    q = raw.lower()
+    for i, row in enumerate(rows):
+        prof = row.get("profile") or {}
+        name = (prof.get("displayName") or "").lower()
+        uid = (prof.get("uid") or "").lower()
+        if q in name or q in uid:
+            return i
+    return None
+
+
+def mark_highlighted_rows(
+    rows: List[Dict[str, Any]],
+    highlight_query: str,
+) -> List[Dict[str, Any]]:
+    """
+    Return shallow copies of leaderboard rows with `_is_me`, a formatted
+    `points_str` and the display name pre-escaped (`name_safe`,
+    `initial_safe`), so the template reads plain attributes per row.
+    Copies keep the shared masterpiece payload untouched.
+    """
+    idx = _find_highlight_index(rows, highlight_query)
+    marked: List[Dict[str, Any]] = []
+    for i, row in enumerate(rows):
+        prof = row.get("profile") or {}
+        name = prof.get("displayName") or prof.get("walletAddress") or prof.get("uid") or "Unknown"
+        r = dict(row)
+        r["_is_me"] = i == idx
+        r["points_str"] = "{:,.0f}".format(float(row.get("masterpiecePoints") or 0))
+        r["name"] = name
+        r["name_safe"] = escape(name)
+        r["initial_safe"] = escape(name[:1].upper())
+        marked.append(r)
+    return marked
+
+
+def leaderboard_rows_compact(rows: List[Dict[str, Any]]) -> List[List[Any]]:
+    """
+    Compact leaderboard rows for the client-side renderer:
+      [position, name, uid, points_str, avatar_url, is_me]
+    Expects rows already passed through mark_highlighted_rows().
+    """
+    compact: List[List[Any]] = []
+    for row in rows:
+        prof = row.get("profile") or {}
+        compact.append(
+            [
+                row.get("position"),
+                row.get("name") or "Unknown",
+                prof.get("uid") or prof.get("walletAddress") or "",
+                row.get("points_str") or "0",
+                ipfs_to_http(prof.get("avatarUrl")),
+                1 if row.get("_is_me") else 0,
+            ]
+        )
+    return compact
+
+
+# {masterpiece id: (details payload, {position: row})}. The payload is the
+# shared cached_fetch_masterpiece_details() result, which must not be
+# mutated, so the index lives here and is rebuilt when it is refetched.
+_POSITION_INDEX_CACHE: Dict[str, Tuple[Dict[str, Any], Dict[Any, Dict[str, Any]]]] = {}
+POSITION_INDEX_CACHE_MAX = 16
+
+
+def leaderboard_position_index(mp: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+    """
+    {position: row} for the masterpiece's leaderboard (first row wins on
+    duplicates). Built once per fetched payload, so cached details only
+    pay for it once.
+    """
+    key = str(mp.get("id"))
+    entry = _POSITION_INDEX_CACHE.get(key)
+    if entry is not None and entry[0] is mp:
+        return entry[1]
+
+    leaderboard = mp.get("leaderboard") or []
+    index = {row.get("position"): row for row in reversed(leaderboard)}
+    if len(_POSITION_INDEX_CACHE) >= POSITION_INDEX_CACHE_MAX:
+        _POSITION_INDEX_CACHE.clear()
+    _POSITION_INDEX_CACHE[key] = (mp, index)
+    return index
+
+
 def compute_leaderboard_gap_for_highlight(
     rows: List[Dict[str, Any]],
     highlight_query: str,
@@ -371,28 +740,19 @@ def compute_leaderboard_gap_for_highlight(
     if not highlight_query or not rows:
         return None
 
-    q = highlight_query.lower()
-
     def _get_points(r: Dict[str, Any]) -> float:
         try:
             return float(r.get("masterpiecePoints") or 0)
         except Exception:
             return 0.0
 
-    def _get_name(r: Dict[str, Any]) -> str:
+    def _get_name(r: Dict[str, Any]) -> Markup:
+        # Escaped once here; the gap cards print it as-is.
         prof = r.get("profile") or {}
-        return prof.get("displayName") or prof.get("uid") or "?"
+        return escape(prof.get("displayName") or prof.get("uid") or "?")
 
     # Find the highlighted row
-    idx = None
-    for i, row in enumerate(rows):
-        prof = row.get("profile") or {}
-        name = (prof.get("displayName") or "").lower()
-        uid = (prof.get("uid") or "").lower()
-        if q in name or q in uid:
-            idx = i
-            break
-
+    idx = _find_highlight_index(rows, highlight_query)
     if idx is None:
         return None
 
@@ -431,6 +791,10 @@ def compute_leaderboard_gap_for_highlight(
         "above_pos": above_pos,
         "below_name": below_name,
         "below_pos": below_pos,
+        # Pre-formatted for the gap_card template macro
+        "points_str": "{:,.0f}".format(cur_pts),
+        "gap_up_str": "{:,.0f}".format(gap_up or 0),
+        "gap_down_str": "{:,.0f}".format(gap_down or 0),
     }
 
 def _default_boost_levels() -> dict[str, dict[str, int]]:
@@ -606,13 +970,194 @@ def save_boost_levels(levels: dict[str, dict[str, int]]) -> None:
 
 app = Flask(__name__)
 app.secret_key = "craftworld-tools-demo-secret"  # for session
+# Let browsers reuse /static files (backgrounds, calc.js) for a day.
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 86400
+
+# Inline page templates are registered by name (see compiled_template) so
+# they go through the loader path, which is what Jinja's template and
+# bytecode caches key on.
+_INLINE_TEMPLATES: Dict[str, str] = {}
+app.jinja_options = {
+    **app.jinja_options,
+    "loader": ChoiceLoader([app.create_global_jinja_loader(), DictLoader(_INLINE_TEMPLATES)]),
+}
+
+# Keep compiled templates hot between requests: never evict from the
+# template cache, and (outside debug) cache compiled bytecode on disk so
+# a restarted worker doesn't recompile everything. Flask already turns
+# off template auto-reload unless debug is on.
+if not app.debug:
+    app.jinja_options = {
+        **app.jinja_options,
+        "cache_size": -1,
+        "bytecode_cache": FileSystemBytecodeCache(),
+    }
+
+# -------- Inline template rendering --------
+# Every page template lives in this file as a string. Flask's
+# render_template_string() re-parses and recompiles the source on every
+# call, so compile each distinct source once and reuse the Template.
+@lru_cache(maxsize=64)
+def compiled_template(source: str) -> Template:
+    """
+    Compiled Template for an inline source string. The source is
+    registered under a content-hash name, so the bytecode cache can
+    serve it after a worker restart (a changed source gets a new name).
+    """
+    name = "inline/%s.html" % hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    _INLINE_TEMPLATES[name] = source
+    return app.jinja_env.get_template(name)
+
+
+def render_template_string(source: str, **context: Any) -> str:
+    """
+    Drop-in for flask.render_template_string() that reuses the compiled
+    template (context processors and signals still run as usual).
+    """
+    return render_template(compiled_template(source), **context)
+
+
+def stream_template_string(source: str, **context: Any):
+    """
+    Drop-in for flask.stream_template_string() backed by compiled_template().
+    """
+    return stream_template(compiled_template(source), **context)
+
+
+# Pages that render a body template extend BASE_TEMPLATE (registered under
+# this name below its definition) instead of rendering the body to a string
+# and passing it back in as `content`, so the whole page is one render.
+BASE_TEMPLATE_NAME = "inline/base.html"
+
+
+@lru_cache(maxsize=64)
+def page_template(content_source: str) -> str:
+    """
+    Full-page template source for a body template: the body becomes the
+    base layout's `content` block. Cached so the same source string (and
+    its hash) is reused for compiled_template() on every request.
+    """
+    return (
+        '{%% extends "%s" %%}{%% block content %%}' % BASE_TEMPLATE_NAME
+        + content_source
+        + "{% endblock %}"
+    )
+
+
+def render_template_block(source: str, block_name: str, **context: Any) -> str:
+    """
+    Render one {% block %} of an inline template on its own, for fetch()
+    requests that only need to swap a single section of the page.
+    """
+    template = compiled_template(source)
+    app.update_template_context(context)
+    return "".join(template.blocks[block_name](template.new_context(context)))
+
+
+# -------- Craft World fetch caching --------
+# The masterpieces and snipe pages ask for the same masterpiece details
+# several times per request (current / event / selected / planner), and
+# the MP list barely changes. Details are memoized on `g` for the request
+# and for a few seconds across requests; the list for a few minutes.
+MP_LIST_TTL_SECONDS = 300.0
+MP_DETAILS_TTL_SECONDS = 10.0
+_MP_LIST_CACHE = TTLCache(MP_LIST_TTL_SECONDS)
+_MP_DETAILS_CACHE = TTLCache(MP_DETAILS_TTL_SECONDS)
+
+
+def cached_fetch_masterpieces() -> List[Dict[str, Any]]:
+    """
+    fetch_masterpieces() with a MP_LIST_TTL_SECONDS cache. Returns shallow
+    copies because the views merge metadata into these dicts in place.
+    """
+    cached = _MP_LIST_CACHE.get("all")
+    if cached is None:
+        cached = fetch_masterpieces()
+        if cached:
+            _MP_LIST_CACHE.set("all", cached)
+    return [dict(mp) for mp in cached]
+
+
+def cached_fetch_masterpiece_details(masterpiece_id: Any) -> Dict[str, Any]:
+    """
+    fetch_masterpiece_details() memoized per request and for
+    MP_DETAILS_TTL_SECONDS across requests. Empty (failed) results are not
+    cached. The result is shared, so callers must not mutate it.
+    """
+    try:
+        key = str(int(masterpiece_id))
+    except (TypeError, ValueError):
+        return fetch_masterpiece_details(masterpiece_id)
+
+    memo: Dict[str, Dict[str, Any]] = g.setdefault("mp_details", {})
+    if key in memo:
+        return memo[key]
+
+    cached = _MP_DETAILS_CACHE.get(key)
+    if cached is None:
+        cached = fetch_masterpiece_details(key)
+        if cached:
+            _MP_DETAILS_CACHE.set(key, cached)
+    memo[key] = cached
+    return cached
+
+
+def warm_masterpiece_details(masterpiece_ids: List[Any]) -> None:
+    """
+    Load details for several masterpieces in one batched GraphQL request
+    (fetch_masterpiece_details_many) into the caches behind
+    cached_fetch_masterpiece_details(). Ids that are already cached are
+    skipped; with fewer than two left this is a no-op and the single-id
+    path fetches on demand. Ids that fail to load are remembered as empty
+    for the rest of the request, so they are not fetched again.
+    """
+    memo: Dict[str, Dict[str, Any]] = g.setdefault("mp_details", {})
+    missing: List[str] = []
+    for mid in masterpiece_ids:
+        try:
+            key = str(int(mid))
+        except (TypeError, ValueError):
+            continue
+        if key in memo or key in missing:
+            continue
+        if key in _MP_DETAILS_CACHE:
+            continue
+        missing.append(key)
+    if len(missing) < 2:
+        return
+
+    loaded = fetch_masterpiece_details_many(missing)
+    for key in missing:
+        details = loaded.get(key) or {}
+        if details:
+            _MP_DETAILS_CACHE.set(key, details)
+        memo[key] = details
+
+
+def _prices_cache_key(prices: Dict[str, float]) -> Optional[int]:
+    """
+    Cache key for results derived from `prices`: the snapshot_id of a
+    fetch_live_prices_in_coin() result, 0 when there are no prices. Other
+    price maps give None and their results are not cached.
+    """
+    if not prices:
+        return 0
+    return prices_snapshot_id(prices)
+
 
 @app.context_processor
 def inject_nav_user():
     """
     Provide `nav_profile` and `nav_avatar_url` to all templates.
     Uses profileByUID, which does not require the authenticated account scope.
+
+    Context processors run on every render, and a request can render more
+    than one template, so the profile is fetched once per request and
+    kept on `g`.
     """
+    if "nav_user" in g:
+        return g.nav_user
+
     uid = session.get("voya_uid")
     prof = None
     avatar_url = None
@@ -630,10 +1175,100 @@ def inject_nav_user():
 
     print("[inject_nav_user] nav_avatar_url:", avatar_url, flush=True)
 
-    return {
+    g.nav_user = {
         "nav_profile": prof,
         "nav_avatar_url": avatar_url,
     }
+    return g.nav_user
+
+
+# -------- Response compression (gzip) --------
+# Rendered pages are large, repetitive HTML, so gzip them for clients
+# that accept it; the JSON endpoints (leaderboard refresh, planner APIs)
+# and any JS/CSS compress just as well. Tiny responses aren't worth the CPU.
+COMPRESS_MIN_SIZE = 512
+COMPRESS_LEVEL = 5
+# Streamed pages are sync-flushed every time this much raw output has
+# been compressed, so the client gets the page progressively rather than
+# in one piece at the end (a flush per Jinja chunk would cost far more).
+COMPRESS_STREAM_FLUSH_BYTES = 4096
+COMPRESS_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "application/javascript",
+    "text/javascript",
+    "application/json",
+}
+
+
+@app.after_request
+def gzip_response(response: Response) -> Response:
+    """
+    Gzip text responses (COMPRESS_MIMETYPES) when the client accepts
+    gzip (a q=0 quality counts as refusing it).
+    Streamed responses are compressed chunk by chunk and flushed every
+    COMPRESS_STREAM_FLUSH_BYTES.
+    """
+    if not request.accept_encodings["gzip"]:
+        return response
+    if (
+        response.status_code < 200
+        or response.status_code >= 300
+        or response.status_code == 204
+        or response.mimetype not in COMPRESS_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    if response.direct_passthrough:
+        # send_file() output: only whole static text assets (calc.js) are
+        # read into memory and compressed; ranges and other files pass.
+        if request.endpoint != "static" or response.status_code != 200:
+            return response
+        response.direct_passthrough = False
+        response.make_sequence()
+
+    if response.is_streamed:
+        chunks = response.iter_encoded()
+        source = response.response
+
+        def _gzip_stream():
+            # wbits=31 -> gzip container
+            compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+            pending = 0
+            try:
+                for chunk in chunks:
+                    out = compressor.compress(chunk)
+                    pending += len(chunk)
+                    if pending >= COMPRESS_STREAM_FLUSH_BYTES:
+                        out += compressor.flush(zlib.Z_SYNC_FLUSH)
+                        pending = 0
+                    if out:
+                        yield out
+                yield compressor.flush()
+            finally:
+                close = getattr(source, "close", None)
+                if close is not None:
+                    close()
+
+        response.response = _gzip_stream()
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(gzip.compress(data, COMPRESS_LEVEL))
+
+    # The gzip body is a different representation, so a strong validator
+    # (e.g. a static file's ETag) may only be kept as a weak one.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
 @app.route("/player/<uid>")
 def player_view(uid: str):
     """
@@ -658,6 +1293,9 @@ def player_view(uid: str):
 
     mp_id = (request.args.get("mp_id") or "").strip() or None
 
+    # Account data is fetched alongside the profile
+    account_future = prefetch(fetch_craftworld, uid)
+
     # 1) Profile (name, avatar, wallet, etc.)
     try:
         profile = fetch_profile_by_uid(uid)
@@ -666,7 +1304,7 @@ def player_view(uid: str):
 
     # 2) Full account data (resources, land, etc.)
     try:
-        account = fetch_craftworld(uid)
+        account = account_future.result()
     except Exception as e:
         if error:
             error += f" | Error fetching account: {e}"
@@ -748,7 +1386,7 @@ def player_view(uid: str):
     # 3) Position on a specific masterpiece, if mp_id provided
     if mp_id:
         try:
-            mp = fetch_masterpiece_details(mp_id)
+            mp = cached_fetch_masterpiece_details(mp_id)
             lb = mp.get("leaderboard") or []
             gap = compute_leaderboard_gap_for_highlight(lb, uid)
         except Exception as e:
@@ -862,9 +1500,9 @@ def player_view(uid: str):
             else:
                 error = f"Error computing donation stats: {e}"
 
-    # Render inner content
-    content_html = render_template_string(
-        PLAYER_VIEW_TEMPLATE,
+    # Wrap in your base layout
+    html = render_template_string(
+        page_template(PLAYER_VIEW_TEMPLATE),
         error=error,
         uid=uid,
         profile=profile or {},
@@ -876,12 +1514,6 @@ def player_view(uid: str):
         donation_rows=donation_rows,
         donation_summary=donation_summary,
         battery_plan_rows=battery_plan_rows,
-    )
-
-    # Wrap in your base layout
-    html = render_template_string(
-        BASE_TEMPLATE,
-        content=content_html,
         active_page="player",
         has_uid=has_uid_flag(),
     )
@@ -904,6 +1536,12 @@ app.jinja_env.filters["ipfs_to_http"] = ipfs_to_http
 
 # -------- Helper: do we have a UID stored? --------
 def has_uid_flag() -> bool:
+    """
+    True if an account UID is saved in the session. This is a plain dict
+    lookup on the session Flask already loaded for the request, so it is
+    not memoized on `g`: that would cost the same and could go stale when
+    the Overview POST saves a new UID mid-request.
+    """
     return bool(session.get("voya_uid"))
 
 
@@ -1753,7 +2391,7 @@ tr:nth-child(odd) td {
   </div>
 
   <div class="container">
-    {{ content|safe }}
+    {% block content %}{{ content|safe }}{% endblock %}
   </div>
 
   <script>
@@ -1826,6 +2464,7 @@ tr:nth-child(odd) td {
 </body>
 </html>
 """
+_INLINE_TEMPLATES[BASE_TEMPLATE_NAME] = BASE_TEMPLATE
 
 
 
@@ -1936,13 +2575,10 @@ def index():
     """
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            uid=uid,
-            result=result,
-            error=error,
-        ),
+        page_template(content),
+        uid=uid,
+        result=result,
+        error=error,
         active_page="overview",
         has_uid=has_uid_flag(),
     )
@@ -2016,16 +2652,10 @@ def register():
     </div>
     """
 
-    # First render the inner content template so Jinja tags inside it work
-    inner = render_template_string(
-        content,
-        error=error,
-    )
-
-    # Then inject that rendered HTML into the base template
+    # Render the page inside the base template
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=inner,
+        page_template(content),
+        error=error,
         active_page="login",
         has_uid=has_uid_flag(),
     )
@@ -2094,14 +2724,9 @@ def login():
     </div>
     """
 
-    inner = render_template_string(
-        content,
-        error=error,
-    )
-
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=inner,
+        page_template(content),
+        error=error,
         active_page="login",
         has_uid=has_uid_flag(),
     )
@@ -2598,6 +3223,9 @@ def dashboard():
     coin_usd = 0.0
     uid = session.get("voya_uid")
 
+    # Account snapshot is fetched alongside the prices
+    cw_future = prefetch(fetch_craftworld, uid) if uid else None
+
     # --- 1) Live prices (COIN + USD) ---
     try:
         prices = fetch_live_prices_in_coin()
@@ -2623,9 +3251,9 @@ def dashboard():
     inventory_rows = []
     factory_rows = []
 
-    if uid:
+    if cw_future is not None:
         try:
-            cw = fetch_craftworld(uid)
+            cw = cw_future.result()
 
             # 2a) Inventory / resources
             resources = attr_or_key(cw, "resources", []) or []
@@ -2754,8 +3382,7 @@ def dashboard():
 
             # --- Base profit at current level ---
             try:
-                res_cur = compute_factory_result_csv(
-                    FACTORIES_FROM_CSV,
+                res_cur = cached_factory_result(
                     prices,
                     token,
                     level,
@@ -2816,8 +3443,7 @@ def dashboard():
 
                 # Profit at next level
                 try:
-                    res_next = compute_factory_result_csv(
-                        FACTORIES_FROM_CSV,
+                    res_next = cached_factory_result(
                         prices,
                         token,
                         next_level,
@@ -3046,24 +3672,21 @@ def dashboard():
 
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            uid=uid,
-            price_rows=price_rows,
-            coin_usd=coin_usd,
-            error=error,
-            inventory_rows=inventory_rows,
-            factory_rows=factory_rows,
-            global_coin_hour=global_coin_hour,
-            global_coin_day=global_coin_day,
-            global_usd_hour=global_usd_hour,
-            global_usd_day=global_usd_day,
-            best_factory=best_factory,
-            worst_factory=worst_factory,  # <-- fix this
-            upgrade_suggestions=upgrade_suggestions,
-            token_addresses=TOKEN_ADDRESSES,
-        ),
+        page_template(content),
+        uid=uid,
+        price_rows=price_rows,
+        coin_usd=coin_usd,
+        error=error,
+        inventory_rows=inventory_rows,
+        factory_rows=factory_rows,
+        global_coin_hour=global_coin_hour,
+        global_coin_day=global_coin_day,
+        global_usd_hour=global_usd_hour,
+        global_usd_day=global_usd_day,
+        best_factory=best_factory,
+        worst_factory=worst_factory,  # <-- fix this
+        upgrade_suggestions=upgrade_suggestions,
+        token_addresses=TOKEN_ADDRESSES,
         active_page="dashboard",
         has_uid=has_uid_flag(),
     )
@@ -3142,16 +3765,11 @@ def charts():
     </div>
     """
 
-    content = render_template_string(
-        content,
+    html = render_template_string(
+        page_template(content),
         tokens=tokens,
         selected=selected,
         addr=addr,
-    )
-
-    html = render_template_string(
-        BASE_TEMPLATE,
-        content=content,
         active_page="charts",
         has_uid=has_uid_flag(),
     )
@@ -3177,6 +3795,9 @@ def resource_view(token: str):
     coin_usd = 0.0
     uid = session.get("voya_uid")
 
+    # Inventory snapshot is fetched alongside the prices
+    cw_future = prefetch(fetch_craftworld, uid) if uid else None
+
     # 1) Prices
     try:
         prices = fetch_live_prices_in_coin()
@@ -3195,9 +3816,9 @@ def resource_view(token: str):
     total_bag_coin = 0.0
     percent_of_bag = None
 
-    if uid:
+    if cw_future is not None:
         try:
-            cw = fetch_craftworld(uid)
+            cw = cw_future.result()
             resources = attr_or_key(cw, "resources", []) or []
             for r in resources:
                 rsym = str(attr_or_key(r, "symbol", "")).upper()
@@ -3240,8 +3861,7 @@ def resource_view(token: str):
                 prof_craft = 0.0
                 crafts_per_hour = 0.0
                 try:
-                    res = compute_factory_result_csv(
-                        FACTORIES_FROM_CSV,
+                    res = cached_factory_result(
                         prices,
                         fac_name,
                         int(lvl),
@@ -3411,22 +4031,19 @@ def resource_view(token: str):
     """
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            sym=sym,
-            uid=uid,
-            price_coin=price_coin,
-            price_usd=price_usd,
-            coin_usd=coin_usd,
-            holding_amount=holding_amount,
-            holding_value_coin=holding_value_coin,
-            holding_value_usd=holding_value_usd,
-            percent_of_bag=percent_of_bag,
-            error=error,
-            producers=producers,
-            consumers=consumers,
-        ),
+        page_template(content),
+        sym=sym,
+        uid=uid,
+        price_coin=price_coin,
+        price_usd=price_usd,
+        coin_usd=coin_usd,
+        holding_amount=holding_amount,
+        holding_value_coin=holding_value_coin,
+        holding_value_usd=holding_value_usd,
+        percent_of_bag=percent_of_bag,
+        error=error,
+        producers=producers,
+        consumers=consumers,
         active_page="dashboard",  # keep Dashboard highlighted
         has_uid=has_uid_flag(),
     )
@@ -3461,6 +4078,9 @@ def profitability():
     error = None
     uid = session.get("voya_uid")
 
+    # Prices (needed further down) are fetched alongside the account data
+    prices_future = prefetch(fetch_live_prices_in_coin)
+
     # 1) Load factories from Craft World (by UID)
     player_factories: List[dict] = []
     try:
@@ -3502,8 +4122,8 @@ def profitability():
 
     # Fallback: if nothing from account, list everything from CSV
     if not player_factories:
-        for t, lvls in FACTORIES_FROM_CSV.items():
-            for lvl in sorted(lvls.keys()):
+        for t in FACTORIES_FROM_CSV:
+            for lvl in FACTORY_LEVELS_SORTED.get(t, ()):
                 player_factories.append({"token": t, "level": lvl, "count": 1})
 
     # 2) Load saved UI state from session
@@ -3658,7 +4278,7 @@ def profitability():
 
     try:
         # 1) Flat SELL-focused prices + COIN → USD
-        prices_flat = fetch_live_prices_in_coin()
+        prices_flat = prices_future.result()
         coin_usd = float(prices_flat.get("_COIN_USD", 0.0))
 
         # 2) BUY / SELL matrix for relevant symbols using exactInputQuote
@@ -4039,23 +4659,20 @@ def profitability():
 
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            rows=rows,
-            error=error,
-            global_speed=global_speed,
-            global_yield=global_yield,
-            total_coin_hour=total_coin_hour,
-            total_coin_day=total_coin_day,
-            total_usd_hour=total_usd_hour,
-            total_usd_day=total_usd_day,
-            coin_usd=coin_usd,
-            sort_mode=sort_mode,
-            input_price_mode=input_price_mode,
-            debug_earth_sell=debug_earth_sell,
-            debug_earth_buy=debug_earth_buy,
-        ),
+        page_template(content),
+        rows=rows,
+        error=error,
+        global_speed=global_speed,
+        global_yield=global_yield,
+        total_coin_hour=total_coin_hour,
+        total_coin_day=total_coin_day,
+        total_usd_hour=total_usd_hour,
+        total_usd_day=total_usd_day,
+        coin_usd=coin_usd,
+        sort_mode=sort_mode,
+        input_price_mode=input_price_mode,
+        debug_earth_sell=debug_earth_sell,
+        debug_earth_buy=debug_earth_buy,
         active_page="profit",
         has_uid=has_uid_flag(),
     )
@@ -4186,6 +4803,9 @@ def flex_planner():
         session["flex_sim_amount"] = sim_amount
 
 
+    # Prices (needed further down) are fetched alongside the account data
+    prices_future = prefetch(fetch_live_prices_in_coin)
+
     # 1) Load CraftWorld account data for inventory
     inventory: Dict[str, float] = {}
     try:
@@ -4245,12 +4865,11 @@ def flex_planner():
 
 
     try:
-        prices = fetch_live_prices_in_coin()
+        prices = prices_future.result()
         coin_usd = float(prices.get("_COIN_USD", 0.0))
 
         # 2) Get a big list of best setups (1 factory each, no flex shape yet)
-        best_rows, combined_speed, _worker_factor = compute_best_setups_csv(
-            FACTORIES_FROM_CSV,
+        best_rows, combined_speed, _worker_factor = cached_best_setups_csv(
             prices,
             speed_factor=speed_factor,
             workers=workers,
@@ -4812,31 +5431,28 @@ def flex_planner():
     """
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            error=error,
-            inventory_rows=inventory_rows,
-            bands=bands,
-            candidates=candidates,
-            yield_pct=yield_pct,
-            speed_factor=speed_factor,
-            workers=workers,
-            upgrade_budget_coin=upgrade_budget_coin,
-            total_coin_hour=total_coin_hour,
-            total_usd_hour=total_usd_hour,
-            combined_speed=combined_speed,
-            coin_usd=coin_usd,
-            summary_rows=summary_rows,
-            total_shortfall_coin_layout=total_shortfall_coin_layout,
-            priority_rows=priority_rows,
-            sim_tokens=sim_tokens,
-            sim_token=sim_token,
-            sim_amount=sim_amount,
-            flex_share_text=flex_share_text,
+        page_template(content),
+        error=error,
+        inventory_rows=inventory_rows,
+        bands=bands,
+        candidates=candidates,
+        yield_pct=yield_pct,
+        speed_factor=speed_factor,
+        workers=workers,
+        upgrade_budget_coin=upgrade_budget_coin,
+        total_coin_hour=total_coin_hour,
+        total_usd_hour=total_usd_hour,
+        combined_speed=combined_speed,
+        coin_usd=coin_usd,
+        summary_rows=summary_rows,
+        total_shortfall_coin_layout=total_shortfall_coin_layout,
+        priority_rows=priority_rows,
+        sim_tokens=sim_tokens,
+        sim_token=sim_token,
+        sim_amount=sim_amount,
+        flex_share_text=flex_share_text,
 
 
-        ),
         active_page="flex",
         has_uid=has_uid_flag(),
     )
@@ -4855,8 +5471,10 @@ def mastery_view():
     rows: List[dict] = []
 
     try:
-        profs = fetch_proficiencies()       # { "MUD": {"collectedAmount": ..., "claimedLevel": ...}, ... }
-        ws_levels = fetch_workshop_levels() # { "MUD": 2, "CLAY": 5, ... }
+        # One account query for both:
+        #   profs     = { "MUD": {"collectedAmount": ..., "claimedLevel": ...}, ... }
+        #   ws_levels = { "MUD": 2, "CLAY": 5, ... }
+        profs, ws_levels = fetch_account_bundle()
 
         symbols = sorted(set(list(profs.keys()) + list(ws_levels.keys())))
 
@@ -4935,8 +5553,9 @@ def mastery_view():
     """
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(content, rows=rows, error=error),
+        page_template(content),
+        rows=rows,
+        error=error,
         active_page="mastery",
         has_uid=has_uid_flag(),
     )
@@ -4979,13 +5598,16 @@ def inventory_view():
     total_coin_value = 0.0
     total_usd_value = 0.0
 
+    # Account data is fetched alongside the prices
+    cw_future = prefetch(fetch_craftworld, uid)
+
     try:
         # Prices
         prices = fetch_live_prices_in_coin()
         coin_usd = float(prices.get("_COIN_USD", 0.0))
 
         # Account data
-        cw = fetch_craftworld(uid)
+        cw = cw_future.result()
         resources = attr_or_key(cw, "resources", []) or []
 
         for r in resources:
@@ -5107,17 +5729,14 @@ def inventory_view():
     """
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            uid=uid,
-            coin_usd=coin_usd,
-            inventory_rows=inventory_rows,
-            total_coin_value=total_coin_value,
-            total_usd_value=total_usd_value,
-            summary_text=summary_text,
-            error=error,
-        ),
+        page_template(content),
+        uid=uid,
+        coin_usd=coin_usd,
+        inventory_rows=inventory_rows,
+        total_coin_value=total_coin_value,
+        total_usd_value=total_usd_value,
+        summary_text=summary_text,
+        error=error,
         active_page="inventory",
         has_uid=has_uid_flag(),
     )
@@ -5226,12 +5845,9 @@ def boosts():
     """
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            tokens=tokens,
-            levels_map=levels_map,
-        ),
+        page_template(content),
+        tokens=tokens,
+        levels_map=levels_map,
         active_page="boosts",
         has_uid=has_uid_flag(),
     )
@@ -5486,6 +6102,29 @@ PLAYER_VIEW_TEMPLATE = """
 
 # ================= MASTERPIECES TAB TEMPLATE ==================
 MASTERPIECES_TEMPLATE = """
+{% macro gap_card(gap, title, lead) %}
+  <div style="margin-top:0.5rem; font-size:0.9rem;">
+    <strong>{{ title }}</strong>
+    {{ lead }} <strong>#{{ gap.position }}</strong>
+    with
+    <strong>{{ gap.points_str }}</strong>
+    points.
+    {% if gap.above_name %}
+      <br>
+      Need
+      <strong>{{ gap.gap_up_str }}</strong>
+      points to pass {{ gap.above_name }}
+      (#{{ gap.above_pos }}).
+    {% endif %}
+    {% if gap.below_name %}
+      <br>
+      You are ahead of {{ gap.below_name }}
+      (#{{ gap.below_pos }}) by
+      <strong>{{ gap.gap_down_str }}</strong>
+      points.
+    {% endif %}
+  </div>
+{% endmacro %}
 <div class="card">
   <h1>Masterpieces</h1>
 
@@ -5711,20 +6350,29 @@ MASTERPIECES_TEMPLATE = """
         </p>
       {% endif %}
 
-      {% if current_mp_top50 %}
+      {% if current_mp_count %}
+        {# Loop-invariant: resolve the MP id once, not per row. #}
+        {% set current_lb_mp_id = current_mp.id if current_mp else None %}
         <div class="mp-leaderboard-box">
+          {% if lb_client_render %}
+            <div
+              class="mp-leaderboard-list"
+              data-lb-rows='{{ current_lb_rows|tojson }}'
+              data-lb-refresh="{{ url_for('api_mp_top', mp_id=current_lb_mp_id, top_n=top_n) }}"
+              data-player-url="{{ url_for('player_view', uid='__uid__', mp_id=current_lb_mp_id) }}"
+            ></div>
+          {% else %}
           <div class="mp-leaderboard-list">
             {% for row in current_mp_top50 %}
               {% set prof = row.profile or {} %}
-              {% set name = prof.displayName or prof.walletAddress or prof.uid or "Unknown" %}
-              <div class="mp-row {% if current_gap and row.position == current_gap.position %}mp-row--me{% endif %}">
+              <div class="mp-row {% if row._is_me %}mp-row--me{% endif %}">
                 <div class="mp-rank">{{ row.position }}</div>
                 <div class="mp-avatar">
                   {% if prof.avatarUrl %}
-                    <img src="{{ prof.avatarUrl|ipfs_to_http }}" alt="{{ name }} avatar" loading="lazy">
+                    <img src="{{ prof.avatarUrl|ipfs_to_http }}" alt="{{ row.name_safe }} avatar" loading="lazy">
                   {% else %}
                     <div class="mp-avatar-placeholder">
-                      {{ name[0]|upper }}
+                      {{ row.initial_safe }}
                     </div>
                   {% endif %}
                 </div>
@@ -5733,48 +6381,29 @@ MASTERPIECES_TEMPLATE = """
                     href="{{ url_for(
                             'player_view',
                             uid=prof.uid or prof.walletAddress,
-                            mp_id=current_mp.id if current_mp else None
+                            mp_id=current_lb_mp_id
                           ) }}"
                     class="mp-name-link"
                     target="_blank"
                     rel="noopener"
                   >
-                    {{ name }}
+                    {{ row.name_safe }}
                   </a>
                 </div>
                 <div class="mp-points">
-                  {{ "{:,.0f}".format(row.masterpiecePoints or 0) }}
+                  {{ row.points_str }}
                 </div>
               </div>
             {% endfor %}
           </div>
+          {% endif %}
         </div>
       {% else %}
         <p class="hint">No general leaderboard data available.</p>
       {% endif %}
 
       {% if current_gap %}
-        <div style="margin-top:0.5rem; font-size:0.9rem;">
-          <strong>Your gap:</strong>
-          You are currently <strong>#{{ current_gap.position }}</strong>
-          with
-          <strong>{{ "{:,.0f}".format(current_gap.points or 0) }}</strong>
-          points.
-          {% if current_gap.above_name %}
-            <br>
-            Need
-            <strong>{{ "{:,.0f}".format(current_gap.gap_up or 0) }}</strong>
-            points to pass {{ current_gap.above_name }}
-            (#{{ current_gap.above_pos }}).
-          {% endif %}
-          {% if current_gap.below_name %}
-            <br>
-            You are ahead of {{ current_gap.below_name }}
-            (#{{ current_gap.below_pos }}) by
-            <strong>{{ "{:,.0f}".format(current_gap.gap_down or 0) }}</strong>
-            points.
-          {% endif %}
-        </div>
+        {{ gap_card(current_gap, "Your gap:", "You are currently") }}
       {% else %}
         <p class="hint">
           To see your personal gap, enter your in-game name or Account ID
@@ -5792,24 +6421,34 @@ MASTERPIECES_TEMPLATE = """
         </p>
       {% endif %}
 
-      {# 
-        Uses `event_mp_top50` and optional `event_gap` if you provide them
-        from Python. `is defined` prevents template errors for now.
-      #}
-      {% if event_mp_top50 is defined and event_mp_top50 %}
+      {% if event_mp_count %}
+        {% set event_lb_mp_id = (
+             event_snapshot.mp.id
+             if event_snapshot and event_snapshot.mp
+             else (current_event_mp.id if current_event_mp else None)
+           ) %}
         <div class="mp-leaderboard-box">
+          {% if lb_client_render %}
+            {# Hidden until the Event subtab is opened; fetched on first activation. #}
+            <div
+              class="mp-leaderboard-list"
+              data-lb-src="{{ url_for('api_mp_top', mp_id=event_lb_mp_id, top_n=top_n) }}"
+              data-player-url="{{ url_for('player_view', uid='__uid__', mp_id=event_lb_mp_id) }}"
+            >
+              <p class="hint">Loading event leaderboard…</p>
+            </div>
+          {% else %}
           <div class="mp-leaderboard-list">
             {% for row in event_mp_top50 %}
               {% set prof = row.profile or {} %}
-              {% set name = prof.displayName or prof.walletAddress or prof.uid or "Unknown" %}
-              <div class="mp-row {% if event_gap is defined and event_gap and row.position == event_gap.position %}mp-row--me{% endif %}">
+              <div class="mp-row {% if row._is_me %}mp-row--me{% endif %}">
                 <div class="mp-rank">{{ row.position }}</div>
                 <div class="mp-avatar">
                   {% if prof.avatarUrl %}
-                    <img src="{{ prof.avatarUrl|ipfs_to_http }}" alt="{{ name }} avatar" loading="lazy">
+                    <img src="{{ prof.avatarUrl|ipfs_to_http }}" alt="{{ row.name_safe }} avatar" loading="lazy">
                   {% else %}
                     <div class="mp-avatar-placeholder">
-                      {{ name[0]|upper }}
+                      {{ row.initial_safe }}
                     </div>
                   {% endif %}
                 </div>
@@ -5818,25 +6457,22 @@ MASTERPIECES_TEMPLATE = """
                     href="{{ url_for(
                             'player_view',
                             uid=prof.uid or prof.walletAddress,
-                            mp_id=(
-                              event_snapshot.mp.id
-                              if event_snapshot and event_snapshot.mp
-                              else (current_event_mp.id if current_event_mp else None)
-                            )
+                            mp_id=event_lb_mp_id
                           ) }}"
                     class="mp-name-link"
                     target="_blank"
                     rel="noopener"
                   >
-                    {{ name }}
+                    {{ row.name_safe }}
                   </a>
                 </div>
                 <div class="mp-points">
-                  {{ "{:,.0f}".format(row.masterpiecePoints or 0) }}
+                  {{ row.points_str }}
                 </div>
               </div>
             {% endfor %}
           </div>
+          {% endif %}
         </div>
       {% else %}
         <p class="hint">No event leaderboard data available.</p>
@@ -5845,6 +6481,53 @@ MASTERPIECES_TEMPLATE = """
 
 
   <!-- ================= REWARDS & TOTALS ================= -->
+  {# Block so ?fragment=rewards can render just this section. #}
+  {% block rewards_section %}
+{% macro reward_chips(rewards, fallback_text) %}
+  <td class="rewards-cell">
+    {% if rewards %}
+      {% for reward in rewards %}
+        <div class="reward-chip">
+          {# ICON #}
+          {% if reward.__typename == 'Avatar' %}
+            <img
+              class="reward-icon"
+              src="{{ reward.avatarUrl }}"
+              alt="Avatar reward"
+              loading="lazy"
+            >
+          {% elif reward.__typename == 'Badge' %}
+            <img
+              class="reward-icon"
+              src="{{ reward.url|ipfs_to_http }}"
+              alt="{{ reward.displayName or reward.badgeName }}"
+              loading="lazy"
+            >
+          {% endif %}
+
+          {# LABEL #}
+          {% if reward.__typename == 'Resource' %}
+            <span>{{ reward.amount|int }} {{ reward.symbol }}</span>
+          {% elif reward.__typename == 'Avatar' %}
+            <span>Avatar</span>
+          {% elif reward.__typename == 'Badge' %}
+            <span>{{ reward.displayName or reward.badgeName }}</span>
+          {% elif reward.__typename == 'TradePack' %}
+            <span>{{ reward.amount }}x Trade Pack</span>
+          {% elif reward.__typename == 'BuildingReward' %}
+            <span>{{ reward.buildingSubType }} ({{ reward.buildingType }})</span>
+          {% elif reward.__typename == 'OnChainToken' %}
+            <span>{{ reward.symbol }}</span>
+          {% else %}
+            <span>{{ reward.__typename }}</span>
+          {% endif %}
+        </div>
+      {% endfor %}
+    {% else %}
+      {{ fallback_text }}
+    {% endif %}
+  </td>
+{% endmacro %}
   <div id="rewards" style="margin-top:1.5rem;">
     <h2>Rewards &amp; Totals</h2>
 
@@ -5891,13 +6574,7 @@ MASTERPIECES_TEMPLATE = """
         </tr>
       </thead>
       <tbody>
-        {% for row in tier_rows %}
-          <tr>
-            <td>Tier {{ row.tier }}</td>
-            <td>{{ "{:,.0f}".format(row.required) }}</td>
-            <td>{{ "{:,.0f}".format(row.delta) }}</td>
-          </tr>
-        {% endfor %}
+        {{ tier_ladder_rows_html }}
       </tbody>
     </table>
 
@@ -5919,93 +6596,9 @@ MASTERPIECES_TEMPLATE = """
               <td>{{ row.tier }}</td>
               <td>{{ row.required }}</td>
 
-              {# ===== BASE REWARDS WITH IMAGES ===== #}
-              <td class="rewards-cell">
-                {% if row.rewards %}
-                  {% for reward in row.rewards %}
-                    <div class="reward-chip">
-                      {# ICON #}
-                      {% if reward.__typename == 'Avatar' %}
-                        <img
-                          class="reward-icon"
-                          src="{{ reward.avatarUrl }}"
-                          alt="Avatar reward"
-                          loading="lazy"
-                        >
-                      {% elif reward.__typename == 'Badge' %}
-                        <img
-                          class="reward-icon"
-                          src="{{ reward.url|ipfs_to_http }}"
-                          alt="{{ reward.displayName or reward.badgeName }}"
-                          loading="lazy"
-                        >
-                      {% endif %}
-
-                      {# LABEL #}
-                      {% if reward.__typename == 'Resource' %}
-                        <span>{{ reward.amount|int }} {{ reward.symbol }}</span>
-                      {% elif reward.__typename == 'Avatar' %}
-                        <span>Avatar</span>
-                      {% elif reward.__typename == 'Badge' %}
-                        <span>{{ reward.displayName or reward.badgeName }}</span>
-                      {% elif reward.__typename == 'TradePack' %}
-                        <span>{{ reward.amount }}x Trade Pack</span>
-                      {% elif reward.__typename == 'BuildingReward' %}
-                        <span>{{ reward.buildingSubType }} ({{ reward.buildingType }})</span>
-                      {% elif reward.__typename == 'OnChainToken' %}
-                        <span>{{ reward.symbol }}</span>
-                      {% else %}
-                        <span>{{ reward.__typename }}</span>
-                      {% endif %}
-                    </div>
-                  {% endfor %}
-                {% else %}
-                  {{ row.rewards_text }}
-                {% endif %}
-              </td>
-
-              {# ===== RAWRPASS REWARDS WITH IMAGES ===== #}
-              <td class="rewards-cell">
-                {% if row.battlepass_rewards %}
-                  {% for reward in row.battlepass_rewards %}
-                    <div class="reward-chip">
-                      {% if reward.__typename == 'Avatar' %}
-                        <img
-                          class="reward-icon"
-                          src="{{ reward.avatarUrl }}"
-                          alt="Avatar reward"
-                          loading="lazy"
-                        >
-                      {% elif reward.__typename == 'Badge' %}
-                        <img
-                          class="reward-icon"
-                          src="{{ reward.url|ipfs_to_http }}"
-                          alt="{{ reward.displayName or reward.badgeName }}"
-                          loading="lazy"
-                        >
-                      {% endif %}
-
-                      {% if reward.__typename == 'Resource' %}
-                        <span>{{ reward.amount|int }} {{ reward.symbol }}</span>
-                      {% elif reward.__typename == 'Avatar' %}
-                        <span>Avatar</span>
-                      {% elif reward.__typename == 'Badge' %}
-                        <span>{{ reward.displayName or reward.badgeName }}</span>
-                      {% elif reward.__typename == 'TradePack' %}
-                        <span>{{ reward.amount }}x Trade Pack</span>
-                      {% elif reward.__typename == 'BuildingReward' %}
-                        <span>{{ reward.buildingSubType }} ({{ reward.buildingType }})</span>
-                      {% elif reward.__typename == 'OnChainToken' %}
-                        <span>{{ reward.symbol }}</span>
-                      {% else %}
-                        <span>{{ reward.__typename }}</span>
-                      {% endif %}
-                    </div>
-                  {% endfor %}
-                {% else %}
-                  {{ row.battlepass_text }}
-                {% endif %}
-              </td>
+              {# ===== BASE / RAWRPASS REWARDS WITH IMAGES ===== #}
+              {{ reward_chips(row.rewards, row.rewards_text) }}
+              {{ reward_chips(row.battlepass_rewards, row.battlepass_text) }}
             </tr>
           {% endfor %}
         </tbody>
@@ -6021,97 +6614,31 @@ MASTERPIECES_TEMPLATE = """
     <!-- Totals (base / BP / combined) -->
     <h3 style="margin-top:1rem;">Total resource rewards</h3>
 
-    <div style="display:flex; gap:1rem; flex-wrap:wrap;">
-      <div style="flex:1 1 240px;">
-        <h4>Base track only</h4>
-        {% if tier_base_totals_list %}
-          <table class="table">
-            <thead>
-              <tr>
-                <th>Token</th>
-                <th>Amount</th>
-                <th>Value (COIN)</th>
-                <th>Value (USD)</th>
-              </tr>
-            </thead>
-            <tbody>
-              {% for row in tier_base_totals_list %}
-                <tr>
-                  <td>{{ row.symbol }}</td>
-                  <td>{{ "{:,.0f}".format(row.amount) }}</td>
-                  <td>{{ "{:,.2f}".format(row.coin_value) }}</td>
-                  <td>{{ "{:,.2f}".format(row.usd_value) }}</td>
-                </tr>
-              {% endfor %}
-            </tbody>
-          </table>
-        {% else %}
-          <p class="hint">No numeric base rewards detected.</p>
-        {% endif %}
-      </div>
-
-      <div style="flex:1 1 240px;">
-        <h4>RawrPass track only</h4>
-        {% if tier_bp_totals_list %}
-          <table class="table">
-            <thead>
-              <tr>
-                <th>Token</th>
-                <th>Amount</th>
-                <th>Value (COIN)</th>
-                <th>Value (USD)</th>
-              </tr>
-            </thead>
-            <tbody>
-              {% for row in tier_bp_totals_list %}
-                <tr>
-                  <td>{{ row.symbol }}</td>
-                  <td>{{ "{:,.0f}".format(row.amount) }}</td>
-                  <td>{{ "{:,.2f}".format(row.coin_value) }}</td>
-                  <td>{{ "{:,.2f}".format(row.usd_value) }}</td>
-                </tr>
-              {% endfor %}
-            </tbody>
-          </table>
-        {% else %}
-          <p class="hint">No numeric RawrPass rewards detected.</p>
-        {% endif %}
-      </div>
-
-      <div style="flex:1 1 240px;">
-        <h4>Combined (Base + RawrPass)</h4>
-        {% if tier_combined_totals_list %}
-          <table class="table">
-            <thead>
-              <tr>
-                <th>Token</th>
-                <th>Amount</th>
-                <th>Value (COIN)</th>
-                <th>Value (USD)</th>
-              </tr>
-            </thead>
-            <tbody>
-              {% for row in tier_combined_totals_list %}
-                <tr>
-                  <td>{{ row.symbol }}</td>
-                  <td>{{ "{:,.0f}".format(row.amount) }}</td>
-                  <td>{{ "{:,.2f}".format(row.coin_value) }}</td>
-                  <td>{{ "{:,.2f}".format(row.usd_value) }}</td>
-                </tr>
-              {% endfor %}
-            </tbody>
-          </table>
-          <p>
-            <strong>Total value:</strong>
-            {{ "{:,.2f}".format(tier_combined_total_coin or 0) }} COIN
-            (~{{ "{:,.2f}".format(tier_combined_total_usd or 0) }} USD,
-            using COIN ≈ {{ "{:,.3f}".format(coin_usd or 0) }} USD).
-          </p>
-        {% else %}
-          <p class="hint">No combined rewards detected.</p>
-        {% endif %}
-      </div>
-    </div>
+    {% if tier_effective_totals_list %}
+      <table class="table">
+        <thead>
+          <tr>
+            <th>Token</th>
+            <th>Base</th>
+            <th>RawrPass{% if not has_battle_pass %} (not counted){% endif %}</th>
+            <th>Total</th>
+            <th>Value (COIN)</th>
+            <th>Value (USD)</th>
+          </tr>
+        </thead>
+        <tbody>
+          {{ tier_effective_totals_rows_html }}
+        </tbody>
+      </table>
+      <p>
+        <strong>Total value{% if has_battle_pass %} (Base + RawrPass){% else %} (Base track){% endif %}:</strong>
+        {{ "{:,.2f}".format(tier_combined_total_coin or 0) }} COIN
+        (~{{ "{:,.2f}".format(tier_combined_total_usd or 0) }} USD,
+        using COIN ≈ {{ "{:,.3f}".format(coin_usd or 0) }} USD).
+      </p>
+    {% else %}
+      <p class="hint">No numeric tier rewards detected.</p>
+    {% endif %}
 
     <!-- Rank-based grand totals if available -->
     {% if my_rank_totals_list %}
@@ -6126,14 +6653,7 @@ MASTERPIECES_TEMPLATE = """
           </tr>
         </thead>
         <tbody>
-          {% for row in my_rank_totals_list %}
-            <tr>
-              <td>{{ row.symbol }}</td>
-              <td>{{ "{:,.0f}".format(row.amount) }}</td>
-              <td>{{ "{:,.2f}".format(row.coin_value) }}</td>
-              <td>{{ "{:,.2f}".format(row.usd_value) }}</td>
-            </tr>
-          {% endfor %}
+          {{ my_rank_totals_rows_html }}
         </tbody>
       </table>
     {% endif %}
@@ -6150,14 +6670,7 @@ MASTERPIECES_TEMPLATE = """
           </tr>
         </thead>
         <tbody>
-          {% for row in grand_totals_list %}
-            <tr>
-              <td>{{ row.symbol }}</td>
-              <td>{{ "{:,.0f}".format(row.amount) }}</td>
-              <td>{{ "{:,.2f}".format(row.coin_value) }}</td>
-              <td>{{ "{:,.2f}".format(row.usd_value) }}</td>
-            </tr>
-          {% endfor %}
+          {{ grand_totals_rows_html }}
         </tbody>
       </table>
       <p>
@@ -6167,6 +6680,7 @@ MASTERPIECES_TEMPLATE = """
       </p>
     {% endif %}
   </div>
+  {% endblock %}
 
   <!-- ================= HISTORY ================= -->
   <div id="history" style="margin-top:1.5rem;">
@@ -6176,18 +6690,7 @@ MASTERPIECES_TEMPLATE = """
       <label>
         Masterpiece:
         <select name="mp_view_id">
-          {% for opt in history_mp_options %}
-            <option value="{{ opt.id }}"
-              {% if selected_mp and selected_mp.id|string == opt.id|string %}selected{% endif %}>
-              {% if opt.name %}
-                {{ opt.name }} (ID {{ opt.id }})
-              {% elif opt.addressable_label %}
-                {{ opt.addressable_label }} (ID {{ opt.id }})
-              {% else %}
-                MP #{{ opt.id }}
-              {% endif %}
-            </option>
-          {% endfor %}
+          {{ history_mp_options_html }}
         </select>
       </label>
 
@@ -6195,6 +6698,9 @@ MASTERPIECES_TEMPLATE = """
         Highlight (name or Voya ID):
         <input type="text" name="highlight" value="{{ highlight_query }}" placeholder="Your name or Voya ID">
       </label>
+      {% if not lb_client_render %}
+        <input type="hidden" name="nojs" value="1">
+      {% endif %}
 
       <label style="margin-left:0.5rem;">
         Leaderboard size:
@@ -6219,18 +6725,25 @@ MASTERPIECES_TEMPLATE = """
     {% if selected_mp %}
       <h3>{{ selected_mp.name or ("MP #" ~ selected_mp.id) }} (ID {{ selected_mp.id }})</h3>
 
+      {% set selected_lb_mp_id = selected_mp.id %}
+      {% if lb_client_render %}
+        <div
+          class="mp-leaderboard-list"
+          data-lb-rows='{{ selected_lb_rows|tojson }}'
+          data-player-url="{{ url_for('player_view', uid='__uid__', mp_id=selected_lb_mp_id) }}"
+        ></div>
+      {% else %}
       <div class="mp-leaderboard-list">
         {% for row in selected_mp_top50 %}
           {% set prof = row.profile or {} %}
-          {% set name = prof.displayName or prof.walletAddress or prof.uid or "Unknown" %}
-          <div class="mp-row {% if selected_gap and row.position == selected_gap.position %}mp-row--me{% endif %}">
+          <div class="mp-row {% if row._is_me %}mp-row--me{% endif %}">
             <div class="mp-rank">{{ row.position }}</div>
             <div class="mp-avatar">
               {% if prof.avatarUrl %}
-                <img src="{{ prof.avatarUrl|ipfs_to_http }}" alt="{{ name }} avatar" loading="lazy">
+                <img src="{{ prof.avatarUrl|ipfs_to_http }}" alt="{{ row.name_safe }} avatar" loading="lazy">
               {% else %}
                 <div class="mp-avatar-placeholder">
-                  {{ name[0]|upper }}
+                  {{ row.initial_safe }}
                 </div>
               {% endif %}
             </div>
@@ -6239,45 +6752,26 @@ MASTERPIECES_TEMPLATE = """
                 href="{{ url_for(
                         'player_view',
                         uid=prof.uid or prof.walletAddress,
-                        mp_id=selected_mp.id if selected_mp else None
+                        mp_id=selected_lb_mp_id
                       ) }}"
                 class="mp-name-link"
                 target="_blank"
                 rel="noopener"
               >
-                {{ name }}
+                {{ row.name_safe }}
               </a>
             </div>
             <div class="mp-points">
-              {{ "{:,.0f}".format(row.masterpiecePoints or 0) }}
+              {{ row.points_str }}
             </div>
           </div>
         {% endfor %}
       </div>
+      {% endif %}
 
 
       {% if selected_gap %}
-        <div style="margin-top:0.5rem; font-size:0.9rem;">
-          <strong>Your gap on this MP:</strong>
-          You are <strong>#{{ selected_gap.position }}</strong>
-          with
-          <strong>{{ "{:,.0f}".format(selected_gap.points or 0) }}</strong>
-          points.
-          {% if selected_gap.above_name %}
-            <br>
-            Need
-            <strong>{{ "{:,.0f}".format(selected_gap.gap_up or 0) }}</strong>
-            points to pass {{ selected_gap.above_name }}
-            (#{{ selected_gap.above_pos }}).
-          {% endif %}
-          {% if selected_gap.below_name %}
-            <br>
-            You are ahead of {{ selected_gap.below_name }}
-            (#{{ selected_gap.below_pos }}) by
-            <strong>{{ "{:,.0f}".format(selected_gap.gap_down or 0) }}</strong>
-            points.
-          {% endif %}
-        </div>
+        {{ gap_card(selected_gap, "Your gap on this MP:", "You are") }}
       {% endif %}
     {% else %}
       <p>No masterpiece selected.</p>
@@ -6296,18 +6790,7 @@ MASTERPIECES_TEMPLATE = """
           <label>
             Masterpiece:
             <select name="planner_mp_id">
-              {% for opt in planner_mp_options %}
-                <option value="{{ opt.id }}"
-                  {% if planner_mp and planner_mp.id|string == opt.id|string %}selected{% endif %}>
-                  {% if opt.name %}
-                    {{ opt.name }} (ID {{ opt.id }})
-                  {% elif opt.addressable_label %}
-                    {{ opt.addressable_label }} (ID {{ opt.id }})
-                  {% else %}
-                    MP #{{ opt.id }}
-                  {% endif %}
-                </option>
-              {% endfor %}
+              {{ planner_mp_options_html }}
             </select>
           </label>
         </div>
@@ -6391,8 +6874,112 @@ MASTERPIECES_TEMPLATE = """
       {% endif %}
     </form>
   </div>
+<template id="mp-row-tpl">
+  <div class="mp-row">
+    <div class="mp-rank"></div>
+    <div class="mp-avatar"></div>
+    <div class="mp-name">
+      <a class="mp-name-link" target="_blank" rel="noopener"></a>
+    </div>
+    <div class="mp-points"></div>
+  </div>
+</template>
+<noscript>
+  <p class="hint">Leaderboards need JavaScript; <a href="{{ nojs_url }}">view the plain version</a>.</p>
+</noscript>
 <script>
+// Fill a .mp-leaderboard-list from compact rows:
+// [position, name, uid, points_str, avatar_url, is_me]
+function renderMpLeaderboard(list, rows) {
+  const tpl = document.getElementById('mp-row-tpl').content.firstElementChild;
+  const urlTpl = list.dataset.playerUrl || '';
+  const frag = document.createDocumentFragment();
+  for (let i = 0; i < rows.length; i++) {
+    const r = rows[i];
+    const node = tpl.cloneNode(true);
+    if (r[5]) node.classList.add('mp-row--me');
+    node.querySelector('.mp-rank').textContent = r[0];
+    const avatar = node.querySelector('.mp-avatar');
+    if (r[4]) {
+      const img = document.createElement('img');
+      img.src = r[4];
+      img.alt = r[1] + ' avatar';
+      img.loading = 'lazy';
+      avatar.appendChild(img);
+    } else {
+      const ph = document.createElement('div');
+      ph.className = 'mp-avatar-placeholder';
+      ph.textContent = String(r[1]).charAt(0).toUpperCase();
+      avatar.appendChild(ph);
+    }
+    const link = node.querySelector('.mp-name-link');
+    link.href = urlTpl.replace('__uid__', encodeURIComponent(r[2]));
+    link.textContent = r[1];
+    node.querySelector('.mp-points').textContent = r[3];
+    frag.appendChild(node);
+  }
+  list.textContent = '';
+  list.appendChild(frag);
+}
+
+// Leaderboards in hidden subtabs are fetched the first time they are shown.
+function loadLazyLeaderboards(root) {
+  root.querySelectorAll('.mp-leaderboard-list[data-lb-src]').forEach(list => {
+    const src = list.dataset.lbSrc;
+    delete list.dataset.lbSrc;
+    fetch(src, { credentials: 'same-origin' })
+      .then(r => (r.ok ? r.json() : Promise.reject(r.status)))
+      .then(data => renderMpLeaderboard(list, data.rows || []))
+      .catch(() => {
+        list.innerHTML = '<p class="hint">Could not load leaderboard.</p>';
+      });
+  });
+}
+
+// The live leaderboard re-fetches its rows every 30 s while its subtab is
+// shown, instead of reloading the whole page.
+const LB_REFRESH_MS = 30000;
+
+function refreshLiveLeaderboards() {
+  if (document.visibilityState !== 'visible') return;
+  document.querySelectorAll('.mp-subtab.active .mp-leaderboard-list[data-lb-refresh]').forEach(list => {
+    fetch(list.dataset.lbRefresh, { credentials: 'same-origin' })
+      .then(r => (r.ok ? r.json() : Promise.reject(r.status)))
+      .then(data => renderMpLeaderboard(list, data.rows || []))
+      .catch(() => {});
+  });
+}
+
 document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('.mp-leaderboard-list[data-lb-rows]').forEach(list => {
+    renderMpLeaderboard(list, JSON.parse(list.dataset.lbRows));
+  });
+  if (document.querySelector('.mp-leaderboard-list[data-lb-refresh]')) {
+    setInterval(refreshLiveLeaderboards, LB_REFRESH_MS);
+  }
+
+  // RawrPass toggle: re-fetch only the Rewards section (debounced) instead
+  // of waiting for a full page reload.
+  const bpBox = document.querySelector('#history input[name="has_battle_pass"]');
+  let bpTimer = null;
+  if (bpBox) {
+    bpBox.addEventListener('change', () => {
+      clearTimeout(bpTimer);
+      bpTimer = setTimeout(() => {
+        const params = new URLSearchParams(window.location.search);
+        params.set('has_battle_pass', bpBox.checked ? '1' : '0');
+        params.set('fragment', 'rewards');
+        fetch('?' + params.toString(), { credentials: 'same-origin' })
+          .then(r => (r.ok ? r.text() : Promise.reject(r.status)))
+          .then(html => {
+            const rewards = document.getElementById('rewards');
+            if (rewards) rewards.outerHTML = html;
+          })
+          .catch(() => {});
+      }, 150);
+    });
+  }
+
   const btns = document.querySelectorAll('.mp-subtab-btn');
   const panes = document.querySelectorAll('.mp-subtab');
 
@@ -6405,7 +6992,10 @@ document.addEventListener('DOMContentLoaded', function () {
       // toggle panes
       panes.forEach(p => p.classList.remove('active'));
       const pane = document.getElementById('mp-subtab-' + target);
-      if (pane) pane.classList.add('active');
+      if (pane) {
+        pane.classList.add('active');
+        loadLazyLeaderboards(pane);
+      }
     });
   });
 });
@@ -6425,6 +7015,9 @@ def masterpieces_view():
     error: Optional[str] = None
     masterpieces_data: List[Dict[str, Any]] = []
     
+    # MP list is fetched alongside the prices
+    masterpieces_future = prefetch(cached_fetch_masterpieces)
+
     # Live prices for reward valuation
     prices: Dict[str, float] = {}
     coin_usd: float = 0.0
@@ -6437,7 +7030,7 @@ def masterpieces_view():
 
     # Load MP list from Craft World
     try:
-        masterpieces_data = fetch_masterpieces()
+        masterpieces_data = masterpieces_future.result()
     except Exception as e:
         error = f"Error fetching masterpieces: {e}"
         masterpieces_data = []
@@ -6453,22 +7046,25 @@ def masterpieces_view():
         else:
             general_mps.append(mp)
 
-    # Sort by ID so "latest" really is highest ID
+    # "Latest" means highest ID; a single max() pass instead of sorting
     def _mp_id(m: Dict[str, Any]) -> int:
         try:
             return int(m.get("id") or 0)
         except (TypeError, ValueError):
             return 0
 
-    general_mps = sorted(general_mps, key=_mp_id)
-    event_mps = sorted(event_mps, key=_mp_id)
-    
+    latest_general_mp: Optional[Dict[str, Any]] = max(general_mps, key=_mp_id, default=None)
+
     # Identify the "active" general and event masterpieces (highest ID)
-    current_general_mp: Optional[Dict[str, Any]] = general_mps[-1] if general_mps else None
-    current_event_mp: Optional[Dict[str, Any]] = event_mps[-1] if event_mps else None
+    current_general_mp: Optional[Dict[str, Any]] = latest_general_mp
+    current_event_mp: Optional[Dict[str, Any]] = max(event_mps, key=_mp_id, default=None)
 
     # For the active ones, pull full details (including leaderboard / rewards)
-    # so the "Current MP" tab and reward snapshots have data.
+    # so the "Current MP" tab and reward snapshots have data. Both are
+    # loaded up front in a single batched request.
+    warm_masterpiece_details(
+        [mp.get("id") for mp in (current_general_mp, current_event_mp) if mp]
+    )
     try:
         if current_general_mp and not current_general_mp.get("leaderboard"):
             try:
@@ -6477,7 +7073,7 @@ def masterpieces_view():
                 cg_id = 0
             if cg_id:
                 try:
-                    detailed = fetch_masterpiece_details(cg_id)
+                    detailed = cached_fetch_masterpiece_details(cg_id)
                     current_general_mp = detailed
                     try:
                         cache_masterpiece_metadata(detailed)
@@ -6497,7 +7093,7 @@ def masterpieces_view():
                 ce_id = 0
             if ce_id:
                 try:
-                    detailed = fetch_masterpiece_details(ce_id)
+                    detailed = cached_fetch_masterpiece_details(ce_id)
                     current_event_mp = detailed
                     try:
                         cache_masterpiece_metadata(detailed)
@@ -6520,7 +7116,7 @@ def masterpieces_view():
         if mid_int <= 0:
             return mp
         try:
-            detailed = fetch_masterpiece_details(mid_int)
+            detailed = cached_fetch_masterpiece_details(mid_int)
         except Exception as e:
             print(f"[MP] Failed to hydrate masterpiece {mp_id}: {e}")
             return mp
@@ -6544,47 +7140,10 @@ def masterpieces_view():
     current_event_mp = _hydrate_masterpiece(current_event_mp)
 
 
-    # Build a lookup by ID and compute the highest MP ID we know about.
-    mp_by_id: Dict[int, Dict[str, Any]] = {}
-    max_mp_id = 0
-    for mp in masterpieces_data:
-        try:
-            mid = int(mp.get("id") or 0)
-        except (TypeError, ValueError):
-            continue
-        if mid > 0:
-            mp_by_id[mid] = mp
-            if mid > max_mp_id:
-                max_mp_id = mid
-    # Seed the metadata cache with the list we just fetched.
-    for mp in masterpieces_data:
-        try:
-            cache_masterpiece_metadata(mp)
-        except Exception:
-            pass
-
-    # Merge cached metadata back into mp_by_id and extend max_mp_id if needed.
-    try:
-        mp_cache = load_masterpiece_metadata_cache()
-    except Exception:
-        mp_cache = {}
-
-    for mid, meta in mp_cache.items():
-        if mid in mp_by_id:
-            base = dict(mp_by_id[mid])
-            # Overlay stored fields without blowing away other keys.
-            for key, val in meta.items():
-                if val not in (None, ""):
-                    base[key] = val
-            mp_by_id[mid] = base
-        else:
-            mp_by_id[mid] = dict(meta)
-        if mid > max_mp_id:
-            max_mp_id = mid
+    # Build a lookup by ID (merged with cached metadata) and the highest
+    # MP ID we know about.
+    mp_by_id, max_mp_id = build_mp_index(masterpieces_data)
     # ----- How many leaderboard entries to show? (Top 10 / 25 / 50 / 100) -----
-    TOP_N_OPTIONS = [10, 25, 50, 100]
-    DEFAULT_TOP_N = 50
-
     # Try to read from query (GET/POST), then fall back to session
     top_n = session.get("mp_top_n", DEFAULT_TOP_N)
     top_n_str = (request.args.get("top_n") or request.form.get("top_n") or "").strip()
@@ -6638,6 +7197,9 @@ def masterpieces_view():
 
     # Which sub-tab is active: "planner", "current", or "history"?
     tab = (request.args.get("tab") or request.form.get("tab") or "").strip() or "planner"
+    # RawrPass toggle refreshes only the Rewards section (see template JS);
+    # work that only feeds the other sub-tabs is skipped for it.
+    rewards_fragment = request.args.get("fragment") == "rewards"
 
     # Pick the "current" masterpiece (for the live leaderboard):
     # latest general if available, otherwise latest event.
@@ -6652,7 +7214,7 @@ def masterpieces_view():
     if current_mp:
         lb = current_mp.get("leaderboard") or []
         try:
-            current_mp_top50 = list(lb[:top_n])
+            current_mp_top50 = mark_highlighted_rows(lb[:top_n], highlight_query)
         except Exception:
             current_mp_top50 = []
     else:
@@ -6660,12 +7222,12 @@ def masterpieces_view():
 
     # --- Event leaderboard data for the Event subtab ---
     event_mp_top50: List[Dict[str, Any]] = []
-    event_gap = None  # optional; template guards with `is defined`
+    event_gap: Optional[Dict[str, Any]] = None
 
     if current_event_mp:
         lb_event = current_event_mp.get("leaderboard") or []
         try:
-            event_mp_top50 = list(lb_event[:top_n])
+            event_mp_top50 = mark_highlighted_rows(lb_event[:top_n], highlight_query)
         except Exception:
             event_mp_top50 = []
 
@@ -6676,39 +7238,43 @@ def masterpieces_view():
     src_mp: Optional[Dict[str, Any]] = None
 
 
+    # Gap info for the highlighted player, computed once per leaderboard and
+    # shared with the reward snapshots below.
+    current_gap: Optional[Dict[str, Any]] = compute_leaderboard_gap_for_highlight(
+        current_mp_top50,
+        highlight_query,
+    )
+    if current_event_mp is current_mp:
+        event_gap = current_gap
+    else:
+        event_gap = compute_leaderboard_gap_for_highlight(event_mp_top50, highlight_query)
+
     # Use the same highlight_query the user entered at the top of the page.
-    if highlight_query:
+    if highlight_query and not rewards_fragment:
         # Active general MP snapshot
         if current_general_mp:
-            try:
+            if current_general_mp is current_mp:
+                gen_rows, gen_gap = current_mp_top50, current_gap
+            else:
                 gen_rows = list((current_general_mp.get("leaderboard") or [])[:top_n])
-            except Exception:
-                gen_rows = []
-            general_snapshot = _build_reward_snapshot_for_mp(
-                current_general_mp,
-                gen_rows,
-                highlight_query,
-            )
+                gen_gap = compute_leaderboard_gap_for_highlight(gen_rows, highlight_query)
+            if gen_gap:
+                general_snapshot = _build_reward_snapshot_for_mp(
+                    current_general_mp,
+                    gen_rows,
+                    highlight_query,
+                    gap=gen_gap,
+                )
 
         # Active event MP snapshot
-        if current_event_mp:
-            try:
-                event_rows = list((current_event_mp.get("leaderboard") or [])[:top_n])
-            except Exception:
-                event_rows = []
+        if current_event_mp and event_gap:
             event_snapshot = _build_reward_snapshot_for_mp(
                 current_event_mp,
-                event_rows,
+                event_mp_top50,
                 highlight_query,
+                gap=event_gap,
             )
 
-
-    # Gap info for highlighted player on the current leaderboard
-    current_gap: Optional[Dict[str, Any]] = compute_leaderboard_gap_for_highlight(
-        current_mp_top50,
-        highlight_query,
-    )
-
     # This will be set after resolving the planner target masterpiece.
     mp_id_for_calc: Optional[str] = None
 
@@ -6721,7 +7287,7 @@ def masterpieces_view():
             planner_mp_options.append(mp)
     else:
         # Fallback if we somehow have no IDs: just use whatever general list we have.
-        planner_mp_options = list(general_mps)
+        planner_mp_options = sorted(general_mps, key=_mp_id)
 
     planner_mp: Optional[Dict[str, Any]] = None
 
@@ -6741,7 +7307,7 @@ def masterpieces_view():
             or planner_mp.get("type")
         ):
             try:
-                detailed = fetch_masterpiece_details(planner_mp_id)
+                detailed = cached_fetch_masterpiece_details(planner_mp_id)
                 # update in-place so the dropdown sees the name
                 planner_mp.clear()
                 planner_mp.update(detailed)
@@ -6750,8 +7316,8 @@ def masterpieces_view():
                 pass
 
     # Default to the latest general masterpiece if nothing selected or invalid.
-    if not planner_mp and general_mps:
-        planner_mp = general_mps[-1]
+    if not planner_mp and latest_general_mp:
+        planner_mp = latest_general_mp
 
     if planner_mp:
         mp_id_for_calc = str(planner_mp.get("id") or "")
@@ -6773,9 +7339,9 @@ def masterpieces_view():
     if not mp_id_for_resources and planner_mp_id:
         mp_id_for_resources = str(planner_mp_id)
 
-    if mp_id_for_resources:
+    if mp_id_for_resources and not rewards_fragment:
         try:
-            mp_detail_for_planner = fetch_masterpiece_details(mp_id_for_resources)
+            mp_detail_for_planner = cached_fetch_masterpiece_details(mp_id_for_resources)
             resources = mp_detail_for_planner.get("resources") or []
             symbols: List[str] = []
             for r in resources:
@@ -6829,7 +7395,7 @@ def masterpieces_view():
         try:
             # Always fetch fresh details so it works even for MPs we don't have
             # in the initial `masterpieces` list.
-            selected_mp = fetch_masterpiece_details(selected_mp_id)
+            selected_mp = cached_fetch_masterpiece_details(selected_mp_id)
             # Cache its metadata for future loads
             try:
                 cache_masterpiece_metadata(selected_mp)
@@ -6853,7 +7419,7 @@ def masterpieces_view():
 
             lb = selected_mp.get("leaderboard") or []
             try:
-                selected_mp_top50 = list(lb[:top_n])
+                selected_mp_top50 = mark_highlighted_rows(lb[:top_n], highlight_query)
             except Exception:
                 selected_mp_top50 = []
         except Exception:
@@ -6873,12 +7439,13 @@ def masterpieces_view():
     )
     # Snapshot of your current tier / rewards on the selected masterpiece (for Rewards tab)
     selected_reward_snapshot: Optional[Dict[str, Any]] = None
-    if highlight_query and selected_mp and selected_mp_top50:
+    if selected_gap and selected_mp and selected_mp_top50:
         try:
             selected_reward_snapshot = _build_reward_snapshot_for_mp(
                 selected_mp,
                 selected_mp_top50,
                 highlight_query,
+                gap=selected_gap,
             )
         except Exception:
             selected_reward_snapshot = None
@@ -6891,7 +7458,9 @@ def masterpieces_view():
     calc_resources: List[Dict[str, Any]] = []
     calc_result: Optional[Dict[str, Any]] = None
 
-    if request.method == "POST":
+    # Only the planner form posts without a tab, so other sub-tabs never
+    # rebuild the bundle.
+    if request.method == "POST" and tab == "planner":
         action = (request.form.get("calc_action") or "").strip().lower()
 
         # Detect if the planner Masterpiece changed; if so, wipe the previous bundle.
@@ -7057,167 +7626,21 @@ def masterpieces_view():
     calc_state_json = json.dumps(calc_resources)
 
     # ---------- Tier rewards from the Masterpiece (rewardStages) ----------
-    reward_tier_rows: list[dict[str, object]] = []
-
-    # Totals across all tiers (cumulative)
-    tier_base_totals: Dict[str, float] = {}
-    tier_bp_totals: Dict[str, float] = {}
-
     # Use the selected MP for History first, then planner, then current
     src_mp = selected_mp or planner_mp or current_mp
 
-    if isinstance(src_mp, dict):
-        raw_stages = src_mp.get("rewardStages") or []
-
-        # rewardStages can be either a list or dict; normalise to list
-        if isinstance(raw_stages, dict):
-            stages_iter = list(raw_stages.values())
-        elif isinstance(raw_stages, list):
-            stages_iter = raw_stages
-        else:
-            stages_iter = []
-
-        for idx, st in enumerate(stages_iter, start=1):
-            if not isinstance(st, dict):
-                continue
-
-            # Try to guess tier index and required points from common keys
-            tier_num = st.get("tier") or st.get("stage") or idx
-            required = (
-                st.get("requiredPoints")
-                or st.get("minPoints")
-                or st.get("minimumPoints")
-                or st.get("points")
-                or st.get("requiredMasterpiecePoints")
-            )
-
-            # --- base (free) rewards ---
-            rewards_list = st.get("rewards") or st.get("items") or []
-            base_parts: list[str] = []
-
-            if isinstance(rewards_list, list):
-                for rw in rewards_list:
-                    if not isinstance(rw, dict):
-                        continue
-                    amount = rw.get("amount") or rw.get("quantity")
-                    token = rw.get("token") or rw.get("symbol") or rw.get("resource")
-                    rtype = rw.get("type") or rw.get("rewardType") or rw.get("__typename")
-
-                    # Aggregate numeric resource rewards for totals
-                    try:
-                        amt_val = float(amount or 0)
-                    except (TypeError, ValueError):
-                        amt_val = 0.0
-
-                    if token and amt_val > 0 and (not rtype or str(rtype).lower() == "resource"):
-                        t_sym = str(token).upper()
-                        tier_base_totals[t_sym] = tier_base_totals.get(t_sym, 0.0) + amt_val
-
-                    # Text label for the table
-                    label_bits: list[str] = []
-                    if amount not in (None, "", 0):
-                        label_bits.append(str(amount))
-                    if token:
-                        label_bits.append(str(token))
-                    elif rtype:
-                        label_bits.append(str(rtype))
-
-                    label = " ".join(label_bits).strip()
-                    if label:
-                        base_parts.append(label)
-
-            # --- RawrPass / battle pass rewards ---
-            bp_list = st.get("battlePassRewards") or []
-            bp_parts: list[str] = []
-
-            if isinstance(bp_list, list):
-                for rw in bp_list:
-                    if not isinstance(rw, dict):
-                        continue
-                    amount = rw.get("amount") or rw.get("quantity")
-                    token = rw.get("token") or rw.get("symbol") or rw.get("resource")
-                    rtype = rw.get("type") or rw.get("rewardType") or rw.get("__typename")
-
-                    # Aggregate numeric resource rewards for RawrPass totals
-                    try:
-                        amt_val = float(amount or 0)
-                    except (TypeError, ValueError):
-                        amt_val = 0.0
-
-                    if token and amt_val > 0 and (not rtype or str(rtype).lower() == "resource"):
-                        t_sym = str(token).upper()
-                        tier_bp_totals[t_sym] = tier_bp_totals.get(t_sym, 0.0) + amt_val
-
-                    # Text label for the table
-                    label_bits: list[str] = []
-                    if amount not in (None, "", 0):
-                        label_bits.append(str(amount))
-                    if token:
-                        label_bits.append(str(token))
-                    elif rtype:
-                        label_bits.append(str(rtype))
-
-                    label = " ".join(label_bits).strip()
-                    if label:
-                        bp_parts.append(label)
-
-            # ---- Build the row for this stage ----
-            base_text = ", ".join(base_parts) if base_parts else ""
-            bp_text = ", ".join(bp_parts) if bp_parts else ""
-            if not base_text and not bp_text:
-                base_text = "See in-game rewards"
-
-            reward_tier_rows.append(
-                {
-                    "tier": tier_num,
-                    "required": required,
-                    "rewards_text": base_text,
-                    "battlepass_text": bp_text,
-                    # full objects so template can show icons later if you want
-                    "rewards": rewards_list,
-                    "battlepass_rewards": bp_list,
-                }
-            )
-
+    tier_rewards = build_tier_rewards(src_mp, has_battle_pass, prices, coin_usd)
+    reward_tier_rows = tier_rewards["reward_tier_rows"]
+    combined_totals: Dict[str, float] = tier_rewards["combined_totals"]
+    tier_combined_total_coin = tier_rewards["tier_combined_total_coin"]
+    tier_combined_total_usd = tier_rewards["tier_combined_total_usd"]
 
-
-    # Turn totals into lists with value in COIN / USD
     def _totals_to_rows(totals: Dict[str, float]) -> List[Dict[str, Any]]:
-        rows: List[Dict[str, Any]] = []
-        for sym, amt in sorted(totals.items()):
-            price_coin = float(prices.get(sym, 0.0) or 0.0)
-            coin_value = amt * price_coin
-            usd_value = coin_value * coin_usd if coin_usd else 0.0
-            rows.append(
-                {
-                    "symbol": sym,
-                    "amount": amt,
-                    "coin_value": coin_value,
-                    "usd_value": usd_value,
-                }
-            )
-        return rows
-
-    # Tier totals as lists
-    tier_base_totals_list = _totals_to_rows(tier_base_totals)
-    tier_bp_totals_list = _totals_to_rows(tier_bp_totals)
-
-    # Combined totals:
-    # - If you DON'T have RawrPass, combined == base-only
-    # - If you DO have RawrPass, combined = base + RawrPass
-    if has_battle_pass:
-        combined_totals: Dict[str, float] = dict(tier_base_totals)
-        for sym, amt in tier_bp_totals.items():
-            combined_totals[sym] = combined_totals.get(sym, 0.0) + amt
-    else:
-        combined_totals = dict(tier_base_totals)
-
-    tier_combined_totals_list = _totals_to_rows(combined_totals)
-    tier_combined_total_coin = sum(r["coin_value"] for r in tier_combined_totals_list)
-    tier_combined_total_usd = tier_combined_total_coin * coin_usd if coin_usd else 0.0
+        return _reward_totals_to_rows(totals, prices, coin_usd)
 
     # ---------- Leaderboard placement rewards (leaderboardRewards) ----------
-    leaderboard_reward_rows: List[Dict[str, Any]] = []
+    # Only the numeric totals are used (for "your bracket" below); the
+    # template has no placement-rewards table to feed.
     # Per-bracket numeric resource totals: [{from_rank, to_rank, totals:{SYM:amount}}]
     leaderboard_bracket_totals: List[Dict[str, Any]] = []
 
@@ -7268,49 +7691,7 @@ def masterpieces_view():
 
             totals_for_blk: Dict[str, float] = {}
             rewards_list = blk.get("rewards") or blk.get("items") or []
-            reward_parts: List[str] = []
-
-            if isinstance(rewards_list, list):
-                for rw in rewards_list:
-                    if not isinstance(rw, dict):
-                        continue
-                    amount = rw.get("amount") or rw.get("quantity")
-                    token = rw.get("token") or rw.get("symbol") or rw.get("resource")
-                    rtype = rw.get("type") or rw.get("rewardType") or rw.get("__typename")
-
-                    # Aggregate numeric *resource* rewards for this bracket
-                    try:
-                        amt_val = float(amount or 0)
-                    except (TypeError, ValueError):
-                        amt_val = 0.0
-
-                    if token and amt_val > 0 and (not rtype or str(rtype).lower() == "resource"):
-                        sym = str(token).upper()
-                        totals_for_blk[sym] = totals_for_blk.get(sym, 0.0) + amt_val
-
-                    # Text label for the table
-                    label_bits: List[str] = []
-                    if amount not in (None, "", 0):
-                        label_bits.append(str(amount))
-                    if token:
-                        label_bits.append(str(token))
-                    elif rtype:
-                        label_bits.append(str(rtype))
-
-                    label = " ".join(label_bits).strip()
-                    if label:
-                        reward_parts.append(label)
-
-            if not reward_parts:
-                reward_parts.append("See in-game rewards")
-
-            leaderboard_reward_rows.append(
-                {
-                    "from_rank": from_int or from_rank,
-                    "to_rank": to_int or to_rank,
-                    "rewards_text": ", ".join(reward_parts),
-                }
-            )
+            _accumulate_reward_list(rewards_list, totals_for_blk)
 
             if totals_for_blk:
                 leaderboard_bracket_totals.append(
@@ -7321,23 +7702,6 @@ def masterpieces_view():
                     }
                 )
 
-    # ---------- Simple Tier Ladder (for the "Tier ladder" table) ----------
-    tier_rows: List[Dict[str, Any]] = []
-    prev_req = 0.0
-    for idx, req in enumerate(MP_TIER_THRESHOLDS, start=1):
-        try:
-            req_val = float(req)
-        except (TypeError, ValueError):
-            continue
-        tier_rows.append(
-            {
-                "tier": idx,
-                "required": req_val,
-                "delta": req_val - prev_req,
-            }
-        )
-        prev_req = req_val
-
     # ---------- Per-rank totals for *your* current bracket ----------
     my_rank_totals: Dict[str, float] = {}
     my_rank_totals_list: List[Dict[str, Any]] = []
@@ -7392,251 +7756,465 @@ def masterpieces_view():
     grand_total_usd = grand_total_coin * coin_usd if coin_usd else 0.0
 
     # ---------- Render page ----------
-    content_html = render_template_string(
-        MASTERPIECES_TEMPLATE,
+    # Rewards section first: that is all the RawrPass fragment needs.
+    ctx = dict(
+        src_mp=src_mp,
+        tier_ladder_rows_html=TIER_LADDER_ROWS_HTML,
+        reward_tier_rows=reward_tier_rows,
+        tier_effective_totals_list=tier_rewards["tier_effective_totals_list"],
+        tier_effective_totals_rows_html=tier_rewards["tier_effective_totals_rows_html"],
+        tier_combined_total_coin=tier_combined_total_coin,
+        tier_combined_total_usd=tier_combined_total_usd,
+        my_rank_totals_list=my_rank_totals_list,
+        my_rank_totals_rows_html=reward_totals_rows_html(my_rank_totals_list),
+        grand_totals_list=grand_totals_list,
+        grand_totals_rows_html=reward_totals_rows_html(grand_totals_list),
+        grand_total_coin=grand_total_coin,
+        grand_total_usd=grand_total_usd,
+        coin_usd=coin_usd,
+        selected_reward_snapshot=selected_reward_snapshot,
+        has_battle_pass=has_battle_pass,
+    )
+
+    if rewards_fragment:
+        return render_template_block(MASTERPIECES_TEMPLATE, "rewards_section", **ctx)
+
+    # Leaderboards are rendered in the browser from compact JSON rows;
+    # ?nojs=1 keeps the server-rendered tables.
+    lb_client_render = request.args.get("nojs") != "1"
+    current_lb_rows = leaderboard_rows_compact(current_mp_top50) if lb_client_render else []
+    selected_lb_rows = leaderboard_rows_compact(selected_mp_top50) if lb_client_render else []
+    # Same view (mp_id, tab, highlight, top_n, ...) without client rendering
+    nojs_url = url_for("masterpieces_view", **{**request.args.to_dict(), "nojs": "1"})
+
+    ctx.update(
         error=error,
+        lb_client_render=lb_client_render,
+        nojs_url=nojs_url,
+        current_lb_rows=current_lb_rows,
+        selected_lb_rows=selected_lb_rows,
         # overview / current
         current_mp=current_mp,
         current_mp_top50=current_mp_top50,
+        current_mp_count=len(current_mp_top50),
         current_gap=current_gap,
         general_snapshot=general_snapshot,
         event_snapshot=event_snapshot,
         current_event_mp=current_event_mp,
         # 🔽 NEW: event tab
         event_mp_top50=event_mp_top50,
+        event_mp_count=len(event_mp_top50),
         event_gap=event_gap,
         # history
         selected_mp=selected_mp,
         selected_mp_top50=selected_mp_top50,
         selected_gap=selected_gap,
-        history_mp_options=history_mp_options,
+        history_mp_options_html=mp_select_options_html(
+            history_mp_options, selected_mp.get("id") if selected_mp else None
+        ),
         highlight_query=highlight_query,
         top_n=top_n,
         top_n_options=TOP_N_OPTIONS,
-        # rewards / totals
-        src_mp=src_mp,
-        tier_rows=tier_rows,
-        reward_tier_rows=reward_tier_rows,
-        tier_base_totals_list=tier_base_totals_list,
-        tier_bp_totals_list=tier_bp_totals_list,
-        tier_combined_totals_list=tier_combined_totals_list,
-        tier_combined_total_coin=tier_combined_total_coin,
-        tier_combined_total_usd=tier_combined_total_usd,
-        my_rank_totals_list=my_rank_totals_list,
-        grand_totals_list=grand_totals_list,
-        grand_total_coin=grand_total_coin,
-        grand_total_usd=grand_total_usd,
-        coin_usd=coin_usd,
-        selected_reward_snapshot=selected_reward_snapshot,
-        has_battle_pass=has_battle_pass,
         # planner
         planner_mp=planner_mp,
-        planner_mp_options=planner_mp_options,
+        planner_mp_options_html=mp_select_options_html(
+            planner_mp_options, planner_mp.get("id") if planner_mp else None
+        ),
         planner_tokens=planner_tokens,
         calc_resources=calc_resources,
         calc_result=calc_result,
         calc_state_json=calc_state_json,
     )
 
-    html = render_template_string(
-        BASE_TEMPLATE,
-        content=content_html,
-        active_page="masterpieces",
-        has_uid=has_uid_flag(),
+    # Stream the page so the client starts receiving the shell while the
+    # (large) masterpiece body is still being generated.
+    return Response(
+        stream_template_string(
+            page_template(MASTERPIECES_TEMPLATE),
+            active_page="masterpieces",
+            has_uid=has_uid_flag(),
+            **ctx,
+        )
     )
-    return html
 
-    # ---------- My rank rewards (from leaderboard bracket) ----------
-    my_rank_totals: Dict[str, float] = {}
-    my_rank_totals_list: List[Dict[str, Any]] = []
-    grand_totals_list: List[Dict[str, Any]] = []
-    grand_total_coin = 0.0
-    grand_total_usd = 0.0
 
-    my_rank_int: Optional[int] = None
-    if selected_reward_snapshot and selected_reward_snapshot.get("position") is not None:
-        try:
-            my_rank_int = int(str(selected_reward_snapshot["position"]).strip())
-        except Exception:
-            my_rank_int = None
-
-    # Cumulative leaderboard rewards:
-    # sum all brackets whose threshold rank is >= my rank
-    # (e.g. if you're rank 5, you get #5, #6, #7, ..., #1000)
-    if my_rank_int is not None and leaderboard_bracket_totals:
-        for b in leaderboard_bracket_totals:
-            fr = b.get("from_rank")
-            to = b.get("to_rank")
-
-            # Choose a "threshold" rank for this bracket: the higher of from/to
-            thr: Optional[int] = None
-            try:
-                if fr is not None:
-                    thr = int(fr)
-            except Exception:
-                thr = None
+# ---------- Tier rewards (rewardStages) for the Rewards tab ----------
+# Reward stages are fixed per masterpiece, so the aggregated + formatted
+# result only changes with the RawrPass toggle and live prices.
+TIER_REWARDS_TTL_SECONDS = 60.0
+_TIER_REWARDS_CACHE = TTLCache(TIER_REWARDS_TTL_SECONDS)
 
-            try:
-                if to is not None:
-                    to_i = int(to)
-                    if thr is None or to_i > thr:
-                        thr = to_i
-            except Exception:
-                # ignore bad to_rank, keep whatever thr we had
-                pass
 
-            if thr is None:
-                continue
+def _accumulate_reward_list(
+    rewards_list: Any,
+    totals: Dict[str, float],
+) -> List[str]:
+    """
+    Single pass over a reward list (rewards / battlePassRewards /
+    leaderboardRewards.rewards): add numeric Resource rewards into
+    `totals` by symbol and return the text labels for the table.
+    """
+    parts: List[str] = []
+    if not isinstance(rewards_list, list):
+        return parts
 
-            # If your rank is better or equal than this threshold,
-            # you earn this bracket's bag as well.
-            if thr >= my_rank_int:
-                blk_totals = b.get("totals") or {}
-                for sym, amt in blk_totals.items():
-                    try:
-                        val = float(amt or 0.0)
-                    except (TypeError, ValueError):
-                        val = 0.0
-                    if val <= 0:
-                        continue
-                    sym_u = str(sym).upper()
-                    my_rank_totals[sym_u] = my_rank_totals.get(sym_u, 0.0) + val
+    for rw in rewards_list:
+        if not isinstance(rw, dict):
+            continue
+        amount = rw.get("amount") or rw.get("quantity")
+        token = rw.get("token") or rw.get("symbol") or rw.get("resource")
+        rtype = rw.get("type") or rw.get("rewardType") or rw.get("__typename")
 
+        # Aggregate numeric *resource* rewards
+        try:
+            amt_val = float(amount or 0)
+        except (TypeError, ValueError):
+            amt_val = 0.0
+
+        if token and amt_val > 0 and (not rtype or str(rtype).lower() == "resource"):
+            sym = str(token).upper()
+            totals[sym] = totals.get(sym, 0.0) + amt_val
+
+        # Text label for the table
+        label_bits: List[str] = []
+        if amount not in (None, "", 0):
+            label_bits.append(str(amount))
+        if token:
+            label_bits.append(str(token))
+        elif rtype:
+            label_bits.append(str(rtype))
+
+        label = " ".join(label_bits).strip()
+        if label:
+            parts.append(label)
+    return parts
+
+
+def _reward_totals_to_rows(
+    totals: Dict[str, float],
+    prices: Dict[str, float],
+    coin_usd: float,
+) -> List[Dict[str, Any]]:
+    """
+    Turn {SYMBOL: amount} totals into table rows with value in COIN / USD.
+    """
+    rows: List[Dict[str, Any]] = []
+    for sym, amt in sorted(totals.items()):
+        price_coin = float(prices.get(sym, 0.0) or 0.0)
+        coin_value = amt * price_coin
+        usd_value = coin_value * coin_usd if coin_usd else 0.0
+        rows.append(
+            {
+                "symbol": sym,
+                "amount": amt,
+                "coin_value": coin_value,
+                "usd_value": usd_value,
+                "amount_str": "{:,.0f}".format(amt),
+                "coin_value_str": "{:,.2f}".format(coin_value),
+                "usd_value_str": "{:,.2f}".format(usd_value),
+            }
+        )
+    return rows
 
-    if my_rank_totals:
-        # Rank-only rewards (for your bracket)
-        my_rank_totals_list = _totals_to_rows(my_rank_totals)
 
-        # Grand total = all tier rewards (base + RawrPass) + your rank bracket bag
-        combined_plus_rank: Dict[str, float] = dict(combined_totals)
-        for sym, amt in my_rank_totals.items():
-            combined_plus_rank[sym] = combined_plus_rank.get(sym, 0.0) + amt
+def reward_totals_rows_html(rows: List[Dict[str, Any]]) -> Markup:
+    """
+    <tr> rows (token / amount / COIN / USD) for a totals table, built in
+    one join instead of a Jinja loop.
+    """
+    return Markup("".join(
+        "<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>"
+        % (escape(r["symbol"]), r["amount_str"], r["coin_value_str"], r["usd_value_str"])
+        for r in rows
+    ))
 
-        grand_totals_list = _totals_to_rows(combined_plus_rank)
-        grand_total_coin = sum(r["coin_value"] for r in grand_totals_list)
-        grand_total_usd = grand_total_coin * coin_usd if coin_usd else 0.0
 
-    # ---------- Build simple tier ladder rows for planner ----------
-    # Uses MP_TIER_THRESHOLDS (e.g. [10_000, 25_000, 50_000, ...])
-    tier_rows: List[Dict[str, Any]] = []
-    prev_req = 0
+def _tier_ladder_rows_html() -> Markup:
+    """
+    <tr> rows (tier / required MP / delta) for the "Tier ladder" table.
+    """
+    parts: List[str] = []
+    prev_req = 0.0
     for idx, req in enumerate(MP_TIER_THRESHOLDS, start=1):
         try:
-            req_val = int(req)
+            req_val = float(req)
         except (TypeError, ValueError):
-            continue  # skip weird values
-
-        delta = req_val - prev_req if idx > 1 else 0
-        tier_rows.append(
-            {
-                "tier": idx,
-                "required": req_val,
-                "delta": delta,
-            }
+            continue
+        parts.append(
+            "<tr><td>Tier %d</td><td>%s</td><td>%s</td></tr>"
+            % (idx, "{:,.0f}".format(req_val), "{:,.0f}".format(req_val - prev_req))
         )
         prev_req = req_val
+    return Markup("".join(parts))
 
 
-    # ---------- Render page ----------
-    content_html = render_template_string(
-        MASTERPIECES_TEMPLATE,
-        error=error,
-        # overview / current
-        current_mp=current_mp,
-        current_mp_top50=current_mp_top50,
-        current_gap=current_gap,
-        general_snapshot=general_snapshot,
-        event_snapshot=event_snapshot,
-        # 🔽 NEW: event tab
-        event_mp_top50=event_mp_top50,
-        event_gap=event_gap,
-        # history
-        selected_mp=selected_mp,
-        selected_mp_top50=selected_mp_top50,
-        selected_gap=selected_gap,
-        history_mp_options=history_mp_options,
-        highlight_query=highlight_query,
-        top_n=top_n,
-        top_n_options=TOP_N_OPTIONS,
-        # rewards / totals
-        src_mp=src_mp,
-        tier_rows=tier_rows,
-        reward_tier_rows=reward_tier_rows,
-        tier_base_totals_list=tier_base_totals_list,
-        tier_bp_totals_list=tier_bp_totals_list,
-        tier_combined_totals_list=tier_combined_totals_list,
-        tier_combined_total_coin=tier_combined_total_coin,
-        tier_combined_total_usd=tier_combined_total_usd,
-        my_rank_totals_list=my_rank_totals_list,
-        grand_totals_list=grand_totals_list,
-        grand_total_coin=grand_total_coin,
-        grand_total_usd=grand_total_usd,
-        coin_usd=coin_usd,
-        selected_reward_snapshot=selected_reward_snapshot,
-        has_battle_pass=has_battle_pass,
-        # planner
-        planner_mp=planner_mp,
-        planner_mp_options=planner_mp_options,
-        planner_tokens=planner_tokens,
-        calc_resources=calc_resources,
-        calc_result=calc_result,
-        calc_state_json=calc_state_json,
-    )
+# The ladder only depends on MP_TIER_THRESHOLDS, so it is built once.
+TIER_LADDER_ROWS_HTML = _tier_ladder_rows_html()
 
-    html = render_template_string(
-        BASE_TEMPLATE,
-        content=content_html,
-        active_page="masterpieces",
-        has_uid=has_uid_flag(),
-    )
-    return html
 
+# Rendered <option> lists for the masterpiece selectors, keyed by the
+# (id, label) pairs they were built from. Only changes when a new MP
+# appears or a label gets filled in from the metadata cache.
+_MP_OPTIONS_HTML_CACHE: Dict[tuple, str] = {}
+MP_OPTIONS_HTML_CACHE_MAX = 16
 
-def _build_reward_snapshot_for_mp(
-    mp: Optional[Dict[str, Any]],
-    rows: List[Dict[str, Any]],
-    highlight_query: str,
-) -> Optional[Dict[str, Any]]:
+
+def _mp_option_label(opt: Dict[str, Any]) -> str:
+    mid = opt.get("id")
+    if opt.get("name"):
+        return f"{opt['name']} (ID {mid})"
+    if opt.get("addressable_label"):
+        return f"{opt['addressable_label']} (ID {mid})"
+    return f"MP #{mid}"
+
+
+def mp_select_options_html(
+    options: List[Dict[str, Any]],
+    selected_id: Optional[Any] = None,
+) -> Markup:
     """
-    Build a 'your current reward' snapshot for a given masterpiece:
-      - Uses leaderboard rows + highlight_query to find your position & points
-      - Determines your completion tier (MP_TIER_THRESHOLDS)
-      - Looks up the leaderboard reward bracket you fall into.
-    Returns a dict or None if we can't find you.
+    <option> list for a masterpiece <select>. The markup is cached per
+    option set; marking the selected entry is a single string replace.
     """
-    highlight_query = (highlight_query or "").strip()
-    if not (mp and rows and highlight_query):
-        return None
+    key = tuple((str(opt.get("id")), _mp_option_label(opt)) for opt in options)
+    html = _MP_OPTIONS_HTML_CACHE.get(key)
+    if html is None:
+        html = "".join(
+            '<option value="%s">%s</option>' % (escape(mid), escape(label))
+            for mid, label in key
+        )
+        if len(_MP_OPTIONS_HTML_CACHE) >= MP_OPTIONS_HTML_CACHE_MAX:
+            _MP_OPTIONS_HTML_CACHE.clear()
+        _MP_OPTIONS_HTML_CACHE[key] = html
+
+    if selected_id is not None:
+        needle = '<option value="%s">' % escape(str(selected_id))
+        html = html.replace(needle, needle[:-1] + " selected>", 1)
+    return Markup(html)
+
+
+def build_tier_rewards(
+    src_mp: Optional[Dict[str, Any]],
+    has_battle_pass: bool,
+    prices: Dict[str, float],
+    coin_usd: float,
+) -> Dict[str, Any]:
+    """
+    Aggregate rewardStages of `src_mp` into the per-stage rows and one
+    totals table with base / RawrPass / total amounts per token (values in
+    COIN and USD follow the total, which only includes RawrPass when
+    `has_battle_pass`).
+
+    Memoized for TIER_REWARDS_TTL_SECONDS per
+    (masterpiece id, has_battle_pass, price snapshot); the result is
+    shared, so callers must not mutate it.
+    """
+    cache_key: Optional[tuple] = None
+    mp_id = src_mp.get("id") if isinstance(src_mp, dict) else None
+    prices_key = _prices_cache_key(prices)
+    if mp_id and prices_key is not None:
+        cache_key = (str(mp_id), bool(has_battle_pass), coin_usd, prices_key)
+        cached = _TIER_REWARDS_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
 
-    gap = compute_leaderboard_gap_for_highlight(rows, highlight_query)
-    if not gap or not gap.get("position"):
-        return None
+    reward_tier_rows: list[dict[str, object]] = []
 
-    my_position = gap["position"]
-    try:
-        my_position_int = int(str(my_position).strip())
-    except Exception:
-        my_position_int = None
+    # Totals across all tiers (cumulative)
+    tier_base_totals: Dict[str, float] = {}
+    tier_bp_totals: Dict[str, float] = {}
 
-    my_points = gap.get("points")
+    if isinstance(src_mp, dict):
+        raw_stages = src_mp.get("rewardStages") or []
 
-    # Figure out completion tier
-    tier_label, tier_min, tier_max = None, None, None
-    tier_index: Optional[int] = None
-    if my_points is not None:
+        # rewardStages can be either a list or dict; normalise to list
+        if isinstance(raw_stages, dict):
+            stages_iter = list(raw_stages.values())
+        elif isinstance(raw_stages, list):
+            stages_iter = raw_stages
+        else:
+            stages_iter = []
+
+        for idx, st in enumerate(stages_iter, start=1):
+            if not isinstance(st, dict):
+                continue
+
+            # Try to guess tier index and required points from common keys
+            tier_num = st.get("tier") or st.get("stage") or idx
+            required = (
+                st.get("requiredPoints")
+                or st.get("minPoints")
+                or st.get("minimumPoints")
+                or st.get("points")
+                or st.get("requiredMasterpiecePoints")
+            )
+
+            # --- base (free) rewards ---
+            rewards_list = st.get("rewards") or st.get("items") or []
+            base_parts = _accumulate_reward_list(rewards_list, tier_base_totals)
+
+            # --- RawrPass / battle pass rewards ---
+            bp_list = st.get("battlePassRewards") or []
+            bp_parts = _accumulate_reward_list(bp_list, tier_bp_totals)
+
+            # ---- Build the row for this stage ----
+            base_text = ", ".join(base_parts) if base_parts else ""
+            bp_text = ", ".join(bp_parts) if bp_parts else ""
+            if not base_text and not bp_text:
+                base_text = "See in-game rewards"
+
+            reward_tier_rows.append(
+                {
+                    "tier": tier_num,
+                    "required": required,
+                    "rewards_text": base_text,
+                    "battlepass_text": bp_text,
+                    # full objects so template can show icons later if you want
+                    "rewards": rewards_list,
+                    "battlepass_rewards": bp_list,
+                }
+            )
+
+    # Combined totals:
+    # - If you DON'T have RawrPass, combined == base-only
+    # - If you DO have RawrPass, combined = base + RawrPass
+    if has_battle_pass:
+        combined_totals: Dict[str, float] = dict(tier_base_totals)
+        for sym, amt in tier_bp_totals.items():
+            combined_totals[sym] = combined_totals.get(sym, 0.0) + amt
+    else:
+        combined_totals = dict(tier_base_totals)
+
+    # One row per symbol with both tracks side by side; values follow
+    # `combined_totals`.
+    tier_effective_totals_list = _reward_totals_to_rows(combined_totals, prices, coin_usd)
+    for sym in tier_bp_totals:
+        if sym not in combined_totals:
+            tier_effective_totals_list.extend(_reward_totals_to_rows({sym: 0.0}, prices, coin_usd))
+    tier_effective_totals_list.sort(key=lambda r: r["symbol"])
+    for row in tier_effective_totals_list:
+        sym = row["symbol"]
+        row["base_amount_str"] = "{:,.0f}".format(tier_base_totals.get(sym, 0.0))
+        row["bp_amount_str"] = "{:,.0f}".format(tier_bp_totals.get(sym, 0.0))
+
+    tier_combined_total_coin = sum(r["coin_value"] for r in tier_effective_totals_list)
+    tier_combined_total_usd = tier_combined_total_coin * coin_usd if coin_usd else 0.0
+
+    result = {
+        "reward_tier_rows": reward_tier_rows,
+        "combined_totals": combined_totals,
+        "tier_effective_totals_list": tier_effective_totals_list,
+        "tier_effective_totals_rows_html": Markup("".join(
+            "<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>"
+            % (
+                escape(r["symbol"]),
+                r["base_amount_str"],
+                r["bp_amount_str"],
+                r["amount_str"],
+                r["coin_value_str"],
+                r["usd_value_str"],
+            )
+            for r in tier_effective_totals_list
+        )),
+        "tier_combined_total_coin": tier_combined_total_coin,
+        "tier_combined_total_usd": tier_combined_total_usd,
+    }
+
+    if cache_key is not None:
+        _TIER_REWARDS_CACHE.set(cache_key, result)
+    return result
+
+
+# {masterpiece id: (tops, brackets)} from _leaderboard_reward_brackets().
+# Reward brackets are fixed per masterpiece; they are kept here rather than
+# on the shared details payload, which callers must not mutate.
+_REWARD_BRACKETS_CACHE: Dict[str, Tuple[List[int], List[Dict[str, Any]]]] = {}
+REWARD_BRACKETS_CACHE_MAX = 16
+
+
+def _leaderboard_reward_brackets(
+    mp: Dict[str, Any],
+) -> Tuple[List[int], List[Dict[str, Any]]]:
+    """
+    (top list, brackets) for mp["leaderboardRewards"], sorted by `top` for
+    bisect. The API sends brackets as { "top": 10, "rewards": [...] }, each
+    covering the ranks after the previous bracket's top up to its own;
+    they are returned as { "minRank": 4, "maxRank": 10, "rewards": [...] }.
+    Brackets without a numeric top are dropped.
+    """
+    mp_id = mp.get("id")
+    cached = _REWARD_BRACKETS_CACHE.get(str(mp_id)) if mp_id else None
+    if cached is None:
+        raw = sorted(
+            (
+                b
+                for b in mp.get("leaderboardRewards") or []
+                if isinstance(b, dict) and isinstance(b.get("top"), int)
+            ),
+            key=lambda b: b["top"],
+        )
+        tops: List[int] = []
+        brackets: List[Dict[str, Any]] = []
+        for b in raw:
+            prev_top = tops[-1] if tops else 0
+            if b["top"] <= prev_top:
+                continue
+            tops.append(b["top"])
+            brackets.append(
+                {"minRank": prev_top + 1, "maxRank": b["top"], "rewards": b.get("rewards") or []}
+            )
+        cached = (tops, brackets)
+        if mp_id:
+            if len(_REWARD_BRACKETS_CACHE) >= REWARD_BRACKETS_CACHE_MAX:
+                _REWARD_BRACKETS_CACHE.clear()
+            _REWARD_BRACKETS_CACHE[str(mp_id)] = cached
+    return cached
+
+
+def _build_reward_snapshot_for_mp(
+    mp: Optional[Dict[str, Any]],
+    rows: List[Dict[str, Any]],
+    highlight_query: str,
+    gap: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a 'your current reward' snapshot for a given masterpiece:
+      - Uses leaderboard rows + highlight_query to find your position & points
+        (or `gap`, if the caller already computed it for these rows)
+      - Determines your completion tier (MP_TIER_THRESHOLDS)
+      - Looks up the leaderboard reward bracket you fall into.
+    Returns a dict or None if we can't find you.
+    """
+    highlight_query = (highlight_query or "").strip()
+    if not (mp and rows and highlight_query):
+        return None
+
+    if gap is None:
+        gap = compute_leaderboard_gap_for_highlight(rows, highlight_query)
+    if not gap or not gap.get("position"):
+        return None
+
+    my_position = gap["position"]
+    try:
+        my_position_int = int(str(my_position).strip())
+    except Exception:
+        my_position_int = None
+
+    my_points = gap.get("points")
+
+    # Figure out completion tier
+    tier_label, tier_min, tier_max = None, None, None
+    tier_index: Optional[int] = None
+    if my_points is not None:
         try:
             pts = float(my_points)
         except Exception:
             pts = None
 
         if pts is not None:
-            t_index = 0
-            # MP_TIER_THRESHOLDS is a simple list of ints
-            for i, req in enumerate(MP_TIER_THRESHOLDS, start=1):
-                if pts >= req:
-                    t_index = i
-                else:
-                    break
+            # MP_TIER_THRESHOLDS is a sorted list of ints, so the tier is
+            # the number of thresholds already reached.
+            t_index = bisect.bisect_right(MP_TIER_THRESHOLDS, pts)
 
             if t_index > 0:
                 tier_index = t_index
@@ -7654,45 +8232,27 @@ def _build_reward_snapshot_for_mp(
     # Figure out reward bracket we fall into
     reward_bracket: Optional[Dict[str, Any]] = None
     if my_position_int is not None:
-        # mp["leaderboardRewards"] is a list of brackets like:
-        # { "minRank": 1, "maxRank": 1, "reward": { "experience": 500, ... } }
-        for bracket in mp.get("leaderboardRewards", []) or []:
-            min_rank = bracket.get("minRank")
-            max_rank = bracket.get("maxRank")
-            if min_rank is None or max_rank is None:
-                continue
-            try:
-                # Treat these as inclusive rank ranges [minRank, maxRank]
-                if min_rank <= my_position_int <= max_rank:
-                    reward_bracket = bracket
-                    break
-            except TypeError:
-                continue
+        # Brackets cover the inclusive rank ranges [minRank, maxRank] with
+        # maxRank = top, so ours is the first bracket whose top is at or
+        # above our rank.
+        tops, brackets = _leaderboard_reward_brackets(mp)
+        i = bisect.bisect_left(tops, my_position_int)
+        if i < len(brackets):
+            reward_bracket = brackets[i]
 
     reward_label = None
     if reward_bracket:
-        rr = reward_bracket.get("reward") or {}
-        label_parts = []
-        xp = rr.get("experience")
-        if xp is not None:
-            label_parts.append(f"{xp:,} XP")
-        mp_tokens = rr.get("masterpiecePoints")
-        if mp_tokens is not None:
-            label_parts.append(f"{mp_tokens:,} MP")
-        coins = rr.get("coins")
-        if coins is not None:
-            label_parts.append(f"{coins:,} coins")
+        reward_text = ", ".join(_accumulate_reward_list(reward_bracket["rewards"], {}))
 
         # Add 1-based rank range label
-        min_rank = reward_bracket.get("minRank")
-        max_rank = reward_bracket.get("maxRank")
-        if min_rank is not None and max_rank is not None:
-            if min_rank == max_rank:
-                label_parts.append(f"(Rank {min_rank})")
-            else:
-                label_parts.append(f"(Ranks {min_rank}–{max_rank})")
+        min_rank = reward_bracket["minRank"]
+        max_rank = reward_bracket["maxRank"]
+        if min_rank == max_rank:
+            rank_text = f"(Rank {min_rank})"
+        else:
+            rank_text = f"(Ranks {min_rank}–{max_rank})"
 
-        reward_label = " ".join(label_parts).strip()
+        reward_label = f"{reward_text} {rank_text}".strip()
 
     # Build a snapshot dict. Include both the newer descriptive keys
     # and some backward-compatibility aliases that the Jinja template expects.
@@ -7733,526 +8293,122 @@ def _build_reward_snapshot_for_mp(
 
 
 
-# -------- Snipe Calculator tab --------
-@app.route("/snipe", methods=["GET", "POST"])
-def snipe():
-    error: Optional[str] = None
-
-    # Three possible result blocks
-    rank_result: Optional[Dict[str, Any]] = None
-    target_result: Optional[Dict[str, Any]] = None
-    combo_result: Optional[Dict[str, Any]] = None
-
-    # ----- Load masterpieces for dropdowns -----
-    masterpieces_data: List[Dict[str, Any]] = []
-    try:
-        masterpieces_data = fetch_masterpieces()
-    except Exception as e:
-        error = f"Error fetching masterpieces: {e}"
-        masterpieces_data = []
-
-    # Build a lookup by ID and compute the highest MP ID we know about,
-    # just like the Masterpiece Hub does.
-    mp_by_id: Dict[int, Dict[str, Any]] = {}
-    max_mp_id = 0
-    for mp in masterpieces_data:
-        try:
-            mid = int(mp.get("id") or 0)
-        except (TypeError, ValueError):
-            continue
-        if mid > 0:
-            mp_by_id[mid] = mp
-            if mid > max_mp_id:
-                max_mp_id = mid
-
-    # Seed the metadata cache with the list we just fetched.
-    for mp in masterpieces_data:
-        try:
-            cache_masterpiece_metadata(mp)
-        except Exception:
-            pass
-
-    # Merge cached metadata back into mp_by_id and extend max_mp_id if needed.
+# -------- Leaderboard JSON (client-side rendered tables) --------
+@app.route("/api/mp/<int:mp_id>/top", methods=["GET"])
+def api_mp_top(mp_id: int):
+    """
+    Top-N leaderboard for one masterpiece as compact rows
+    (see leaderboard_rows_compact).
+    """
     try:
-        mp_cache = load_masterpiece_metadata_cache()
-    except Exception:
-        mp_cache = {}
-
-    for mid, meta in mp_cache.items():
-        if mid in mp_by_id:
-            base = dict(mp_by_id[mid])
-            # Overlay stored fields without blowing away other keys.
-            for key, val in meta.items():
-                if val not in (None, ""):
-                    base[key] = val
-            mp_by_id[mid] = base
-        else:
-            mp_by_id[mid] = dict(meta)
-        if mid > max_mp_id:
-            max_mp_id = mid
-
-    # Finally, build MP choices as MP 1..max_mp_id so Snipe sees *all* MPs.
-    mp_choices: List[Dict[str, Any]] = []
-    if max_mp_id > 0:
-        for mid in range(1, max_mp_id + 1):
-            mp = mp_by_id.get(mid, {"id": mid})
-            name = (
-                mp.get("name")
-                or mp.get("addressable_label")
-                or mp.get("addressableLabel")
-                or mp.get("type")
-                or f"MP {mid}"
-            )
-            mp_choices.append({"id": mid, "label": f"{name} (ID {mid})"})
-    else:
-        # Fallback: if for some reason we have no max_mp_id, use raw list.
-        for mp in masterpieces_data:
-            mid = mp.get("id")
-            if not mid:
-                continue
-            name = mp.get("name") or mp.get("type") or f"MP {mid}"
-            mp_choices.append({
-                "id": mid,
-                "label": f"{name} (ID {mid})",
-            })
-
-
-
-    selected_mp_id: Optional[int] = None
-    target_rank: int = 25
-    my_points: float = 0.0
-    target_points_input: float = 0.0
-    combo_text: str = ""
-
-    mode: str = "rank"
-
-    if request.method == "POST":
-        mode = (request.form.get("mode") or "rank").strip()
-
-        # Shared masterpiece id parsing
-        mp_id_str = (request.form.get("masterpiece_id") or "").strip()
-        try:
-            selected_mp_id = int(mp_id_str)
-        except ValueError:
-            selected_mp_id = None
-
-        if mode == "rank":
-            # Existing rank-based single-resource snipe
-            target_str = (request.form.get("target_rank") or "").strip()
-            my_points_str = (request.form.get("my_points") or "").strip()
-
-            try:
-                target_rank = int(target_str)
-                if target_rank < 1:
-                    target_rank = 1
-            except ValueError:
-                target_rank = 1
-
-            try:
-                my_points = float(my_points_str or "0")
-            except ValueError:
-                my_points = 0.0
-
-            if not selected_mp_id:
-                error = "Please select a valid masterpiece."
-            else:
-                try:
-                    mp = fetch_masterpiece_details(selected_mp_id)
-                    prices = fetch_live_prices_in_coin()
-
-                    leaderboard = mp.get("leaderboard") or []
-                    target_entry = None
-                    for row in leaderboard:
-                        if row.get("position") == target_rank:
-                            target_entry = row
-                            break
-
-                    if not target_entry:
-                        if leaderboard:
-                            target_entry = leaderboard[-1]
-                            target_rank = target_entry.get("position", target_rank)
-                        else:
-                            raise RuntimeError("No leaderboard data available for this masterpiece.")
-
-                    target_points = float(target_entry.get("masterpiecePoints") or 0.0)
-                    points_needed = max(0.0, target_points + 1.0 - my_points)
-
-                    # Base resources from the masterpiece
-                    resources = mp.get("resources") or []
-
-                    # NEW: if this masterpiece doesn’t expose resources (e.g. event MP),
-                    # build a synthetic list from ALL_FACTORY_TOKENS so we still
-                    # get names + per-unit battery/points via predictReward.
-                    if not resources:
-                        resources = [
-                            {"symbol": sym, "amount": 0.0, "target": float("inf")}
-                            for sym in ALL_FACTORY_TOKENS
-                        ]
-
-                    options: List[Dict[str, Any]] = []
-
-                    for r in resources:
-                        symbol = (r.get("symbol") or "").upper()
-                        current_amt = float(r.get("amount") or 0.0)
-                        target_amt = float(r.get("target") or 0.0)
-                        remaining = max(0.0, target_amt - current_amt)
-                        if remaining <= 0:
-                            continue
-
-                        pr = predict_reward(
-                            selected_mp_id,
-                            [{"symbol": symbol, "amount": 1}],
-                        )
-                        pts_per_unit = float(pr.get("masterpiecePoints") or 0.0)
-                        battery_per_unit = float(pr.get("requiredPower") or 0.0)
-                        price_coin = float(prices.get(symbol, 0.0))
-
-                        # Require the resource to give MP points,
-                        # but allow price_coin == 0 (no price data).
-                        if pts_per_unit <= 0:
-                            continue
-
-                        units_needed = math.ceil(points_needed / pts_per_unit) if points_needed > 0 else 0
-                        if units_needed <= 0:
-                            units_needed = 0
-
-                        if units_needed > remaining:
-                            max_points = remaining * pts_per_unit
-                            enough = False
-                        else:
-                            max_points = units_needed * pts_per_unit
-                            enough = True
-
-                        coin_cost = units_needed * price_coin
-                        battery_cost = units_needed * battery_per_unit
-
-                        options.append({
-                            "symbol": symbol,
-                            "remaining": remaining,
-                            "points_per_unit": pts_per_unit,
-                            "battery_per_unit": battery_per_unit,
-                            "price_coin": price_coin,
-                            "units_needed": units_needed,
-                            "coin_cost": coin_cost,
-                            "battery_cost": battery_cost,
-                            "enough": enough,
-                            "max_points": max_points,
-                        })
-
-
-                    options.sort(key=lambda o: o["coin_cost"] if o["coin_cost"] > 0 else 1e18)
-
-                    # ----- Cheapest multi-resource mix plan (greedy by COIN/point) -----
-                    mix_plan: Optional[Dict[str, Any]] = None
-                    if points_needed > 0 and options:
-                        enriched = []
-                        for o in options:
-                            pts_per_unit = o["points_per_unit"]
-                            price_coin = o["price_coin"]
-                            remaining_units = o["remaining"]
-                            if pts_per_unit <= 0 or price_coin <= 0 or remaining_units <= 0:
-                                continue
-                            coin_per_point = price_coin / pts_per_unit
-                            max_points_res = remaining_units * pts_per_unit
-                            e = dict(o)
-                            e["coin_per_point"] = coin_per_point
-                            e["max_points_res"] = max_points_res
-                            enriched.append(e)
-
-                        # cheapest COIN per point first
-                        enriched.sort(key=lambda e: e["coin_per_point"])
-
-                        remaining_pts = points_needed
-                        chosen_rows: List[Dict[str, Any]] = []
-                        total_coin = 0.0
-                        total_battery = 0.0
-
-                        for e in enriched:
-                            if remaining_pts <= 0:
-                                break
-
-                            pts_from_this = min(remaining_pts, e["max_points_res"])
-                            if pts_from_this <= 0:
-                                continue
-
-                            # convert points back to units, round up
-                            units = math.ceil(pts_from_this / e["points_per_unit"])
-                            if units > e["remaining"]:
-                                units = int(e["remaining"])
-                                pts_from_this = units * e["points_per_unit"]
-
-                            if units <= 0:
-                                continue
-
-                            coin_cost = units * e["price_coin"]
-                            battery_cost = units * e["battery_per_unit"]
-
-                            total_coin += coin_cost
-                            total_battery += battery_cost
-                            remaining_pts -= pts_from_this
-
-                            chosen_rows.append({
-                                "symbol": e["symbol"],
-                                "units": units,
-                                "points": pts_from_this,
-                                "coin_cost": coin_cost,
-                                "battery_cost": battery_cost,
-                                "coin_per_point": e["coin_per_point"],
-                            })
-
-                        if chosen_rows:
-                            achieved_points = points_needed - max(0.0, remaining_pts)
-                            mix_plan = {
-                                "rows": chosen_rows,
-                                "target_points": points_needed,
-                                "achieved_points": achieved_points,
-                                "enough": remaining_pts <= 0.0,
-                                "total_coin": total_coin,
-                                "total_battery": total_battery,
-                            }
-
-                    rank_result = {
-                        "mp": mp,
-                        "target_rank": target_rank,
-                        "target_points": target_points,
-                        "my_points": my_points,
-                        "points_needed": points_needed,
-                        "options": options,
-                        "mix_plan": mix_plan,
-                    }
-
-
-
-                except Exception as e:
-                    error = f"Error calculating rank snipe: {e}"
-
-        elif mode == "target":
-            # Target raw points -> single-resource options
-            target_pts_str = (request.form.get("target_points") or "").strip()
-            try:
-                target_points_input = float(target_pts_str or "0")
-            except ValueError:
-                target_points_input = 0.0
-
-            if not selected_mp_id:
-                error = "Please select a valid masterpiece."
-            else:
-                try:
-                    mp = fetch_masterpiece_details(selected_mp_id)
-                    prices = fetch_live_prices_in_coin()
+        top_n = int(request.args.get("top_n") or session.get("mp_top_n", DEFAULT_TOP_N))
+    except (TypeError, ValueError):
+        top_n = DEFAULT_TOP_N
+    if top_n not in TOP_N_OPTIONS:
+        top_n = DEFAULT_TOP_N
 
-                    points_needed = max(0.0, target_points_input)
+    highlight_query = (request.args.get("highlight") or session.get("mp_highlight", "") or "").strip()
 
-                    # Base resources from the masterpiece
-                    resources = mp.get("resources") or []
-
-                    # NEW: fallback for event MPs with no explicit resources list
-                    if not resources:
-                        resources = [
-                            {"symbol": sym, "amount": 0.0, "target": float("inf")}
-                            for sym in ALL_FACTORY_TOKENS
-                        ]
-
-                    options: List[Dict[str, Any]] = []
-                    
-                    for r in resources:
-                        symbol = (r.get("symbol") or "").upper()
-                        current_amt = float(r.get("amount") or 0.0)
-                        target_amt = float(r.get("target") or 0.0)
-                        remaining = max(0.0, target_amt - current_amt)
-                        if remaining <= 0:
-                            continue
+    mp = cached_fetch_masterpiece_details(mp_id)
+    if not mp:
+        # Failed fetch: let the page keep the rows it already shows.
+        return jsonify({"id": mp_id, "error": "Could not load masterpiece"}), 502
+    lb = mp.get("leaderboard") or []
+    rows = mark_highlighted_rows(lb[:top_n], highlight_query)
 
-                        pr = predict_reward(
-                            selected_mp_id,
-                            [{"symbol": symbol, "amount": 1}],
-                        )
-                        pts_per_unit = float(pr.get("masterpiecePoints") or 0.0)
-                        battery_per_unit = float(pr.get("requiredPower") or 0.0)
-                        price_coin = float(prices.get(symbol, 0.0))
+    return jsonify({"id": mp_id, "rows": leaderboard_rows_compact(rows)})
 
-                        # ALLOW price_coin == 0 (event resources without price data)
-                        if pts_per_unit <= 0:
-                            continue
 
-                        units_needed = math.ceil(points_needed / pts_per_unit) if points_needed > 0 else 0
-                        if units_needed <= 0:
-                            units_needed = 0
+# -------- Snipe Calculator tab --------
+# Combo donation text: entries separated by commas / newlines, each one
+# SYMBOL, then "=", ":" or whitespace, then the amount. One findall()
+# yields (symbol, amount) for every well-formed entry; an entry only
+# matches as a whole (start/end anchored on the separators), so
+# malformed entries are skipped.
+_DONATION_RE = re.compile(
+    r"(?:\A|(?<=[,\n]))[^\S\n]*"  # entry start, leading blanks
+    r"([^\s=:,]+)"  # SYMBOL
+    r"(?:[^\S\n]*[=:][^\S\n]*|[^\S\n]+)"  # "=", ":" or whitespace
+    r"([^\s,]+)"  # amount
+    r"[^\S\n]*(?=[,\n]|\Z)"  # trailing blanks, entry end
+)
 
-                        if units_needed > remaining:
-                            max_points = remaining * pts_per_unit
-                            enough = False
-                        else:
-                            max_points = units_needed * pts_per_unit
-                            enough = True
-
-                        coin_cost = units_needed * price_coin
-                        battery_cost = units_needed * battery_per_unit
-
-                        options.append({
-                            "symbol": symbol,
-                            "remaining": remaining,
-                            "points_per_unit": pts_per_unit,
-                            "battery_per_unit": battery_per_unit,
-                            "price_coin": price_coin,
-                            "units_needed": units_needed,
-                            "coin_cost": coin_cost,
-                            "battery_cost": battery_cost,
-                            "enough": enough,
-                            "max_points": max_points,
-                        })
-
-
-                    options.sort(key=lambda o: o["coin_cost"] if o["coin_cost"] > 0 else 1e18)
-
-                    # ----- Cheapest multi-resource mix plan (greedy by COIN/point) -----
-                    mix_plan: Optional[Dict[str, Any]] = None
-                    if points_needed > 0 and options:
-                        enriched = []
-                        for o in options:
-                            pts_per_unit = o["points_per_unit"]
-                            price_coin = o["price_coin"]
-                            remaining_units = o["remaining"]
-                            if pts_per_unit <= 0 or price_coin <= 0 or remaining_units <= 0:
-                                continue
-                            coin_per_point = price_coin / pts_per_unit
-                            max_points_res = remaining_units * pts_per_unit
-                            e = dict(o)
-                            e["coin_per_point"] = coin_per_point
-                            e["max_points_res"] = max_points_res
-                            enriched.append(e)
-
-                        # cheapest COIN per point first
-                        enriched.sort(key=lambda e: e["coin_per_point"])
-
-                        remaining_pts = points_needed
-                        chosen_rows: List[Dict[str, Any]] = []
-                        total_coin = 0.0
-                        total_battery = 0.0
-
-                        for e in enriched:
-                            if remaining_pts <= 0:
-                                break
-
-                            pts_from_this = min(remaining_pts, e["max_points_res"])
-                            if pts_from_this <= 0:
-                                continue
-
-                            # convert points back to units, round up
-                            units = math.ceil(pts_from_this / e["points_per_unit"])
-                            if units > e["remaining"]:
-                                units = int(e["remaining"])
-                                pts_from_this = units * e["points_per_unit"]
-
-                            if units <= 0:
-                                continue
-
-                            coin_cost = units * e["price_coin"]
-                            battery_cost = units * e["battery_per_unit"]
-
-                            total_coin += coin_cost
-                            total_battery += battery_cost
-                            remaining_pts -= pts_from_this
-
-                            chosen_rows.append({
-                                "symbol": e["symbol"],
-                                "units": units,
-                                "points": pts_from_this,
-                                "coin_cost": coin_cost,
-                                "battery_cost": battery_cost,
-                                "coin_per_point": e["coin_per_point"],
-                            })
-
-                        if chosen_rows:
-                            achieved_points = points_needed - max(0.0, remaining_pts)
-                            mix_plan = {
-                                "rows": chosen_rows,
-                                "target_points": points_needed,
-                                "achieved_points": achieved_points,
-                                "enough": remaining_pts <= 0.0,
-                                "total_coin": total_coin,
-                                "total_battery": total_battery,
-                            }
+# Masterpieces that don't expose resources (e.g. event MPs) are sniped
+# against every factory token with no target cap, so we still get names +
+# per-unit battery/points via predictReward. Read-only, shared by requests.
+_SNIPE_FALLBACK_RESOURCES: Tuple[Dict[str, Any], ...] = tuple(
+    {"symbol": sym, "amount": 0.0, "target": float("inf")}
+    for sym in ALL_FACTORY_TOKENS
+)
 
-                    target_result = {
-                        "mp": mp,
-                        "target_points": points_needed,
-                        "options": options,
-                        "mix_plan": mix_plan,
-                    }
 
+def _compute_snipe_options(
+    mp_id: Any,
+    mp: Dict[str, Any],
+    prices: Dict[str, float],
+    points_needed: float,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Shared by the rank and target snipe modes: single-resource options
+    for reaching `points_needed` on masterpiece `mp`, plus the greedy
+    cheapest-COIN-per-point mix plan (None if nothing can be bought).
+    """
+    # Base resources from the masterpiece, or the synthetic fallback list
+    # if it doesn't expose any (e.g. event MP).
+    resources = mp.get("resources") or _SNIPE_FALLBACK_RESOURCES
+
+    # Gather per-symbol columns first; the arithmetic and the
+    # sort run over whole columns in snipe_option_rows().
+    col_symbol: List[str] = []
+    col_remaining: List[float] = []
+    col_pts: List[float] = []
+    col_battery: List[float] = []
+    col_price: List[float] = []
+
+    open_resources = []
+    for r in resources:
+        symbol = (r.get("symbol") or "").upper()
+        current_amt = float(r.get("amount") or 0.0)
+        target_amt = float(r.get("target") or 0.0)
+        remaining = max(0.0, target_amt - current_amt)
+        if remaining > 0:
+            open_resources.append((symbol, remaining))
+
+    # One (cached, parallel) lookup for all per-unit rewards
+    per_unit = get_mp_per_unit_rewards(
+        str(mp_id), [sym for sym, _ in open_resources]
+    )
+    pts_by_sym = per_unit["points"]
+    power_by_sym = per_unit["power"]
 
-                except Exception as e:
-                    error = f"Error calculating target-points snipe: {e}"
+    for symbol, remaining in open_resources:
+        pts_per_unit = pts_by_sym.get(symbol, 0.0)
+        battery_per_unit = power_by_sym.get(symbol, 0.0)
+        price_coin = float(prices.get(symbol, 0.0))
 
-        elif mode == "combo":
-            combo_text = (request.form.get("combo_text") or "").strip()
-            if not selected_mp_id:
-                error = "Please select a valid masterpiece."
-            elif not combo_text:
-                error = "Enter at least one donation like: MUD=100000, GAS 42000, CEMENT:69"
-            else:
-                try:
-                    # Parse text into list of {symbol, amount}
-                    donations: List[Dict[str, Any]] = []
-                    parts = [p.strip() for p in combo_text.replace("\n", ",").split(",") if p.strip()]
-                    for part in parts:
-                        # Accept formats like "MUD=100", "MUD 100", "MUD:100"
-                        for sep in ["=", ":", " "]:
-                            if sep in part:
-                                sym, amt_str = part.split(sep, 1)
-                                break
-                        else:
-                            # No separator found, skip
-                            continue
-                        sym = sym.strip().upper()
-                        try:
-                            amt = float(amt_str.strip())
-                        except ValueError:
-                            continue
-                        if amt <= 0:
-                            continue
-                        donations.append({"symbol": sym, "amount": amt})
+        # Require the resource to give MP points,
+        # but allow price_coin == 0 (no price data).
+        if pts_per_unit <= 0:
+            continue
 
-                    if not donations:
-                        error = "No valid symbol/amount pairs found."
-                    else:
-                        mp = fetch_masterpiece_details(selected_mp_id)
-                        prices = fetch_live_prices_in_coin()
+        col_symbol.append(symbol)
+        col_remaining.append(remaining)
+        col_pts.append(pts_per_unit)
+        col_battery.append(battery_per_unit)
+        col_price.append(price_coin)
 
-                        pr = predict_reward(selected_mp_id, donations)
-                        total_points = float(pr.get("masterpiecePoints") or 0.0)
-                        total_battery = float(pr.get("requiredPower") or 0.0)
+    columns = (col_symbol, col_remaining, col_pts, col_battery, col_price)
+    options = snipe_option_rows(*columns, points_needed)
 
-                        per_resource: List[Dict[str, Any]] = []
-                        total_coin = 0.0
-                        for d in donations:
-                            sym = d["symbol"].upper()
-                            amt = float(d["amount"] or 0.0)
-                            price_coin = float(prices.get(sym, 0.0))
-                            coin_cost = price_coin * amt
-                            total_coin += coin_cost
-                            per_resource.append({
-                                "symbol": sym,
-                                "amount": amt,
-                                "price_coin": price_coin,
-                                "coin_cost": coin_cost,
-                            })
+    # ----- Cheapest multi-resource mix plan (greedy by COIN/point) -----
+    # Works on the same columns; only the final rows become dicts.
+    mix_plan = greedy_mix_plan(*columns, points_needed)
 
-                        combo_result = {
-                            "mp": mp,
-                            "total_points": total_points,
-                            "total_battery": total_battery,
-                            "total_coin": total_coin,
-                            "per_resource": per_resource,
-                            "raw_text": combo_text,
-                        }
+    return options, mix_plan
 
-                except Exception as e:
-                    error = f"Error calculating combo donation: {e}"
 
-    # Build HTML
-    content = """
+# ================= SNIPE TAB TEMPLATE ==================
+SNIPE_TEMPLATE = """
     <div class="card">
       <h1>Masterpiece Snipe &amp; Donation Tools</h1>
       <p class="subtle">
@@ -8527,154 +8683,399 @@ def snipe():
       </div>
     </div>
     """
+# ================= END SNIPE TEMPLATE ==================
 
-    content = render_template_string(
-        content,
-        error=error,
-        rank_result=rank_result,
-        target_result=target_result,
-        combo_result=combo_result,
-        mp_choices=mp_choices,
-        selected_mp_id=selected_mp_id,
-        target_rank=target_rank,
-        my_points=my_points,
-        target_points_input=target_points_input,
-        combo_text=combo_text,
-    )
+@app.route("/snipe", methods=["GET", "POST"])
+def snipe():
+    error: Optional[str] = None
 
-    html = render_template_string(
-        BASE_TEMPLATE,
-        content=content,
-        active_page="snipe",
-        has_uid=has_uid_flag(),
-    )
-    return html
+    # Three possible result blocks
+    rank_result: Optional[Dict[str, Any]] = None
+    target_result: Optional[Dict[str, Any]] = None
+    combo_result: Optional[Dict[str, Any]] = None
 
+    # ----- Load masterpieces for dropdowns -----
+    masterpieces_data: List[Dict[str, Any]] = []
+    try:
+        masterpieces_data = cached_fetch_masterpieces()
+    except Exception as e:
+        error = f"Error fetching masterpieces: {e}"
+        masterpieces_data = []
 
-# -------- Calculate tab (CSV-based) --------
-@app.route("/calculate", methods=["GET", "POST"])
-def calculate():
-    error: Optional[str] = None
-    calc_result = None
-    best_rows: Optional[List[Any]] = None
-    combined_speed: Optional[float] = None
-    worker_factor: Optional[float] = None
+    # Build a lookup by ID and compute the highest MP ID we know about,
+    # just like the Masterpiece Hub does.
+    mp_by_id, max_mp_id = build_mp_index(masterpieces_data)
 
-    factories = FACTORIES_FROM_CSV or {}
+    # Finally, build MP choices as MP 1..max_mp_id so Snipe sees *all* MPs.
+    mp_choices: List[Dict[str, Any]] = []
+    if max_mp_id > 0:
+        for mid in range(1, max_mp_id + 1):
+            mp = mp_by_id.get(mid, {"id": mid})
+            name = (
+                mp.get("name")
+                or mp.get("addressable_label")
+                or mp.get("addressableLabel")
+                or mp.get("type")
+                or f"MP {mid}"
+            )
+            mp_choices.append({"id": mid, "label": f"{name} (ID {mid})"})
+    else:
+        # Fallback: if for some reason we have no max_mp_id, use raw list.
+        for mp in masterpieces_data:
+            mid = mp.get("id")
+            if not mid:
+                continue
+            name = mp.get("name") or mp.get("type") or f"MP {mid}"
+            mp_choices.append({
+                "id": mid,
+                "label": f"{name} (ID {mid})",
+            })
 
-    # Use your global display order: MUD, CLAY, SAND, ... DYNAMITE
-    all_tokens = list(factories.keys())
-    tokens: List[str] = [t for t in FACTORY_DISPLAY_ORDER if t in factories]
-    for tok in sorted(all_tokens):
-        if tok not in tokens:
-            tokens.append(tok)
 
-    selected_token = tokens[0] if tokens else ""
-    selected_level = None
-    target_level = None
-    count = 1
-    yield_pct = 100.0
-    speed_factor = 1.0
-    workers = 0
-    action = "calculate"
+
+    selected_mp_id: Optional[int] = None
+    target_rank: int = 25
+    my_points: float = 0.0
+    target_points_input: float = 0.0
+    combo_text: str = ""
+
+    mode: str = "rank"
 
     if request.method == "POST":
-        action = request.form.get("action", "calculate")
-        selected_token = request.form.get("factory", selected_token).strip().upper()
-        count_str = request.form.get("count", "1").strip() or "1"
-        yield_str = request.form.get("yield_pct", "100").strip() or "100"
-        speed_str = request.form.get("speed_factor", "1.0").strip() or "1.0"
-        workers_str = request.form.get("workers", "0").strip() or "0"
-        level_str = request.form.get("level", "").strip()
-        target_str = request.form.get("target_level", "").strip()
+        mode = (request.form.get("mode") or "rank").strip()
 
+        # Shared masterpiece id parsing
+        mp_id_str = (request.form.get("masterpiece_id") or "").strip()
         try:
-            count = max(int(count_str), 1)
-        except ValueError:
-            count = 1
-        try:
-            yield_pct = float(yield_str)
-        except ValueError:
-            yield_pct = 100.0
-        try:
-            speed_factor = float(speed_str)
-        except ValueError:
-            speed_factor = 1.0
-        try:
-            workers = max(0, min(int(workers_str), 4))
+            selected_mp_id = int(mp_id_str)
         except ValueError:
-            workers = 0
+            selected_mp_id = None
 
-        selected_level = None
-        target_level = None
+        if mode == "rank":
+            # Existing rank-based single-resource snipe
+            target_str = (request.form.get("target_rank") or "").strip()
+            my_points_str = (request.form.get("my_points") or "").strip()
 
-        if level_str:
             try:
-                selected_level = int(level_str)
-            except Exception:
-                selected_level = None
+                target_rank = int(target_str)
+                if target_rank < 1:
+                    target_rank = 1
+            except ValueError:
+                target_rank = 1
 
-        if target_str:
             try:
-                target_level = int(target_str)
-            except Exception:
-                target_level = None
+                my_points = float(my_points_str or "0")
+            except ValueError:
+                my_points = 0.0
+
+            if not selected_mp_id:
+                error = "Please select a valid masterpiece."
+            else:
+                try:
+                    mp = cached_fetch_masterpiece_details(selected_mp_id)
+                    prices = fetch_live_prices_in_coin()
+
+                    leaderboard = mp.get("leaderboard") or []
+                    target_entry = leaderboard_position_index(mp).get(target_rank)
+
+                    if not target_entry:
+                        if leaderboard:
+                            target_entry = leaderboard[-1]
+                            target_rank = target_entry.get("position", target_rank)
+                        else:
+                            raise RuntimeError("No leaderboard data available for this masterpiece.")
+
+                    target_points = float(target_entry.get("masterpiecePoints") or 0.0)
+                    points_needed = max(0.0, target_points + 1.0 - my_points)
+
+                    options, mix_plan = _compute_snipe_options(
+                        selected_mp_id, mp, prices, points_needed
+                    )
+
+                    rank_result = {
+                        "mp": mp,
+                        "target_rank": target_rank,
+                        "target_points": target_points,
+                        "my_points": my_points,
+                        "points_needed": points_needed,
+                        "options": options,
+                        "mix_plan": mix_plan,
+                    }
+
+
+
+                except Exception as e:
+                    error = f"Error calculating rank snipe: {e}"
+
+        elif mode == "target":
+            # Target raw points -> single-resource options
+            target_pts_str = (request.form.get("target_points") or "").strip()
+            try:
+                target_points_input = float(target_pts_str or "0")
+            except ValueError:
+                target_points_input = 0.0
+
+            if not selected_mp_id:
+                error = "Please select a valid masterpiece."
+            else:
+                try:
+                    mp = cached_fetch_masterpiece_details(selected_mp_id)
+                    prices = fetch_live_prices_in_coin()
+
+                    points_needed = max(0.0, target_points_input)
+
+                    options, mix_plan = _compute_snipe_options(
+                        selected_mp_id, mp, prices, points_needed
+                    )
+
+                    target_result = {
+                        "mp": mp,
+                        "target_points": points_needed,
+                        "options": options,
+                        "mix_plan": mix_plan,
+                    }
+
+
+                except Exception as e:
+                    error = f"Error calculating target-points snipe: {e}"
+
+        elif mode == "combo":
+            combo_text = (request.form.get("combo_text") or "").strip()
+            if not selected_mp_id:
+                error = "Please select a valid masterpiece."
+            elif not combo_text:
+                error = "Enter at least one donation like: MUD=100000, GAS 42000, CEMENT:69"
+            else:
+                try:
+                    # Parse text into list of {symbol, amount}
+                    donations: List[Dict[str, Any]] = []
+                    # Accept formats like "MUD=100", "MUD 100", "MUD:100"
+                    for sym, amt_raw in _DONATION_RE.findall(combo_text):
+                        sym = sym.upper()
+                        try:
+                            amt = float(amt_raw)
+                        except ValueError:
+                            continue
+                        if amt <= 0:
+                            continue
+                        donations.append({"symbol": sym, "amount": amt})
+
+                    if not donations:
+                        error = "No valid symbol/amount pairs found."
+                    else:
+                        mp = cached_fetch_masterpiece_details(selected_mp_id)
+                        # ?refresh=1 bypasses the short price cache
+                        prices = fetch_live_prices_in_coin(
+                            force_refresh=request.args.get("refresh") == "1"
+                        )
+
+                        pr = predict_reward(selected_mp_id, donations)
+                        total_points = float(pr.get("masterpiecePoints") or 0.0)
+                        total_battery = float(pr.get("requiredPower") or 0.0)
+
+                        combo_symbols = [d["symbol"] for d in donations]
+                        per_resource, total_coin = combo_cost_rows(
+                            combo_symbols,
+                            [d["amount"] for d in donations],
+                            [float(prices.get(sym, 0.0)) for sym in combo_symbols],
+                        )
+
+                        combo_result = {
+                            "mp": mp,
+                            "total_points": total_points,
+                            "total_battery": total_battery,
+                            "total_coin": total_coin,
+                            "per_resource": per_resource,
+                            "raw_text": combo_text,
+                        }
+
+                except Exception as e:
+                    error = f"Error calculating combo donation: {e}"
+
+    # Stream the page (like the Masterpieces tab) so large result tables
+    # go out as they are generated instead of as one buffered string.
+    return Response(
+        stream_template_string(
+            page_template(SNIPE_TEMPLATE),
+            error=error,
+            rank_result=rank_result,
+            target_result=target_result,
+            combo_result=combo_result,
+            mp_choices=mp_choices,
+            selected_mp_id=selected_mp_id,
+            target_rank=target_rank,
+            my_points=my_points,
+            target_points_input=target_points_input,
+            combo_text=combo_text,
+            active_page="snipe",
+            has_uid=has_uid_flag(),
+        )
+    )
+
+
+# -------- Calculate tab (CSV-based) --------
+# FACTORIES_FROM_CSV is loaded once at import, so the token dropdown order
+# and the per-token level lists (sorted once in factories.py, plus their
+# JSON for the page script) are built once rather than on every request.
+# Use your global display order: MUD, CLAY, SAND, ... DYNAMITE, then any
+# other CSV tokens alphabetically.
+_CALC_FACTORIES = FACTORIES_FROM_CSV or {}
+CALC_TOKENS: List[str] = [t for t in FACTORY_DISPLAY_ORDER if t in _CALC_FACTORIES] + sorted(
+    set(_CALC_FACTORIES) - set(FACTORY_DISPLAY_ORDER)
+)
+CALC_FACTORY_LEVELS: Dict[str, Tuple[Any, ...]] = FACTORY_LEVELS_SORTED
+# Compact separators: this is inlined into the page script as-is.
+CALC_FACTORY_LEVELS_JSON = json.dumps(CALC_FACTORY_LEVELS, separators=(",", ":"))
+# static/calc.js is served with a long max-age; the content hash in its
+# URL makes browsers pick up a changed file straight away.
+with open(os.path.join(app.static_folder, "calc.js"), "rb") as _f:
+    CALC_JS_VERSION = hashlib.sha1(_f.read()).hexdigest()[:10]
+
+def _form_int(
+    s: Optional[str], default: Any, lo: Optional[int] = None, hi: Optional[int] = None
+) -> Any:
+    """
+    Parse an integer form field, or return `default` if it is missing or
+    isn't one. Digit strings (optionally signed / padded) are checked up
+    front instead of catching ValueError, and the result is clamped to
+    [lo, hi]. Plain digits skip the strip() entirely.
+    """
+    if not s:
+        return default
+    if not s.isdecimal():
+        s = s.strip()
+        digits = s[1:] if s[:1] in ("-", "+") else s
+        if not digits.isdecimal():
+            return default
+    v = int(s)
+    if lo is not None and v < lo:
+        v = lo
+    if hi is not None and v > hi:
+        v = hi
+    return v
+
+
+def _form_float(s: Optional[str], default: float) -> float:
+    """
+    Parse a float form field, or return `default` if it is missing or
+    blank/invalid (float() already tolerates surrounding whitespace).
+    """
+    if not s:
+        return default
+    try:
+        return float(s)
+    except ValueError:
+        return default
+
+
+# Calculate tab numeric form fields: (name, type, default, lo, hi).
+CALC_FORM_FIELDS: Tuple[Tuple[str, type, Any, Optional[int], Optional[int]], ...] = (
+    ("count", int, 1, 1, None),
+    ("yield_pct", float, 100.0, None, None),
+    ("speed_factor", float, 1.0, None, None),
+    ("workers", int, 0, 0, 4),
+    ("level", int, None, None, None),
+    ("target_level", int, None, None, None),
+)
 
-        try:
-            prices = fetch_live_prices_in_coin()
-            if not prices:
-                raise RuntimeError("No prices returned from fetch_live_prices_in_coin().")
 
-            if action == "calculate":
-                if not selected_level:
-                    lvl_keys = sorted(factories.get(selected_token, {}).keys())
-                    selected_level = lvl_keys[-1] if lvl_keys else None
+def parse_calc_form(form: Any) -> Dict[str, Any]:
+    """
+    All CALC_FORM_FIELDS parsed from `form` in one pass, keyed by name.
+    """
+    return {
+        name: (
+            _form_int(form.get(name), default, lo=lo, hi=hi)
+            if kind is int
+            else _form_float(form.get(name), default)
+        )
+        for name, kind, default, lo, hi in CALC_FORM_FIELDS
+    }
 
-                if not selected_level:
-                    raise RuntimeError(f"No recipe levels found for {selected_token}.")
 
-                calc_result = compute_factory_result_csv(
-                    factories,
-                    prices,
-                    selected_token,
-                    selected_level,
-                    target_level=target_level,
-                    count=count,
-                    yield_pct=yield_pct,
-                    speed_factor=speed_factor,
-                    workers=workers,
-                )
+# A single factory result only depends on its inputs and the price
+# snapshot, and the same combinations recur across requests while prices
+# are warm (Profitability, Resource and Calculate all recompute them).
+FACTORY_RESULT_TTL_SECONDS = 60.0
+_FACTORY_RESULT_CACHE = TTLCache(FACTORY_RESULT_TTL_SECONDS, max_entries=1024)
 
-            elif action == "best":
-                best_rows, combined_speed, worker_factor = compute_best_setups_csv(
-                    factories,
-                    prices,
-                    speed_factor=speed_factor,
-                    workers=workers,
-                    yield_pct=yield_pct,
-                    top_n=10,
-                )
-            else:
-                error = "Unknown action."
-        except Exception as e:
-            error = f"Error calculating: {e}"
 
-    # Levels for currently selected token
-    levels_for_selected = (
-        sorted(factories.get(selected_token, {}).keys())
-        if selected_token in factories
-        else []
+def cached_factory_result(
+    prices: Dict[str, float],
+    token: str,
+    level: int,
+    target_level: Optional[int] = None,
+    count: int = 1,
+    yield_pct: float = 100.0,
+    speed_factor: float = 1.0,
+    workers: int = 0,
+) -> Dict[str, Any]:
+    """
+    compute_factory_result_csv() over FACTORIES_FROM_CSV, memoized for
+    FACTORY_RESULT_TTL_SECONDS per (inputs, price snapshot). The result is
+    shared, so callers must copy it before mutating. Errors are not cached.
+    """
+    prices_key = _prices_cache_key(prices)
+    key = (token, level, target_level, count, yield_pct, speed_factor, workers, prices_key)
+    cached = _FACTORY_RESULT_CACHE.get(key) if prices_key is not None else None
+    if cached is not None:
+        return cached
+
+    cached = compute_factory_result_csv(
+        FACTORIES_FROM_CSV,
+        prices,
+        token,
+        level,
+        target_level=target_level,
+        count=count,
+        yield_pct=yield_pct,
+        speed_factor=speed_factor,
+        workers=workers,
     )
+    if prices_key is not None:
+        _FACTORY_RESULT_CACHE.set(key, cached)
+    return cached
 
-    if selected_level is None and levels_for_selected:
-        selected_level = levels_for_selected[-1]
 
-    target_levels = levels_for_selected
+# Best-setup rankings only change with prices (themselves cached for a
+# short TTL) and the speed / workers / yield knobs.
+BEST_SETUPS_TTL_SECONDS = 60.0
+_BEST_SETUPS_CACHE = TTLCache(BEST_SETUPS_TTL_SECONDS)
 
-    factory_levels = {tok: sorted(levels.keys()) for tok, levels in factories.items()}
-    factory_levels_json = json.dumps(factory_levels)
 
-    content = """
+def cached_best_setups_csv(
+    prices: Dict[str, float],
+    speed_factor: float,
+    workers: int,
+    yield_pct: float,
+    top_n: int,
+) -> Tuple[List[Dict[str, Any]], float, float]:
+    """
+    compute_best_setups_csv() over FACTORIES_FROM_CSV, memoized for
+    BEST_SETUPS_TTL_SECONDS per (knobs, top_n, price snapshot). The rows
+    are shared, so callers must not mutate them.
+    """
+    prices_key = _prices_cache_key(prices)
+    key = (speed_factor, workers, yield_pct, top_n, prices_key)
+    cached = _BEST_SETUPS_CACHE.get(key) if prices_key is not None else None
+    if cached is not None:
+        return cached
+
+    cached = compute_best_setups_csv(
+        FACTORIES_FROM_CSV,
+        prices,
+        speed_factor=speed_factor,
+        workers=workers,
+        yield_pct=yield_pct,
+        top_n=top_n,
+    )
+    if prices_key is not None:
+        _BEST_SETUPS_CACHE.set(key, cached)
+    return cached
+
+
+# ================= CALCULATE TAB TEMPLATE ==================
+CALCULATE_TEMPLATE = """
     <div class="card">
       <h1>Factory Calculator (CSV)</h1>
       <p class="subtle">
@@ -8797,11 +9198,11 @@ def calculate():
                 </tr>
               </thead>
               <tbody>
-              {% for tok, qty in calc_result.inputs.items() %}
+              {% for tok, qty_str, value_str in calc_result.input_rows %}
                 <tr>
                   <td>{{ tok }}</td>
-                  <td>{{ "%.6f"|format(qty) }}</td>
-                  <td>{{ "%.6f"|format(calc_result.inputs_value_coin[tok]) }}</td>
+                  <td>{{ qty_str }}</td>
+                  <td>{{ value_str }}</td>
                 </tr>
               {% endfor %}
               </tbody>
@@ -8858,12 +9259,12 @@ def calculate():
                 </tr>
               </thead>
               <tbody>
-              {% for step in calc_result.upgrade_chain %}
+              {% for tok, amount_str, coin_str, total_str in calc_result.upgrade_chain_rows %}
                 <tr>
-                  <td>{{ step.token }}</td>
-                  <td>{{ "%.6f"|format(step.amount_per_factory) }}</td>
-                  <td>{{ "%.6f"|format(step.coin_per_factory) }}</td>
-                  <td>{{ "%.6f"|format(step.coin_total) }}</td>
+                  <td>{{ tok }}</td>
+                  <td>{{ amount_str }}</td>
+                  <td>{{ coin_str }}</td>
+                  <td>{{ total_str }}</td>
                 </tr>
               {% endfor %}
               </tbody>
@@ -8895,235 +9296,300 @@ def calculate():
                 <td>L{{ r.level }}</td>
                 <td>
                   <span class="{{ 'pill' if good else 'pill-bad' }}">
-                    {{ "%+.6f"|format(r.profit_coin_per_hour) }}
+                    {{ r.profit_hr_str }}
                   </span>
                 </td>
-                <td>{{ "%+.6f"|format(r.profit_coin_per_craft) }}</td>
+                <td>{{ r.profit_craft_str }}</td>
               </tr>
             {% endfor %}
           </table>
         </div>
       {% endif %}
 
-      <script>
-        (function() {
-          const factoryLevels = {{ factory_levels_json | safe }};
-          const factorySelect = document.getElementById("factory");
-          const levelSelect = document.getElementById("level");
-          const targetSelect = document.getElementById("target_level");
-
-          function rebuildLevelOptions(token) {
-            const levels = factoryLevels[token] || [];
-            const currentLevel = levelSelect.value;
-            const currentTarget = targetSelect.value;
-
-            levelSelect.innerHTML = "";
-            const optAuto = document.createElement("option");
-            optAuto.value = "";
-            optAuto.textContent = "(auto)";
-            levelSelect.appendChild(optAuto);
-
-            targetSelect.innerHTML = "";
-            const optNone = document.createElement("option");
-            optNone.value = "";
-            optNone.textContent = "(none)";
-            targetSelect.appendChild(optNone);
-
-            levels.forEach((lvl) => {
-              const v = String(lvl);
-
-              const opt = document.createElement("option");
-              opt.value = v;
-              opt.textContent = "L" + v;
-              if (v === currentLevel) {
-                opt.selected = true;
-              }
-              levelSelect.appendChild(opt);
-
-              const opt2 = document.createElement("option");
-              opt2.value = v;
-              opt2.textContent = "L" + v;
-              if (v === currentTarget) {
-                opt2.selected = true;
-              }
-              targetSelect.appendChild(opt2);
-            });
-          }
-
-          if (factorySelect && levelSelect && targetSelect) {
-            factorySelect.addEventListener("change", function() {
-              rebuildLevelOptions(this.value);
-            });
-
-            rebuildLevelOptions(factorySelect.value);
-          }
-        })();
-      </script>
+      <script>window.__CW_FACTORY_LEVELS = {{ factory_levels_json | safe }};</script>
+      <script src="{{ url_for('static', filename='calc.js', v=calc_js_version) }}"></script>
     </div>
     """
+# ================= END CALCULATE TEMPLATE ==================
 
-    content = render_template_string(
-        content,
-        tokens=tokens,
-        selected_token=selected_token,
-        levels_for_selected=levels_for_selected,
-        target_levels=target_levels,
-        count=count,
-        yield_pct=yield_pct,
-        speed_factor=speed_factor,
-        workers=workers,
-        calc_result=calc_result,
-        best_rows=best_rows,
-        combined_speed=combined_speed,
-        worker_factor=worker_factor,
-        error=error,
-        factory_levels_json=factory_levels_json,
-    )
-
-    html = render_template_string(
-        BASE_TEMPLATE,
-        content=content,
-        active_page="calculate",
-        has_uid=has_uid_flag(),
-    )
-    return html
+@app.route("/calculate", methods=["GET", "POST"])
+def calculate():
+    error: Optional[str] = None
+    calc_result = None
+    best_rows: Optional[List[Any]] = None
+    combined_speed: Optional[float] = None
+    worker_factor: Optional[float] = None
 
-# -------- Trees tab (Earth / Water / Fire / Special) --------
+    tokens = CALC_TOKENS
 
-@app.route("/trees", methods=["GET"])
-def trees():
-    """
-    Tree-style overview similar to Craftworld.tips:
-    - Earth / Water / Fire / Special
-    - Each row uses a single level 1 factory
-      with 100% yield, 1x speed, 0 workers.
-    """
-    error = None
-    trees_data = []
-    prices = {}
-    coin_usd = 0.0
+    selected_token = tokens[0] if tokens else ""
+    selected_level = None
+    target_level = None
+    count = 1
+    yield_pct = 100.0
+    speed_factor = 1.0
+    workers = 0
+    action = "calculate"
 
-    try:
-        prices = fetch_live_prices_in_coin()
-        coin_usd = float(prices.get("_COIN_USD", 0.0))
-    except Exception as e:
-        error = f"Error fetching prices: {e}"
+    if request.method == "POST":
+        action = request.form.get("action", "calculate")
+        selected_token = request.form.get("factory", selected_token).strip().upper()
+        vals = parse_calc_form(request.form)
+        count = vals["count"]
+        yield_pct = vals["yield_pct"]
+        speed_factor = vals["speed_factor"]
+        workers = vals["workers"]
+        selected_level = vals["level"]
+        target_level = vals["target_level"]
 
-    # You can tweak this mapping any time – tiers, order, tokens, labels.
-    TREE_LAYOUT = {
-        "Earth": [
-            {"tier": 1, "token": "EARTH",      "label": "Earth Mine"},
-            {"tier": 2, "token": "MUD",        "label": "Mud"},
-            {"tier": 3, "token": "CLAY",       "label": "Clay"},
-            {"tier": 4, "token": "SAND",       "label": "Sand"},
-            {"tier": 5, "token": "COPPER",     "label": "Copper"},
-            {"tier": 6, "token": "STEEL",      "label": "Steel"},
-            {"tier": 7, "token": "SCREWS",     "label": "Screws"},
-        ],
-        "Water": [
-            {"tier": 1, "token": "WATER",      "label": "Water Mine"},
-            {"tier": 2, "token": "SEAWATER",   "label": "Seawater"},
-            {"tier": 3, "token": "ALGAE",      "label": "Algae"},
-            {"tier": 4, "token": "OXYGEN",     "label": "Oxygen"},
-            {"tier": 5, "token": "GAS",        "label": "Gas"},
-        ],
-        "Fire": [
-            {"tier": 1, "token": "FIRE",       "label": "Fire Mine"},
-            {"tier": 2, "token": "HEAT",       "label": "Heat"},
-            {"tier": 3, "token": "LAVA",       "label": "Lava"},
-            {"tier": 4, "token": "FUEL",       "label": "Fuel"},
-            {"tier": 5, "token": "OIL",        "label": "Oil"},
-            {"tier": 6, "token": "SULFUR",     "label": "Sulfur"},
-            {"tier": 7, "token": "ACID",       "label": "Acid"},
-        ],
-        "Special": [
-            {"tier": 1, "token": "PLASTICS",   "label": "Plastics"},
-            {"tier": 2, "token": "FIBERGLASS", "label": "Fiberglass"},
-            {"tier": 3, "token": "ENERGY",     "label": "Energy"},
-            {"tier": 4, "token": "HYDROGEN",   "label": "Hydrogen"},
-            {"tier": 5, "token": "DYNAMITE",   "label": "Dynamite"},
-        ],
-    }
+        try:
+            # ?refresh=1 bypasses the short price cache
+            prices = fetch_live_prices_in_coin(
+                force_refresh=request.args.get("refresh") == "1"
+            )
+            if not prices:
+                raise RuntimeError("No prices returned from fetch_live_prices_in_coin().")
 
-    # Build data for each tree
-    for tree_name, tiers in TREE_LAYOUT.items():
-        rows = []
-        total_volume_hour = 0.0
-        total_profit_hour = 0.0
-        best = None
-        worst = None
+            if action == "calculate":
+                if not selected_level:
+                    lvl_keys = CALC_FACTORY_LEVELS.get(selected_token) or ()
+                    selected_level = lvl_keys[-1] if lvl_keys else None
 
-        for node in tiers:
-            token = node["token"]
-            tier = node["tier"]
-            label = node["label"]
+                if not selected_level:
+                    raise RuntimeError(f"No recipe levels found for {selected_token}.")
 
-            price_coin = float(prices.get(token, 0.0)) if prices else 0.0
-            price_usd = price_coin * coin_usd if coin_usd else 0.0
+                # Copied: the rows below are added to the result.
+                calc_result = dict(cached_factory_result(
+                    prices,
+                    selected_token,
+                    selected_level,
+                    target_level=target_level,
+                    count=count,
+                    yield_pct=yield_pct,
+                    speed_factor=speed_factor,
+                    workers=workers,
+                ))
 
-            duration_min = None
-            volume_hour = None
-            profit_hour = None
+            elif action == "best":
+                best_rows, combined_speed, worker_factor = cached_best_setups_csv(
+                    prices,
+                    speed_factor=speed_factor,
+                    workers=workers,
+                    yield_pct=yield_pct,
+                    top_n=10,
+                )
+            else:
+                error = "Unknown action."
+        except Exception as e:
+            error = f"Error calculating: {e}"
 
-            try:
-                # Only calculate if this token exists as a factory in the CSV at L1
-                if FACTORIES_FROM_CSV.get(token) and 1 in FACTORIES_FROM_CSV[token]:
-                    res = compute_factory_result_csv(
-                        FACTORIES_FROM_CSV,
-                        prices or {},
-                        token,
-                        level=1,
-                        target_level=None,
-                        count=1,
-                        yield_pct=100.0,
-                        speed_factor=1.0,
-                        workers=0,
-                    )
-                    duration_min = float(res.get("duration_min", 0.0))
-                    crafts_per_hour = float(res.get("crafts_per_hour", 0.0))
-                    out_amount = float(res.get("out_amount", 0.0))
-                    volume_hour = crafts_per_hour * out_amount
-                    profit_hour = float(res.get("profit_coin_per_hour", 0.0))
-            except Exception as ex:
-                # Don't explode the whole page if one token is weird
-                if not error:
-                    error = f"Some tree rows could not be calculated: {ex}"
+    # Levels for currently selected token
+    levels_for_selected = CALC_FACTORY_LEVELS.get(selected_token, ())
 
-            if profit_hour is not None:
-                total_profit_hour += profit_hour
-                if best is None or profit_hour > best["profit_hour"]:
-                    best = {"token": token, "profit_hour": profit_hour}
-                if worst is None or profit_hour < worst["profit_hour"]:
-                    worst = {"token": token, "profit_hour": profit_hour}
+    if selected_level is None and levels_for_selected:
+        selected_level = levels_for_selected[-1]
 
-            if volume_hour is not None:
-                total_volume_hour += volume_hour
+    target_levels = levels_for_selected
 
-            rows.append(
-                {
-                    "tier": tier,
-                    "label": label,
-                    "token": token,
-                    "price_coin": price_coin,
-                    "price_usd": price_usd,
-                    "duration_min": duration_min,
-                    "volume_hour": volume_hour,
-                    "profit_hour": profit_hour,
-                }
+    # Pre-format the table cells once here rather than through a Jinja
+    # format filter call per cell (best_rows come from a shared cache, so
+    # they are copied, not mutated).
+    if calc_result:
+        values = calc_result["inputs_value_coin"]
+        calc_result["input_rows"] = [
+            (tok, f"{qty:.6f}", f"{values[tok]:.6f}")
+            for tok, qty in calc_result["inputs"].items()
+        ]
+        calc_result["upgrade_chain_rows"] = [
+            (
+                step["token"],
+                f"{step['amount_per_factory']:.6f}",
+                f"{step['coin_per_factory']:.6f}",
+                f"{step['coin_total']:.6f}",
             )
-
-        trees_data.append(
+            for step in calc_result["upgrade_chain"]
+        ]
+    if best_rows:
+        best_rows = [
             {
-                "name": tree_name,
-                "rows": rows,
-                "total_volume_hour": total_volume_hour,
-                "total_profit_hour": total_profit_hour,
-                "best": best,
-                "worst": worst,
+                **r,
+                "profit_hr_str": f"{r['profit_coin_per_hour']:+.6f}",
+                "profit_craft_str": f"{r['profit_coin_per_craft']:+.6f}",
             }
+            for r in best_rows
+        ]
+
+    # Stream the page (like the Masterpieces tab) so large result tables
+    # go out as they are generated instead of as one buffered string.
+    return Response(
+        stream_template_string(
+            page_template(CALCULATE_TEMPLATE),
+            tokens=tokens,
+            selected_token=selected_token,
+            levels_for_selected=levels_for_selected,
+            target_levels=target_levels,
+            count=count,
+            yield_pct=yield_pct,
+            speed_factor=speed_factor,
+            workers=workers,
+            calc_result=calc_result,
+            best_rows=best_rows,
+            combined_speed=combined_speed,
+            worker_factor=worker_factor,
+            error=error,
+            factory_levels_json=CALC_FACTORY_LEVELS_JSON,
+            calc_js_version=CALC_JS_VERSION,
+            active_page="calculate",
+            has_uid=has_uid_flag(),
+        )
+    )
+
+# -------- Trees tab (Earth / Water / Fire / Special) --------
+
+# You can tweak this mapping any time – tiers, order, tokens, labels.
+TREE_LAYOUT: Dict[str, List[Dict[str, Any]]] = {
+    "Earth": [
+        {"tier": 1, "token": "EARTH",      "label": "Earth Mine"},
+        {"tier": 2, "token": "MUD",        "label": "Mud"},
+        {"tier": 3, "token": "CLAY",       "label": "Clay"},
+        {"tier": 4, "token": "SAND",       "label": "Sand"},
+        {"tier": 5, "token": "COPPER",     "label": "Copper"},
+        {"tier": 6, "token": "STEEL",      "label": "Steel"},
+        {"tier": 7, "token": "SCREWS",     "label": "Screws"},
+    ],
+    "Water": [
+        {"tier": 1, "token": "WATER",      "label": "Water Mine"},
+        {"tier": 2, "token": "SEAWATER",   "label": "Seawater"},
+        {"tier": 3, "token": "ALGAE",      "label": "Algae"},
+        {"tier": 4, "token": "OXYGEN",     "label": "Oxygen"},
+        {"tier": 5, "token": "GAS",        "label": "Gas"},
+    ],
+    "Fire": [
+        {"tier": 1, "token": "FIRE",       "label": "Fire Mine"},
+        {"tier": 2, "token": "HEAT",       "label": "Heat"},
+        {"tier": 3, "token": "LAVA",       "label": "Lava"},
+        {"tier": 4, "token": "FUEL",       "label": "Fuel"},
+        {"tier": 5, "token": "OIL",        "label": "Oil"},
+        {"tier": 6, "token": "SULFUR",     "label": "Sulfur"},
+        {"tier": 7, "token": "ACID",       "label": "Acid"},
+    ],
+    "Special": [
+        {"tier": 1, "token": "PLASTICS",   "label": "Plastics"},
+        {"tier": 2, "token": "FIBERGLASS", "label": "Fiberglass"},
+        {"tier": 3, "token": "ENERGY",     "label": "Energy"},
+        {"tier": 4, "token": "HYDROGEN",   "label": "Hydrogen"},
+        {"tier": 5, "token": "DYNAMITE",   "label": "Dynamite"},
+    ],
+}
+
+
+def _tree_link_text(token: str, label: str) -> Markup:
+    """Escaped row link text: the label, plus (TOKEN) when it differs."""
+    return escape(label) if token == label else escape(f"{label} ({token})")
+
+
+# TREE_LAYOUT flattened once at import: tree name -> (tier, token, label,
+# link_text, has_l1) per row, where has_l1 says the CSV has a level 1
+# recipe for it. Token / label / link text are escaped here once (Markup),
+# so rendering them skips autoescaping.
+TREE_NODES: Dict[str, Tuple[Tuple[int, Markup, Markup, Markup, bool], ...]] = {
+    name: tuple(
+        (
+            node["tier"],
+            escape(node["token"]),
+            escape(node["label"]),
+            _tree_link_text(node["token"], node["label"]),
+            1 in FACTORIES_FROM_CSV.get(node["token"], {}),
         )
+        for node in tiers
+    )
+    for name, tiers in TREE_LAYOUT.items()
+}
 
-    content = """
+# Every tree row is a level 1 factory at 100% yield, 1x speed and 0 workers,
+# so its result only depends on the price snapshot (itself cached for a
+# short TTL). Results for all tree tokens are computed once per snapshot.
+TREE_RESULTS_TTL_SECONDS = 60.0
+_TREE_RESULTS_CACHE = TTLCache(TREE_RESULTS_TTL_SECONDS)
+
+
+def cached_tree_results(prices: Dict[str, float]) -> Dict[str, Any]:
+    """
+    token -> compute_factory_result_csv() result for the tree rows (only
+    tokens with a level 1 recipe in the CSV). A token whose calculation
+    failed maps to the exception instead, so the page can report it.
+    """
+    key = _prices_cache_key(prices)
+    cached = _TREE_RESULTS_CACHE.get(key) if key is not None else None
+    if cached is not None:
+        return cached
+
+    results: Dict[str, Any] = {}
+    for nodes in TREE_NODES.values():
+        for _tier, token, _label, _link_text, has_l1 in nodes:
+            if not has_l1 or token in results:
+                continue
+            try:
+                results[token] = compute_factory_result_csv(
+                    FACTORIES_FROM_CSV,
+                    prices,
+                    token,
+                    level=1,
+                    target_level=None,
+                    count=1,
+                    yield_pct=100.0,
+                    speed_factor=1.0,
+                    workers=0,
+                )
+            except Exception as ex:
+                results[token] = ex
+
+    if key is not None:
+        _TREE_RESULTS_CACHE.set(key, results)
+    return results
+
+
+@dataclass(slots=True)
+class TreeRow:
+    """One tier row on the Trees tab (None where no L1 result exists)."""
+
+    tier: int
+    label: str
+    token: str
+    link_text: Markup
+    price_coin: float
+    price_usd: float
+    duration_min: Optional[float]
+    volume_hour: Optional[float]
+    profit_hour: Optional[float]
+    # Display strings, formatted once in the view rather than per cell by
+    # a Jinja format filter (None where the number is None).
+    price_coin_s: str
+    price_usd_s: str
+    duration_s: Optional[str]
+    volume_s: Optional[str]
+    profit_s: Optional[str]
+
+
+_tree_row_profit = attrgetter("profit_hour")
+
+
+@dataclass(slots=True)
+class TreeSummary:
+    """A whole tree: its rows, totals, and best / worst row by profit."""
+
+    name: str
+    rows: List[TreeRow]
+    total_volume_hour: float
+    total_profit_hour: float
+    best: Optional[TreeRow]
+    worst: Optional[TreeRow]
+    total_volume_s: str
+    total_profit_s: str
+
+
+# ================= TREES TAB TEMPLATE ==================
+TREES_TEMPLATE = """
     <div class="card">
       <h1>Production Trees</h1>
       <p class="subtle">
@@ -9140,13 +9606,13 @@ def trees():
         <div class="card">
           <h2>{{ tree.name }} Tree</h2>
           <p class="subtle">
-            Total output/hr (L1, 1 each): {{ "%.4f"|format(tree.total_volume_hour or 0.0) }}<br>
-            Total profit/hr: {{ "%+.6f"|format(tree.total_profit_hour or 0.0) }} COIN
+            Total output/hr (L1, 1 each): {{ tree.total_volume_s }}<br>
+            Total profit/hr: {{ tree.total_profit_s }} COIN
             {% if tree.best %}
-              <br>Best: {{ tree.best.token }} ({{ "%+.6f"|format(tree.best.profit_hour) }} COIN/hr)
+              <br>Best: {{ tree.best.token }} ({{ tree.best.profit_s }} COIN/hr)
             {% endif %}
             {% if tree.worst %}
-              <br>Worst: {{ tree.worst.token }} ({{ "%+.6f"|format(tree.worst.profit_hour) }} COIN/hr)
+              <br>Worst: {{ tree.worst.token }} ({{ tree.worst.profit_s }} COIN/hr)
             {% endif %}
           </p>
 
@@ -9166,21 +9632,21 @@ def trees():
                   <td>T{{ r.tier }}</td>
                 <td>
                   <a href="{{ url_for('resource_view', token=r.token) }}">
-                    {{ r.label }}{% if r.token != r.label %} ({{ r.token }}){% endif %}
+                    {{ r.link_text }}
                   </a>
                 </td>
-                  <td>{{ "%.6f"|format(r.price_coin or 0.0) }}</td>
-                  <td>{{ "%.4f"|format(r.price_usd or 0.0) }}</td>
+                  <td>{{ r.price_coin_s }}</td>
+                  <td>{{ r.price_usd_s }}</td>
                   <td>
-                    {% if r.duration_min is not none %}
-                      {{ "%.2f"|format(r.duration_min) }}
+                    {% if r.duration_s is not none %}
+                      {{ r.duration_s }}
                     {% else %}
                       &mdash;
                     {% endif %}
                   </td>
                   <td>
-                    {% if r.volume_hour is not none %}
-                      {{ "%.4f"|format(r.volume_hour) }}
+                    {% if r.volume_s is not none %}
+                      {{ r.volume_s }}
                     {% else %}
                       &mdash;
                     {% endif %}
@@ -9188,7 +9654,7 @@ def trees():
                   <td>
                     {% if r.profit_hour is not none %}
                       <span class="{{ 'pill' if r.profit_hour >= 0 else 'pill-bad' }}">
-                        {{ "%+.6f"|format(r.profit_hour) }}
+                        {{ r.profit_s }}
                       </span>
                     {% else %}
                       &mdash;
@@ -9202,18 +9668,125 @@ def trees():
       {% endfor %}
     </div>
     """
+# ================= END TREES TEMPLATE ==================
+
+
+@app.route("/trees", methods=["GET"])
+def trees():
+    """
+    Tree-style overview similar to Craftworld.tips:
+    - Earth / Water / Fire / Special
+    - Each row uses a single level 1 factory
+      with 100% yield, 1x speed, 0 workers.
+    """
+    error = None
+    trees_data = []
+    prices = {}
+    coin_usd = 0.0
+
+    try:
+        prices = fetch_live_prices_in_coin()
+        coin_usd = float(prices.get("_COIN_USD", 0.0))
+    except Exception as e:
+        error = f"Error fetching prices: {e}"
+
+    tree_results = cached_tree_results(prices or {})
+
+    # Build data for each tree
+    for tree_name, nodes in TREE_NODES.items():
+        rows: List[TreeRow] = []
+
+        # Price columns for the whole tree in one pass each
+        if prices:
+            price_col = [float(prices.get(node[1], 0.0)) for node in nodes]
+        else:
+            price_col = [0.0] * len(nodes)
+        if coin_usd:
+            usd_col = [p * coin_usd for p in price_col]
+        else:
+            usd_col = [0.0] * len(nodes)
+
+        for (tier, token, label, link_text, has_l1), price_coin, price_usd in zip(
+            nodes, price_col, usd_col
+        ):
+            duration_min = None
+            volume_hour = None
+            profit_hour = None
+
+            # Only tokens that exist as a factory in the CSV at L1 have a result
+            if has_l1:
+                try:
+                    res = tree_results[token]
+                    if isinstance(res, Exception):
+                        # cached instance: don't pile this request's frames onto it
+                        raise res.with_traceback(None)
+                    duration_min = float(res.get("duration_min", 0.0))
+                    crafts_per_hour = float(res.get("crafts_per_hour", 0.0))
+                    out_amount = float(res.get("out_amount", 0.0))
+                    volume_hour = crafts_per_hour * out_amount
+                    profit_hour = float(res.get("profit_coin_per_hour", 0.0))
+                except Exception as ex:
+                    # Don't explode the whole page if one token is weird
+                    if not error:
+                        error = f"Some tree rows could not be calculated: {ex}"
+
+            rows.append(
+                TreeRow(
+                    tier,
+                    label,
+                    token,
+                    link_text,
+                    price_coin,
+                    price_usd,
+                    duration_min,
+                    volume_hour,
+                    profit_hour,
+                    f"{price_coin or 0.0:.6f}",
+                    f"{price_usd or 0.0:.4f}",
+                    None if duration_min is None else f"{duration_min:.2f}",
+                    None if volume_hour is None else f"{volume_hour:.4f}",
+                    None if profit_hour is None else f"{profit_hour:+.6f}",
+                )
+            )
+
+        # Totals and best / worst over the rows that have a result
+        # (max / min keep the first row on ties, like the old running check)
+        profit_rows = [r for r in rows if r.profit_hour is not None]
+        best = max(profit_rows, key=_tree_row_profit, default=None)
+        worst = min(profit_rows, key=_tree_row_profit, default=None)
+        total_profit_hour = sum((r.profit_hour for r in profit_rows), 0.0)
+        total_volume_hour = sum(
+            (r.volume_hour for r in rows if r.volume_hour is not None), 0.0
+        )
+
+        trees_data.append(
+            TreeSummary(
+                tree_name,
+                rows,
+                total_volume_hour,
+                total_profit_hour,
+                best,
+                worst,
+                f"{total_volume_hour or 0.0:.4f}",
+                f"{total_profit_hour or 0.0:+.6f}",
+            )
+        )
 
     html = render_template_string(
-        BASE_TEMPLATE,
-        content=render_template_string(
-            content,
-            trees=trees_data,
-            error=error,
-        ),
+        page_template(TREES_TEMPLATE),
+        trees=trees_data,
+        error=error,
         active_page="trees",
         has_uid=has_uid_flag(),
     )
-    return html
+    # Tree numbers only move with the cached prices, so let the browser
+    # reuse the page briefly (private: the nav bar is per user). The ETag
+    # lets a revalidation get a bodyless 304 while the page is unchanged;
+    # it's weak because the gzip hook may re-encode the body.
+    resp = Response(html)
+    resp.headers["Cache-Control"] = "private, max-age=30"
+    resp.add_etag(weak=True)
+    return resp.make_conditional(request)
 
 
 
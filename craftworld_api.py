@@ -1,16 +1,53 @@
 import os
-import json
-from typing import Any, Dict, List, Optional
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ttl_cache import TTLCache
 
 GRAPHQL_URL = "https://craft-world.gg/graphql"
 
+# One pooled session for every GraphQL call, so back-to-back queries (and
+# the parallel predictReward fan-out in the app) reuse open TLS connections
+# instead of handshaking each time. Everything sent here is a read-only
+# query, so POSTs are safe to retry on gateway errors.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+# The JWT and the request headers built from it are read once per process
+# and reused; an HTTP 401/403 clears them so the next call re-reads the env.
+_JWT: Optional[str] = None
+_JWT_FINGERPRINT: Optional[str] = None
+_HEADERS: Optional[Dict[str, str]] = None
+
 
 def get_jwt() -> str:
     """
-    Read CRAFTWORLD_JWT from the environment.
+    Read CRAFTWORLD_JWT from the environment (cached after the first read).
     """
+    global _JWT
+    if _JWT is not None:
+        return _JWT
     token = os.environ.get("CRAFTWORLD_JWT")
     if not token:
         raise RuntimeError(
@@ -24,95 +61,206 @@ def get_jwt() -> str:
             "  bash:\n"
             '    export CRAFTWORLD_JWT="<your-jwt-token>"\n'
         )
+    _JWT = token
     return token
 
 
+def _graphql_headers() -> Dict[str, str]:
+    """Shared request headers for call_graphql (do not mutate)."""
+    global _HEADERS
+    if _HEADERS is None:
+        _HEADERS = {
+            "Authorization": f"Bearer {get_jwt()}",
+            "Content-Type": "application/json",
+            # IMPORTANT: must be >= minAppVersion from server (currently 1.5.6)
+            "x-app-version": "1.5.9",
+        }
+    return _HEADERS
+
+
+def _jwt_fingerprint() -> str:
+    """Short hash of the JWT, for cache keys (never key on the token)."""
+    global _JWT_FINGERPRINT
+    if _JWT_FINGERPRINT is None:
+        _JWT_FINGERPRINT = hashlib.sha1(get_jwt().encode("utf-8")).hexdigest()[:16]
+    return _JWT_FINGERPRINT
+
+
+def _reset_auth_cache() -> None:
+    """Forget the cached JWT / headers (after the server rejects them)."""
+    global _JWT, _JWT_FINGERPRINT, _HEADERS
+    _JWT = None
+    _JWT_FINGERPRINT = None
+    _HEADERS = None
+
+
+def _pretty_json(obj: Any) -> str:
+    """Indented JSON for error messages."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+
+
+_GQL_SPACE_RE = re.compile(r"\s+")
+_GQL_PUNCT_SPACE_RE = re.compile(r" ?([{}():,]) ?")
+
+
+@lru_cache(maxsize=64)
+def _minify_gql(query: str) -> str:
+    """
+    Query text with insignificant whitespace removed (memoized per query).
+    Safe because none of our queries has whitespace inside a string literal.
+    """
+    return _GQL_PUNCT_SPACE_RE.sub(r"\1", _GQL_SPACE_RE.sub(" ", query)).strip()
+
+
+class GraphQLNetworkError(RuntimeError):
+    """call_graphql() could not reach Craft World (connection / timeout)."""
+
+
 def call_graphql(query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Low-level helper to call Craft World's GraphQL API with the JWT.
-    Returns the `data` field or raises RuntimeError on errors.
+    Returns the `data` field or raises RuntimeError on errors
+    (GraphQLNetworkError if the request never got a response).
     """
-    headers = {
-        "Authorization": f"Bearer {get_jwt()}",
-        "Content-Type": "application/json",
-        # IMPORTANT: must be >= minAppVersion from server (currently 1.5.6)
-        "x-app-version": "1.5.9",
-    }
+    headers = _graphql_headers()
 
-    payload: Dict[str, Any] = {"query": query}
+    payload: Dict[str, Any] = {"query": _minify_gql(query)}
     if variables is not None:
         payload["variables"] = variables
 
     try:
-        resp = requests.post(GRAPHQL_URL, json=payload, headers=headers, timeout=20)
+        # orjson for the body both ways: leaderboards / fetchCraftWorld
+        # responses are large. The body is read from urllib3 in one call
+        # rather than through resp.content's chunked read-and-join.
+        resp = _SESSION.post(
+            GRAPHQL_URL,
+            data=orjson.dumps(payload),
+            headers=headers,
+            timeout=20,
+            stream=True,
+        )
+        try:
+            body = resp.raw.read(decode_content=True)
+        finally:
+            resp.close()
+    except Exception as e:
+        raise GraphQLNetworkError(f"Network error calling Craft World GraphQL: {e}") from e
+
+    try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError as e_http:
-        # Try to include JSON error details if present
+        if resp.status_code in (401, 403):
+            _reset_auth_cache()
+        # Include JSON error details if present
         try:
-            err_json = resp.json()
-            raise RuntimeError(
-                f"HTTP {resp.status_code} from Craft World: {e_http}\n"
-                f"Response: {json.dumps(err_json, indent=2)}"
-            ) from e_http
+            detail = "Response: " + _pretty_json(orjson.loads(body))
         except Exception:
-            raise RuntimeError(
-                f"HTTP {resp.status_code} from Craft World: {e_http}\n"
-                f"Raw response: {resp.text}"
-            ) from e_http
-    except Exception as e:
-        raise RuntimeError(f"Network error calling Craft World GraphQL: {e}") from e
+            detail = "Raw response: " + body.decode("utf-8", "replace")
+        raise RuntimeError(
+            f"HTTP {resp.status_code} from Craft World: {e_http}\n{detail}"
+        ) from e_http
 
     try:
-        data = resp.json()
+        data = orjson.loads(body)
     except Exception as e_json:
-        raise RuntimeError(f"Invalid JSON from Craft World: {e_json}\nResponse: {resp.text}") from e_json
+        raise RuntimeError(
+            f"Invalid JSON from Craft World: {e_json}\n"
+            f"Response: {body.decode('utf-8', 'replace')}"
+        ) from e_json
 
     if "errors" in data and data["errors"]:
-        raise RuntimeError(f"GraphQL errors: {json.dumps(data['errors'], indent=2)}")
+        raise RuntimeError(f"GraphQL errors: {_pretty_json(data['errors'])}")
 
     if "data" not in data:
-        raise RuntimeError(f"GraphQL response missing 'data': {json.dumps(data, indent=2)}")
+        raise RuntimeError(f"GraphQL response missing 'data': {_pretty_json(data)}")
 
     return data["data"]
 
 
-def fetch_proficiencies() -> dict[str, dict]:
+# Account proficiencies / workshop levels change slowly, so they are reused
+# for a short TTL per account (keyed by a hash of the JWT, never the token).
+# Both come from one `account { ... }` query, so a page that needs both
+# makes a single round-trip.
+ACCOUNT_TTL_SECONDS = 30.0
+_ACCOUNT_CACHE = TTLCache(ACCOUNT_TTL_SECONDS)
+
+
+def _account_cache_key(name: str) -> tuple:
+    return (name, _jwt_fingerprint())
+
+
+def fetch_account_bundle() -> Tuple[Dict[str, dict], Dict[str, int]]:
     """
-    Fetch account proficiencies (mastery) for all symbols.
+    Fetch account proficiencies and workshop levels in one GraphQL call,
+    reused for ACCOUNT_TTL_SECONDS per JWT.
 
-    Returns a dict shaped like:
-      {
-        "MUD": {"collectedAmount": 15688752, "claimedLevel": 10},
-        "GLASS": {"collectedAmount": 165, "claimedLevel": 3},
-        ...
-      }
+    Returns (proficiencies, workshop_levels) in the shapes documented on
+    fetch_proficiencies() and fetch_workshop_levels().
     """
+    key = _account_cache_key("bundle")
+    cached = _ACCOUNT_CACHE.get(key)
+    if cached is not None:
+        profs, ws_levels = cached
+        return dict(profs), dict(ws_levels)
+
+    profs, ws_levels = _fetch_account_bundle_uncached()
+    _ACCOUNT_CACHE.set(key, (dict(profs), dict(ws_levels)))
+    return profs, ws_levels
+
+
+def _fetch_account_bundle_uncached() -> Tuple[Dict[str, dict], Dict[str, int]]:
+    """AccountBundle query: proficiencies + workshop (no cache)."""
     query = """
-    query AccountProficiencies {
+    query AccountBundle {
       account {
         proficiencies {
           symbol
           collectedAmount
           claimedLevel
         }
+        workshop {
+          symbol
+          level
+        }
       }
     }
     """
 
     data = call_graphql(query, None)
     account = data.get("account") or {}
-    profs = account.get("proficiencies") or []
 
-    result: dict[str, dict] = {}
-    for p in profs:
-        symbol = (p.get("symbol") or "").upper()
-        if not symbol:
-            continue
-        result[symbol] = {
-            "collectedAmount": float(p.get("collectedAmount") or 0),
-            "claimedLevel": int(p.get("claimedLevel") or 0),
+    # Every selected field is always present in the response (possibly
+    # null), so rows are indexed directly instead of via .get().
+    profs: Dict[str, dict] = {
+        p["symbol"].upper(): {
+            "collectedAmount": float(p["collectedAmount"] or 0),
+            "claimedLevel": int(p["claimedLevel"] or 0),
         }
-    return result
+        for p in account.get("proficiencies") or []
+        if p["symbol"]
+    }
+    ws_levels: Dict[str, int] = {
+        w["symbol"].upper(): int(w["level"] or 0)
+        for w in account.get("workshop") or []
+        if w["symbol"]
+    }
+
+    return profs, ws_levels
+
+
+def fetch_proficiencies() -> dict[str, dict]:
+    """
+    Fetch account proficiencies (mastery) for all symbols
+    (via the cached fetch_account_bundle()).
+
+    Returns a dict shaped like:
+      {
+        "MUD": {"collectedAmount": 15688752, "claimedLevel": 10},
+        "GLASS": {"collectedAmount": 165, "claimedLevel": 3},
+        ...
+      }
+    """
+    return fetch_account_bundle()[0]
 
 
 def fetch_profile_by_uid(uid: str) -> Dict[str, Any]:
@@ -169,7 +317,8 @@ def fetch_available_avatars() -> List[Dict[str, Any]]:
 
 def fetch_workshop_levels() -> dict[str, int]:
     """
-    Fetch workshop levels for all workshop-enabled resources.
+    Fetch workshop levels for all workshop-enabled resources
+    (via the cached fetch_account_bundle()).
 
     Returns a dict like:
       {
@@ -179,43 +328,7 @@ def fetch_workshop_levels() -> dict[str, int]:
         ...
       }
     """
-    query = """
-    query AccountWorkshop {
-      account {
-        workshop {
-          symbol
-          level
-        }
-      }
-    }
-    """
-
-    data = call_graphql(query, None)
-    account = data.get("account") or {}
-    ws_list = account.get("workshop") or []
-
-    result: dict[str, int] = {}
-    for w in ws_list:
-        symbol = (w.get("symbol") or "").upper()
-        if not symbol:
-            continue
-        level = int(w.get("level") or 0)
-        result[symbol] = level
-    return result
-
-
-    data = call_graphql(query, None)
-    account = data.get("account") or {}
-    ws_list = account.get("workshop") or []
-
-    result: dict[str, int] = {}
-    for w in ws_list:
-        symbol = (w.get("symbol") or "").upper()
-        if not symbol:
-            continue
-        level = int(w.get("level") or 0)
-        result[symbol] = level
-    return result
+    return fetch_account_bundle()[1]
 
 
 def fetch_craftworld(uid: str) -> Dict[str, Any]:
@@ -275,25 +388,15 @@ def fetch_masterpieces() -> list[dict]:
     """
 
     data = call_graphql(query)
-    masterpieces = data.get("masterpieces") or []
-
-    all_masterpieces: list[dict] = []
-    for mp in masterpieces:
-        all_masterpieces.append(
-            {
-                "id": int(mp.get("id") or 0),
-                "name": mp.get("name"),
-                "type": mp.get("type"),
-                "eventId": mp.get("eventId"),
-                "collectedPoints": mp.get("collectedPoints"),
-                "requiredPoints": mp.get("requiredPoints"),
-                "addressableLabel": mp.get("addressableLabel"),
-                "startedAt": mp.get("startedAt"),
-            }
-        )
+    all_masterpieces: list[dict] = data.get("masterpieces") or []
+
+    # GraphQL returns exactly the selected fields (possibly null), so the
+    # decoded rows are used as-is; only the ID needs converting.
+    for mp in all_masterpieces:
+        mp["id"] = int(mp["id"] or 0)
 
     # Sort newest first by startedAt
-    all_masterpieces.sort(key=lambda m: m.get("startedAt") or "", reverse=True)
+    all_masterpieces.sort(key=lambda m: m["startedAt"] or "", reverse=True)
     return all_masterpieces
 
 
@@ -323,35 +426,11 @@ def fetch_masterpiece_details(masterpiece_id: int | str) -> dict:
 
 
 
-MASTERPIECE_DETAILS_QUERY = """
-    query Masterpiece($id: ID) {
-        masterpiece(id: $id) {
-            id
-            name
-            type
-            eventId
-            collectedPoints
-            requiredPoints
-            addressableLabel
-            resources {
-                symbol
-                amount
-                target
-                consumedPowerPerUnit
-            }
-            leaderboard {
-                position
-                masterpiecePoints
-                profile {
-                    uid
-                    walletAddress
-                    avatarUrl
-                    displayName
-                }
-            }
-            rewardStages {
-                requiredMasterpiecePoints
-                rewards {
+# Selection for one reward (a union of Resource / Avatar / Badge / ...),
+# shared by stage, battle pass and leaderboard rewards. It is spliced in
+# as text because a named GraphQL fragment would have to name the union's
+# schema type, which this client does not know.
+_REWARD_SELECTION = """\
                     __typename
                     ... on Resource {
                         symbol
@@ -379,68 +458,52 @@ MASTERPIECE_DETAILS_QUERY = """
                         buildingType
                         buildingSubType
                     }
+"""
+
+# Selection set for one masterpiece, shared by the single-id query and
+# the aliased batch query in fetch_masterpiece_details_many().
+MASTERPIECE_DETAILS_FIELDS = (
+    """
+            id
+            name
+            type
+            eventId
+            collectedPoints
+            requiredPoints
+            addressableLabel
+            resources {
+                symbol
+                amount
+                target
+                consumedPowerPerUnit
+            }
+            leaderboard {
+                position
+                masterpiecePoints
+                profile {
+                    uid
+                    walletAddress
+                    avatarUrl
+                    displayName
                 }
+            }
+            rewardStages {
+                requiredMasterpiecePoints
+                rewards {
+"""
+    + _REWARD_SELECTION
+    + """                }
                 battlePassRewards {
-                    __typename
-                    ... on Resource {
-                        symbol
-                        amount
-                    }
-                    ... on Avatar {
-                        avatarUrl
-                        isEns
-                    }
-                    ... on Badge {
-                        badgeName
-                        url
-                        description
-                        displayName
-                        infoUrl
-                    }
-                    ... on OnChainToken {
-                        symbol
-                        infoUrl
-                    }
-                    ... on TradePack {
-                        amount
-                    }
-                    ... on BuildingReward {
-                        buildingType
-                        buildingSubType
-                    }
-                }
+"""
+    + _REWARD_SELECTION
+    + """                }
             }
             leaderboardRewards {
                 top
                 rewards {
-                    __typename
-                    ... on Resource {
-                        symbol
-                        amount
-                    }
-                    ... on Avatar {
-                        avatarUrl
-                        isEns
-                    }
-                    ... on Badge {
-                        badgeName
-                        url
-                        description
-                        displayName
-                        infoUrl
-                    }
-                    ... on OnChainToken {
-                        symbol
-                        infoUrl
-                    }
-                    ... on TradePack {
-                        amount
-                    }
-                    ... on BuildingReward {
-                        buildingType
-                        buildingSubType
-                    }
-                }
+"""
+    + _REWARD_SELECTION
+    + """                }
             }
             startedAt
             profileByUserId(userId: "GfUeRBCZv8OwuUKq7Tu9JVpA70l1") {
@@ -457,9 +520,78 @@ MASTERPIECE_DETAILS_QUERY = """
                 symbol
                 amount
             }
-        }
+"""
+)
+
+MASTERPIECE_DETAILS_QUERY = (
+    """
+    query Masterpiece($id: ID) {
+        masterpiece(id: $id) {"""
+    + MASTERPIECE_DETAILS_FIELDS
+    + """        }
     }
 """
+)
+
+# Masterpieces per aliased request; keeps each query well under the
+# server's complexity limits (every one carries a full leaderboard).
+MASTERPIECE_DETAILS_BATCH_SIZE = 10
+
+
+@lru_cache(maxsize=MASTERPIECE_DETAILS_BATCH_SIZE)
+def _masterpiece_details_batch_query(count: int) -> str:
+    """Query fetching `count` masterpieces as aliases m0..m{count-1}."""
+    params = ", ".join(f"$id{i}: ID" for i in range(count))
+    fields = "".join(
+        f"        m{i}: masterpiece(id: $id{i}) {{{MASTERPIECE_DETAILS_FIELDS}        }}\n"
+        for i in range(count)
+    )
+    return f"\n    query Masterpieces({params}) {{\n{fields}    }}\n"
+
+
+def fetch_masterpiece_details_many(masterpiece_ids: List[Any]) -> Dict[str, dict]:
+    """
+    Fetch full details for several masterpieces with one GraphQL request
+    per MASTERPIECE_DETAILS_BATCH_SIZE ids.
+
+    Returns { "12": {...details...}, ... } keyed by the id as a string;
+    ids that could not be loaded are left out. If a batched request is
+    rejected, that batch is fetched one id at a time instead; if Craft World
+    cannot be reached at all, the remaining ids are given up on.
+    """
+    ids: List[str] = []
+    for mid in masterpiece_ids:
+        try:
+            key = str(int(mid))
+        except (TypeError, ValueError):
+            continue
+        if key != "0" and key not in ids:
+            ids.append(key)
+
+    out: Dict[str, dict] = {}
+    for start in range(0, len(ids), MASTERPIECE_DETAILS_BATCH_SIZE):
+        batch = ids[start:start + MASTERPIECE_DETAILS_BATCH_SIZE]
+        try:
+            data = call_graphql(
+                _masterpiece_details_batch_query(len(batch)),
+                variables={f"id{i}": mid for i, mid in enumerate(batch)},
+            )
+        except GraphQLNetworkError as e:
+            print(f"[WARN] fetch_masterpiece_details_many({ids[start:]}): {e}")
+            break
+        except Exception as e:
+            print(f"[WARN] fetch_masterpiece_details_many({batch}): {e}; retrying one by one")
+            for mid in batch:
+                masterpiece = fetch_masterpiece_details(mid)
+                if masterpiece:
+                    out[mid] = masterpiece
+            continue
+
+        for i, mid in enumerate(batch):
+            masterpiece = data.get(f"m{i}")
+            if masterpiece:
+                out[mid] = masterpiece
+    return out
 
 
 
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
 import csv
+import heapq
 
 # Point this at your new, clean CSV
 CSV_FILE = "Game Data - Factories - rev. v_01 +events.csv"
@@ -311,6 +312,12 @@ FACTORY_DISPLAY_INDEX: dict[str, int] = {
     tok: idx for idx, tok in enumerate(FACTORY_DISPLAY_ORDER)
 }
 
+# Each factory's levels, ascending. Sorted once here at load time so views
+# can look them up instead of re-sorting the level keys on every request.
+FACTORY_LEVELS_SORTED: dict[str, tuple] = {
+    tok: tuple(sorted(lvls.keys())) for tok, lvls in FACTORIES_FROM_CSV.items()
+}
+
 
 def compute_factory_result_csv(
     factories: Dict[str, Dict[int, dict]],
@@ -488,8 +495,10 @@ def compute_best_setups_csv(
                 }
             )
 
-    results.sort(key=lambda r: r["profit_coin_per_hour"], reverse=True)
-    return results[:top_n], combined_speed, worker_factor
+    # Partial sort: only the top_n rows are kept (same order and ties as
+    # a full sort(reverse=True)[:top_n]).
+    best = heapq.nlargest(top_n, results, key=lambda r: r["profit_coin_per_hour"])
+    return best, combined_speed, worker_factor
 
 
 
@@ -7,6 +7,12 @@ from typing import Dict, Any, List
 
 GRAPHQL_ENDPOINT = "https://craft-world.gg/graphql"
 
+# plan_cheapest_combo() asks predictReward about every open resource of
+# the masterpiece, so its calls share one keep-alive session. A stalled
+# request fails after REQUEST_TIMEOUT_SECONDS instead of hanging the plan.
+_SESSION = requests.Session()
+REQUEST_TIMEOUT_SECONDS = 20
+
 # Default for you – app can override by passing user_id explicitly
 DEFAULT_USER_ID = "GfUeRBCZv8OwuUKq7Tu9JVpA70l1"
 
@@ -30,7 +36,9 @@ def graphql_request(query: str, variables: Dict[str, Any] | None = None) -> Dict
     }
     payload = {"query": query, "variables": variables or {}}
 
-    resp = requests.post(GRAPHQL_ENDPOINT, headers=headers, json=payload)
+    resp = _SESSION.post(
+        GRAPHQL_ENDPOINT, headers=headers, json=payload, timeout=REQUEST_TIMEOUT_SECONDS
+    )
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError as e:
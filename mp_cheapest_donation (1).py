@@ -6,6 +6,12 @@ import requests
 
 GRAPHQL_ENDPOINT = "https://craft-world.gg/graphql"
 
+# The analysis makes one predictReward call per resource still needed by
+# the masterpiece; reusing this session keeps the whole run on a single
+# connection. Each call gives up after REQUEST_TIMEOUT_SECONDS.
+_SESSION = requests.Session()
+REQUEST_TIMEOUT_SECONDS = 20
+
 # 👇 Change this if you ever want to run it for a different account by default
 DEFAULT_USER_ID = "GfUeRBCZv8OwuUKq7Tu9JVpA70l1"
 
@@ -28,7 +34,9 @@ def graphql_request(query: str, variables: dict | None = None) -> dict:
     }
     payload = {"query": query, "variables": variables or {}}
 
-    resp = requests.post(GRAPHQL_ENDPOINT, headers=headers, json=payload)
+    resp = _SESSION.post(
+        GRAPHQL_ENDPOINT, headers=headers, json=payload, timeout=REQUEST_TIMEOUT_SECONDS
+    )
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError as e:
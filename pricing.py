@@ -1,9 +1,13 @@
 from typing import Dict, Optional, List
+import itertools
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
 from craftworld_api import call_graphql
+from ttl_cache import TTLCache
 
 
 # Ronin token addresses (we mainly need COIN -> USD)
@@ -62,12 +66,31 @@ TOKEN_ADDRESSES: Dict[str, str] = {
 }
 
 GECKO_BASE = "https://api.geckoterminal.com/api/v2/networks/ronin/tokens/"
+# Keep-alive session for GeckoTerminal (Craft World calls go through
+# craftworld_api's pooled session).
+_GECKO_SESSION = requests.Session()
+
+# A price refresh hits two unrelated hosts (Craft World for the exchange
+# list, GeckoTerminal for COIN/USD); the Gecko lookup runs here meanwhile.
+_GECKO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gecko")
 
 # Simple in-memory cache for BUY/SELL quotes used by Profitability tab
 _QUOTE_CACHE: Dict[str, Dict[str, float]] = {}
 _QUOTE_CACHE_TS: Dict[str, float] = {}
 QUOTE_TTL_SECONDS = 60.0  # reuse quotes for 60 seconds per symbol
 
+# Flat COIN price map shared by every tab (see fetch_live_prices_in_coin)
+LIVE_PRICES_TTL_SECONDS = 30.0
+_LIVE_PRICES_CACHE = TTLCache(LIVE_PRICES_TTL_SECONDS)
+_LIVE_PRICES_SNAPSHOT_IDS = itertools.count(1)
+# One refresh at a time: requests that arrive while prices are being
+# fetched wait for that fetch instead of all hitting the APIs at once.
+_LIVE_PRICES_LOCK = threading.Lock()
+# After a failed refresh, callers get the last good prices (or the error)
+# straight away for this long instead of each waiting on the upstream.
+_LIVE_PRICES_FAILED_TS: Dict[str, float] = {}
+LIVE_PRICES_RETRY_SECONDS = 15.0
+
 
 
 def _normalize_symbol(sym_raw: Optional[str]) -> str:
@@ -88,7 +111,7 @@ def _get_usd_price(token_address: Optional[str]) -> Optional[float]:
 
     url = f"{GECKO_BASE}{token_address}"
     try:
-        resp = requests.get(url, timeout=15)
+        resp = _GECKO_SESSION.get(url, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         # Expected shape:
@@ -316,17 +339,96 @@ def fetch_exchange_prices_coin() -> Dict[str, float]:
 
 
 
-def fetch_live_prices_in_coin() -> Dict[str, float]:
+class LivePrices(dict):
+    """
+    Price map returned by fetch_live_prices_in_coin(). `snapshot_id` is
+    bumped on every successful refresh, so caches of results derived from
+    the prices can key on it instead of hashing the whole map.
+    """
+
+    def __init__(self, prices: Dict[str, float], snapshot_id: int) -> None:
+        super().__init__(prices)
+        self.snapshot_id = snapshot_id
+
+    def copy(self) -> "LivePrices":
+        return LivePrices(self, self.snapshot_id)
+
+
+def prices_snapshot_id(prices: Dict[str, float]) -> Optional[int]:
+    """snapshot_id of a fetch_live_prices_in_coin() result, None for any other dict."""
+    return getattr(prices, "snapshot_id", None)
+
+
+def fetch_live_prices_in_coin(force_refresh: bool = False) -> Dict[str, float]:
     """High-level helper for the app.
 
     Returns a dict:
       - token -> price in COIN
       - special key "_COIN_USD" for COIN price in USD (may be 0.0 if Gecko fails)
+
+    Results are reused for LIVE_PRICES_TTL_SECONDS (pass force_refresh=True
+    to skip the cache); callers get their own copy, a LivePrices carrying
+    the snapshot_id of the refresh. If a refresh fails, the last good
+    prices are returned instead of raising, and the upstream is not retried
+    for LIVE_PRICES_RETRY_SECONDS.
     """
-    prices_coin = fetch_exchange_prices_coin()
+    now = time.time()
+    if not force_refresh:
+        fresh = _LIVE_PRICES_CACHE.get("all")
+        if fresh is not None:
+            return fresh.copy()
+    cached = _LIVE_PRICES_CACHE.get_stale("all")
+    if not force_refresh and (now - _LIVE_PRICES_FAILED_TS.get("all", 0.0)) < LIVE_PRICES_RETRY_SECONDS:
+        return _live_prices_fallback(cached)
+
+    with _LIVE_PRICES_LOCK:
+        # Another request may have refreshed (or just failed to) while we
+        # waited for the lock; either way don't hit the upstream again.
+        # (The cache is only filled under this lock, so these reads agree.)
+        latest = _LIVE_PRICES_CACHE.get_stale("all")
+        if latest is not None and (
+            latest is not cached or (not force_refresh and "all" in _LIVE_PRICES_CACHE)
+        ):
+            return latest.copy()
+        if _LIVE_PRICES_FAILED_TS.get("all", 0.0) >= now:
+            return _live_prices_fallback(cached)
 
+        try:
+            prices_coin = _fetch_live_prices_in_coin_uncached()
+        except Exception as e:
+            _LIVE_PRICES_FAILED_TS["all"] = time.time()
+            if cached is None:
+                raise
+            print("[pricing] live price refresh failed, using last good prices:", e)
+            return cached.copy()
+
+        if prices_coin:
+            snapshot = LivePrices(prices_coin, next(_LIVE_PRICES_SNAPSHOT_IDS))
+            _LIVE_PRICES_CACHE.set("all", snapshot)
+            _LIVE_PRICES_FAILED_TS.pop("all", None)
+            return snapshot.copy()
+        if cached is not None:
+            _LIVE_PRICES_FAILED_TS["all"] = time.time()
+            return cached.copy()
+        return prices_coin
+
+
+def _live_prices_fallback(cached: Optional[LivePrices]) -> Dict[str, float]:
+    """Last good prices while a refresh is backing off (raises if none)."""
+    if cached is None:
+        raise RuntimeError("Live price refresh failed recently; retrying shortly.")
+    return cached.copy()
+
+
+def _fetch_live_prices_in_coin_uncached() -> Dict[str, float]:
+    """Exchange prices + COIN/USD + derived FISH/WORM prices (no cache)."""
     coin_addr = TOKEN_ADDRESSES.get("COIN")
-    coin_usd = _get_usd_price(coin_addr) if coin_addr else None
+    coin_usd_future = _GECKO_POOL.submit(_get_usd_price, coin_addr) if coin_addr else None
+
+    prices_coin = fetch_exchange_prices_coin()
+
+    # _get_usd_price() never raises (None on failure)
+    coin_usd = coin_usd_future.result() if coin_usd_future else None
     prices_coin["_COIN_USD"] = float(coin_usd) if coin_usd else 0.0
 
     # Derived prices that rely on exchange data
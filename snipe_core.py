@@ -0,0 +1,171 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import bisect
+import itertools
+import math
+
+
+# ============================================================
+# Snipe calculator arithmetic
+# ------------------------------------------------------------
+# Pure int/float helpers behind the Snipe tab: no Flask, no network,
+# no app state. Everything is fully annotated and stdlib-only so this
+# module can be compiled with mypyc (`mypyc snipe_core.py`) and the
+# resulting extension is picked up by `import snipe_core` unchanged.
+# ============================================================
+
+
+def snipe_option_rows(
+    symbols: List[str],
+    remaining: List[float],
+    pts_per_unit: List[float],
+    battery_per_unit: List[float],
+    price_coin: List[float],
+    points_needed: float,
+) -> List[Dict[str, Any]]:
+    """
+    Single-resource snipe options from per-symbol columns (parallel lists,
+    pts_per_unit > 0). Each quantity is computed column-wise, then the rows
+    are ordered once by COIN cost (no price data sorts last) and only the
+    final rows are built as dicts for the template.
+    """
+    n = len(symbols)
+    if points_needed > 0:
+        # -(-a // b) is ceil(a / b) on the exact quotient, without a
+        # math.ceil call per column entry.
+        units_needed = [int(-(-points_needed // p)) for p in pts_per_unit]
+    else:
+        units_needed = [0] * n
+    enough = [u <= r for u, r in zip(units_needed, remaining)]
+    max_points = [
+        (u if ok else r) * p
+        for u, r, p, ok in zip(units_needed, remaining, pts_per_unit, enough)
+    ]
+    coin_cost = [u * c for u, c in zip(units_needed, price_coin)]
+    battery_cost = [u * b for u, b in zip(units_needed, battery_per_unit)]
+
+    order = sorted(range(n), key=lambda i: coin_cost[i] if coin_cost[i] > 0 else 1e18)
+    return [
+        {
+            "symbol": symbols[i],
+            "remaining": remaining[i],
+            "points_per_unit": pts_per_unit[i],
+            "battery_per_unit": battery_per_unit[i],
+            "price_coin": price_coin[i],
+            "units_needed": units_needed[i],
+            "coin_cost": coin_cost[i],
+            "battery_cost": battery_cost[i],
+            "enough": enough[i],
+            "max_points": max_points[i],
+        }
+        for i in order
+    ]
+
+
+def greedy_mix_plan(
+    symbols: List[str],
+    remaining: List[float],
+    pts_per_unit: List[float],
+    battery_per_unit: List[float],
+    price_coin: List[float],
+    points_needed: float,
+) -> Optional[Dict[str, Any]]:
+    """
+    Cheapest multi-resource mix for `points_needed` from the same
+    per-symbol columns as snipe_option_rows (greedy by COIN/point). None
+    if nothing with a price can be bought.
+
+    Greedy = buy resources out in COIN/point order until the target is
+    met. Buying one out yields int(remaining) whole units, so a prefix
+    sum of those capacities finds the last (partial) resource directly.
+
+    Points are linear in units for every resource, so this ratio order is
+    the marginal-greedy allocation (optimal up to rounding the last
+    resource up to whole units) and costs one sort over the K options:
+    O(K log K), independent of how many points are needed.
+    """
+    if points_needed <= 0 or not symbols:
+        return None
+
+    # indices of buyable options, cheapest COIN per point first
+    idx = [
+        i
+        for i in range(len(symbols))
+        if pts_per_unit[i] > 0 and price_coin[i] > 0 and remaining[i] > 0
+    ]
+    cpp_col = [price_coin[i] / pts_per_unit[i] for i in idx]
+    order = sorted(range(len(idx)), key=cpp_col.__getitem__)
+    idx = [idx[k] for k in order]
+    cpp_col = [cpp_col[k] for k in order]
+
+    # Uncapped fallback resources have infinite remaining units.
+    whole: List[float] = [
+        int(remaining[i]) if math.isfinite(remaining[i]) else remaining[i]
+        for i in idx
+    ]
+    caps = [u * pts_per_unit[i] for u, i in zip(whole, idx)]
+    cum_caps = list(itertools.accumulate(caps))
+    cut = bisect.bisect_left(cum_caps, points_needed)
+
+    # (coin_per_point, column index, units, points) per chosen resource
+    picks = [
+        (cpp, i, units, cap)
+        for cpp, i, units, cap in zip(cpp_col[:cut], idx[:cut], whole[:cut], caps[:cut])
+        if cap > 0
+    ]
+    if cut < len(idx):
+        i = idx[cut]
+        pts_from_this = points_needed - (cum_caps[cut - 1] if cut else 0.0)
+        # convert points back to units, round up
+        units = min(int(-(-pts_from_this // pts_per_unit[i])), whole[cut])
+        picks.append((cpp_col[cut], i, units, pts_from_this))
+        remaining_pts = 0.0
+    else:
+        remaining_pts = points_needed - (cum_caps[-1] if cum_caps else 0.0)
+
+    chosen_rows: List[Dict[str, Any]] = [
+        {
+            "symbol": symbols[i],
+            "units": units,
+            "points": pts,
+            "coin_cost": units * price_coin[i],
+            "battery_cost": units * battery_per_unit[i],
+            "coin_per_point": cpp,
+        }
+        for cpp, i, units, pts in picks
+    ]
+    if not chosen_rows:
+        return None
+
+    achieved_points = points_needed - max(0.0, remaining_pts)
+    return {
+        "rows": chosen_rows,
+        "target_points": points_needed,
+        "achieved_points": achieved_points,
+        "enough": remaining_pts <= 0.0,
+        "total_coin": sum(r["coin_cost"] for r in chosen_rows),
+        "total_battery": sum(r["battery_cost"] for r in chosen_rows),
+    }
+
+
+class ComboCostRow(NamedTuple):
+    """One resource line of a combo donation (read by attribute in Jinja)."""
+
+    symbol: str
+    amount: float
+    price_coin: float
+    coin_cost: float
+
+
+def combo_cost_rows(
+    symbols: List[str],
+    amounts: List[float],
+    price_coin: List[float],
+) -> Tuple[List[ComboCostRow], float]:
+    """
+    Per-resource COIN cost rows for a combo donation (parallel lists) and
+    their total. Costs are computed column-wise first and the rows are
+    built once at the end as lightweight named tuples.
+    """
+    coin_cost = [a * c for a, c in zip(amounts, price_coin)]
+    rows = list(map(ComboCostRow, symbols, amounts, price_coin, coin_cost))
+    return rows, sum(coin_cost)
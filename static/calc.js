@@ -0,0 +1,55 @@
+// Calculate tab: rebuild the level / target level dropdowns when the
+// factory changes. The page sets window.__CW_FACTORY_LEVELS
+// (token -> sorted recipe levels) before loading this script.
+(function() {
+  const factoryLevels = window.__CW_FACTORY_LEVELS || {};
+  const factorySelect = document.getElementById("factory");
+  const levelSelect = document.getElementById("level");
+  const targetSelect = document.getElementById("target_level");
+
+  function rebuildLevelOptions(token) {
+    const levels = factoryLevels[token] || [];
+    const currentLevel = levelSelect.value;
+    const currentTarget = targetSelect.value;
+
+    levelSelect.innerHTML = "";
+    const optAuto = document.createElement("option");
+    optAuto.value = "";
+    optAuto.textContent = "(auto)";
+    levelSelect.appendChild(optAuto);
+
+    targetSelect.innerHTML = "";
+    const optNone = document.createElement("option");
+    optNone.value = "";
+    optNone.textContent = "(none)";
+    targetSelect.appendChild(optNone);
+
+    levels.forEach((lvl) => {
+      const v = String(lvl);
+
+      const opt = document.createElement("option");
+      opt.value = v;
+      opt.textContent = "L" + v;
+      if (v === currentLevel) {
+        opt.selected = true;
+      }
+      levelSelect.appendChild(opt);
+
+      const opt2 = document.createElement("option");
+      opt2.value = v;
+      opt2.textContent = "L" + v;
+      if (v === currentTarget) {
+        opt2.selected = true;
+      }
+      targetSelect.appendChild(opt2);
+    });
+  }
+
+  if (factorySelect && levelSelect && targetSelect) {
+    factorySelect.addEventListener("change", function() {
+      rebuildLevelOptions(this.value);
+    });
+
+    rebuildLevelOptions(factorySelect.value);
+  }
+})();
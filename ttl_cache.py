@@ -0,0 +1,63 @@
+from typing import Any, Dict, Hashable, Tuple
+import threading
+import time
+
+
+# ============================================================
+# Short-lived in-memory caches
+# ------------------------------------------------------------
+# Every tab keeps a few results (prices, masterpiece details, factory
+# tables) for a handful of seconds. TTLCache is the one dict-plus-
+# timestamp implementation they all share.
+# ============================================================
+
+
+class TTLCache:
+    """
+    Dict cache whose entries expire `ttl_seconds` after they were set.
+
+    Entries are kept in insertion order (re-setting a key moves it to the
+    end), so the oldest entries are always at the front: set() only looks
+    at the front to drop what has expired, instead of scanning every key,
+    and evicts the oldest once `max_entries` is reached.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """The value for `key` if it is still fresh, else `default`."""
+        entry = self._entries.get(key)
+        if entry is None or (time.time() - entry[0]) >= self.ttl_seconds:
+            return default
+        return entry[1]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """The last value set for `key`, even if it has expired."""
+        entry = self._entries.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = time.time()
+        entries = self._entries
+        with self._lock:
+            entries.pop(key, None)
+            while entries:
+                oldest = next(iter(entries))
+                if len(entries) < self.max_entries and (now - entries[oldest][0]) < self.ttl_seconds:
+                    break
+                del entries[oldest]
+            entries[key] = (now, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+_MISSING = object()